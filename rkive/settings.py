@@ -89,6 +89,19 @@ DATABASES = {
     }
 }
 
+# The Faculty cache version and dashboard/ sections live here. LocMemCache is private to
+# each process: invalidations made in one worker reach the others only when their copies
+# expire (FACULTY_CACHE_TTL, DASHBOARD_CACHE_TTL). Point this at a shared backend
+# (Redis, Memcached or DatabaseCache) for immediate invalidation across workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Seconds a process may serve its in-memory Faculty rows before reloading them.
+FACULTY_CACHE_TTL = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -138,6 +151,90 @@ REST_FRAMEWORK = {
     ]
 }
 
+# DOCX -> PDF conversion backend. 'libreoffice' keeps a pool of warm headless
+# LibreOffice instances (via unoserver); 'word' drives MS Word over COM on Windows.
+DOCUMENT_CONVERTER = {
+    'BACKEND': 'word' if os.name == 'nt' else 'libreoffice',
+    'WORKERS': 2,
+    'EXECUTABLE': 'soffice',
+    'UNOSERVER': 'unoserver',
+    'CONVERSION_TIMEOUT': 60,
+    'HEALTH_CHECK_INTERVAL': 30,
+    'MAX_CONVERSIONS_PER_WORKER': 200,
+}
+
+# Background workers for asynchronous document generation (?async=1 on the docx endpoints).
+DOCUMENT_JOB_WORKERS = 2
+
+# Batch generation (documents/batch/): render processes and the largest accepted batch.
+DOCUMENT_BATCH_PROCESSES = None  # defaults to os.cpu_count()
+DOCUMENT_BATCH_MAX_ITEMS = 500
+
+# Send per-stage timings of document requests to clients as a Server-Timing header.
+# Histograms behind document-metrics/ are always collected.
+DOCUMENT_SERVER_TIMING = True
+
+# Admin-revised Word templates are published here as immutable revisions; the newest
+# DOCUMENT_TEMPLATE_REVISIONS are kept for rollback.
+DOCUMENT_TEMPLATE_STORE = BASE_DIR / 'template_revisions'
+DOCUMENT_TEMPLATE_REVISIONS = 10
+
+# Generation engine per Word template name: 'docx' (docxtpl + PDF conversion) or
+# 'pdf_form' (fill <name>.pdf, an AcroForm with fields named like the DOCX placeholders,
+# from DOCUMENT_PDF_TEMPLATES_DIR). PDF forms do not pick up admin {{rev}}/{{date}} revisions.
+DOCUMENT_ENGINES = {}
+DOCUMENT_PDF_TEMPLATES_DIR = BASE_DIR / 'rkive' / 'templates' / 'pdf_templates'
+DOCUMENT_PDF_FORM_FLATTEN = True
+
+# Manuscript full-text search (FTS5 on SQLite, tsvector on PostgreSQL).
+MANUSCRIPT_SEARCH_LIMIT = 200
+MANUSCRIPT_TEXT_MAX_CHARS = 1_000_000
+
+# Page sizes for manuscripts/?limit=&cursor= (keyset pagination).
+MANUSCRIPT_PAGE_SIZE = 50
+MANUSCRIPT_MAX_PAGE_SIZE = 200
+
+# Seconds a dashboard/ section stays cached; signals drop a section early when its rows change.
+DASHBOARD_CACHE_TTL = 60
+
+# Page sizes for list-files/?limit=&cursor= (keyset pagination over the StoredFile catalog).
+FILE_LIST_PAGE_SIZE = 100
+FILE_LIST_MAX_PAGE_SIZE = 1000
+
+# Page sizes for list-users/?limit=&cursor= (keyset pagination on userID).
+USER_LIST_PAGE_SIZE = 100
+USER_LIST_MAX_PAGE_SIZE = 1000
+
+# Resumable manuscript uploads (manuscripts/uploads/). Partial files must live on the
+# same filesystem as MEDIA_ROOT so finished uploads can be renamed into place;
+# None means MEDIA_ROOT/.uploads.
+MANUSCRIPT_UPLOAD_DIR = None
+MANUSCRIPT_UPLOAD_MAX_SIZE = 500 * 1024 * 1024
+
+# Rewrite new manuscripts and generated PDFs in the background (PyMuPDF: unused objects
+# dropped, duplicates merged, streams deflated, linearized). The result replaces the
+# original only if it is smaller and reopens cleanly; savings are logged per file as
+# PdfOptimization rows. `manage.py optimize_pdfs` processes files that already exist.
+PDF_OPTIMIZE_ON_INGEST = True
+
+# Page previews (manuscripts/<id>/pages/<n>/?width=, .../thumbnail/). Widths are rounded up
+# to a multiple of the step; rendered JPEGs are cached on disk by PDF hash, page and width,
+# least recently used evicted past the budget. None means MEDIA_ROOT/.page_cache.
+PAGE_IMAGE_CACHE_DIR = None
+PAGE_IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+PAGE_IMAGE_DEFAULT_WIDTH = 800
+PAGE_IMAGE_MAX_WIDTH = 2000
+PAGE_IMAGE_WIDTH_STEP = 100
+PAGE_THUMBNAIL_WIDTH = 200
+
+# How authorized media downloads are delivered. 'django' streams them from the worker
+# (and serves MEDIA_URL in development); 'x-accel-redirect' (nginx) and 'x-sendfile'
+# (Apache mod_xsendfile, lighttpd) hand the transfer to the front web server after the
+# view has checked access. For nginx, map the prefix to MEDIA_ROOT in an internal location:
+#   location /protected-media/ { internal; alias /srv/rkive/media/; }
+MEDIA_DELIVERY = 'django'
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
 SIMPLE_JWT = {
     "USER_ID_FIELD": "userID",  # Ensure it's set to a valid field
 }
@@ -9,4 +9,6 @@ urlpatterns = [
     path('api/', include('users.urls')),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# With an offloading MEDIA_DELIVERY, media is only reachable through the authorizing views.
+if settings.MEDIA_DELIVERY == 'django':
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
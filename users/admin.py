@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserAccount, Faculty, Manuscript, ApplicationDefense, PanelApplication, SubmissionReview
+from .models import UserAccount, Faculty, Manuscript, ApplicationDefense, PanelApplication, SubmissionReview, DocumentJob, ContentBlob, ManuscriptUpload, PdfOptimization, DocumentStat
 
 class UserAccountAdmin(admin.ModelAdmin):
     list_display = ('userID', 'email', 'password', 'is_active', 'is_staff', 'is_superuser', 'is_dean', 'is_headdept', 'is_faculty', 'is_student')  
@@ -42,9 +42,37 @@ class SubmissionReviewAdmin(admin.ModelAdmin):
     search_fields = ('reviewer__name', 'application_defense__research_title', 'panel_application__research_title')
     list_filter = ('status', 'reviewed_at')
 
+class DocumentJobAdmin(admin.ModelAdmin):
+    list_display = ('jobID', 'kind', 'user', 'status', 'pdf_file', 'created_at', 'finished_at')
+    search_fields = ('jobID', 'user__email')
+    list_filter = ('kind', 'status')
+
+class ContentBlobAdmin(admin.ModelAdmin):
+    list_display = ('digest', 'name', 'size', 'ref_count', 'created_at')
+    search_fields = ('digest', 'name')
+
+class ManuscriptUploadAdmin(admin.ModelAdmin):
+    list_display = ('uploadID', 'user', 'filename', 'offset', 'length', 'manuscript', 'updated_at')
+    search_fields = ('uploadID', 'filename', 'user__email')
+
+class PdfOptimizationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'original_size', 'optimized_size', 'bytes_saved', 'created_at')
+    search_fields = ('name', 'original_name')
+    list_filter = ('status',)
+
+class DocumentStatAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'department', 'month', 'count')
+    list_filter = ('kind', 'month')
+    search_fields = ('department',)
+
 admin.site.register(UserAccount, UserAccountAdmin)
 admin.site.register(Faculty, FacultyAdmin)
 admin.site.register(Manuscript, ManuscriptAdmin)
 admin.site.register(ApplicationDefense, ApplicationDefenseAdmin)
 admin.site.register(PanelApplication, PanelApplicationAdmin)
 admin.site.register(SubmissionReview, SubmissionReviewAdmin)
+admin.site.register(DocumentJob, DocumentJobAdmin)
+admin.site.register(ContentBlob, ContentBlobAdmin)
+admin.site.register(ManuscriptUpload, ManuscriptUploadAdmin)
+admin.site.register(PdfOptimization, PdfOptimizationAdmin)
+admin.site.register(DocumentStat, DocumentStatAdmin)
@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .docx_templates import render_docx
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    # Spawned (not forked) workers: they only import docxtpl, never Django or open DB connections.
+    global _render_pool
+    if _render_pool is None:
+        with _render_pool_lock:
+            if _render_pool is None:
+                _render_pool = ProcessPoolExecutor(
+                    max_workers=getattr(settings, 'DOCUMENT_BATCH_PROCESSES', None) or os.cpu_count(),
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+    return _render_pool
+
+
+def render_many(template_path, contexts, key=None):
+    # Yields rendered DOCX bytes in input order while later documents are still rendering.
+    count = len(contexts)
+    chunksize = max(1, count // (4 * (os.cpu_count() or 1)))
+    return get_render_pool().map(render_docx, [template_path] * count, contexts, [key] * count, chunksize=chunksize)
+
+
+class _ZipSink:
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries, chunk_size=64 * 1024):
+    """Yield a ZIP archive of (arcname, path or bytes) entries as it is written."""
+    sink = _ZipSink()
+    # PDFs are already compressed, so entries are stored as-is.
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as archive:
+        for arcname, source in entries:
+            if isinstance(source, bytes):
+                archive.writestr(arcname, source)
+                yield sink.drain()
+                continue
+            info = zipfile.ZipInfo.from_file(source, arcname)
+            with open(source, 'rb') as src, archive.open(info, 'w') as dest:
+                while chunk := src.read(chunk_size):
+                    dest.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
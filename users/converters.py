@@ -0,0 +1,279 @@
+import atexit
+import logging
+import os
+import queue
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import xmlrpc.client
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPTIONS = {
+    'BACKEND': 'libreoffice',
+    'WORKERS': 2,
+    'EXECUTABLE': 'soffice',
+    'UNOSERVER': 'unoserver',
+    'PROFILE_ROOT': os.path.join(tempfile.gettempdir(), 'rkive-unoserver'),
+    'STARTUP_TIMEOUT': 30,
+    'CONVERSION_TIMEOUT': 60,
+    'ACQUIRE_TIMEOUT': 120,
+    'HEALTH_CHECK_INTERVAL': 30,
+    'MAX_CONVERSIONS_PER_WORKER': 200,
+}
+
+
+class ConversionError(Exception):
+    pass
+
+
+class BaseConverter:
+    def __init__(self, options):
+        self.options = options
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    def convert(self, docx_path, pdf_path):
+        raise NotImplementedError
+
+    def convert_bytes(self, docx_bytes):
+        # Backends that can only work on files get a private scratch directory, never MEDIA_ROOT.
+        with tempfile.TemporaryDirectory(prefix='rkive-convert-') as tmpdir:
+            docx_path = os.path.join(tmpdir, 'document.docx')
+            pdf_path = os.path.join(tmpdir, 'document.pdf')
+            with open(docx_path, 'wb') as f:
+                f.write(docx_bytes)
+            self.convert(docx_path, pdf_path)
+            with open(pdf_path, 'rb') as f:
+                return f.read()
+
+
+class WordConverter(BaseConverter):
+    # Legacy Windows backend: a fresh Word instance per conversion through COM.
+    def convert(self, docx_path, pdf_path):
+        import pythoncom
+        from win32com.client import Dispatch
+
+        pythoncom.CoInitialize()
+        try:
+            word = Dispatch('Word.Application')
+            word.Visible = False
+            try:
+                doc = word.Documents.Open(docx_path)
+                doc.SaveAs(pdf_path, FileFormat=17)
+                doc.Close()
+            finally:
+                word.Quit()
+        finally:
+            pythoncom.CoUninitialize()
+
+
+class _TimeoutTransport(xmlrpc.client.Transport):
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class UnoserverWorker:
+    """A long-lived headless LibreOffice instance driven through unoserver."""
+
+    def __init__(self, index, options):
+        self.index = index
+        self.options = options
+        self.profile_dir = os.path.join(options['PROFILE_ROOT'], f'{os.getpid()}-{index}')
+        self.log_path = f'{self.profile_dir}.log'
+        self.process = None
+        self.port = None
+        self.conversions = 0
+        self.last_check = 0.0
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def start(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        self.port = _free_port()
+        command = [
+            self.options['UNOSERVER'],
+            '--interface', '127.0.0.1',
+            '--port', str(self.port),
+            '--uno-port', str(_free_port()),
+            '--executable', self.options['EXECUTABLE'],
+            # A plain path: unoserver turns it into the file:// URI LibreOffice expects.
+            '--user-installation', self.profile_dir,
+            '--conversion-timeout', str(self.options['CONVERSION_TIMEOUT']),
+        ]
+        # Output goes to a file rather than a pipe, which nobody would drain.
+        with open(self.log_path, 'wb') as log:
+            self.process = subprocess.Popen(
+                command,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        self.conversions = 0
+
+        deadline = time.monotonic() + self.options['STARTUP_TIMEOUT']
+        while time.monotonic() < deadline:
+            if self.healthy():
+                logger.info('unoserver worker %s ready on port %s', self.index, self.port)
+                return
+            if not self.alive():
+                break
+            time.sleep(0.25)
+
+        self.stop()
+        output = self.output()
+        logger.error('unoserver worker %s failed to start: %s', self.index, output or '(no output)')
+        raise ConversionError(f'unoserver worker {self.index} failed to start: {output or "(no output)"}')
+
+    def output(self, limit=4096):
+        """The tail of the worker's combined stdout and stderr."""
+        try:
+            with open(self.log_path, 'rb') as log:
+                log.seek(max(0, os.path.getsize(self.log_path) - limit))
+                return log.read().decode('utf-8', 'replace').strip()
+        except OSError:
+            return ''
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+                self.process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                try:
+                    os.killpg(self.process.pid, signal.SIGKILL)
+                except OSError:
+                    pass
+                self.process.wait()
+        self.process = None
+
+    def restart(self):
+        logger.warning('Restarting unoserver worker %s', self.index)
+        self.stop()
+        self.start()
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def healthy(self):
+        if not self.alive():
+            return False
+        try:
+            proxy = xmlrpc.client.ServerProxy(self.url, transport=_TimeoutTransport(5))
+            proxy.info()
+        except (OSError, xmlrpc.client.Error):
+            return False
+        self.last_check = time.monotonic()
+        return True
+
+    def convert(self, docx_path=None, pdf_path=None, docx_bytes=None):
+        from unoserver.client import UnoClient
+
+        client = UnoClient(server='127.0.0.1', port=str(self.port))
+        result = client.convert(inpath=docx_path, indata=docx_bytes, outpath=pdf_path, convert_to='pdf')
+        self.conversions += 1
+        return result
+
+
+class LibreOfficeConverter(BaseConverter):
+    """A bounded pool of warm unoserver workers, started lazily and restarted on crash."""
+
+    def __init__(self, options):
+        super().__init__(options)
+        self._idle = queue.LifoQueue()
+        self._workers = [UnoserverWorker(index, options) for index in range(options['WORKERS'])]
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def close(self):
+        for worker in self._workers:
+            worker.stop()
+
+    def convert(self, docx_path, pdf_path):
+        self._run(docx_path=docx_path, pdf_path=pdf_path)
+
+    def convert_bytes(self, docx_bytes):
+        # The document travels to the office process over the XML-RPC socket, not the disk.
+        return self._run(docx_bytes=docx_bytes)
+
+    def _run(self, **kwargs):
+        worker = self._checkout()
+        try:
+            try:
+                return worker.convert(**kwargs)
+            except Exception:
+                if worker.alive():
+                    raise
+                # The office process died mid-conversion; retry once on a fresh one.
+                worker.restart()
+                return worker.convert(**kwargs)
+        except Exception as e:
+            raise ConversionError(f'PDF conversion failed: {e}') from e
+        finally:
+            self._idle.put(worker)
+
+    def _checkout(self):
+        try:
+            worker = self._idle.get(timeout=self.options['ACQUIRE_TIMEOUT'])
+        except queue.Empty:
+            raise ConversionError('No PDF converter available, try again later.')
+
+        try:
+            if worker.process is None:
+                worker.start()
+            elif not worker.alive() or worker.conversions >= self.options['MAX_CONVERSIONS_PER_WORKER']:
+                worker.restart()
+            elif time.monotonic() - worker.last_check > self.options['HEALTH_CHECK_INTERVAL']:
+                if not worker.healthy():
+                    worker.restart()
+        except Exception:
+            self._idle.put(worker)
+            raise
+        return worker
+
+
+BACKENDS = {
+    'word': WordConverter,
+    'libreoffice': LibreOfficeConverter,
+}
+
+_converter = None
+_converter_lock = threading.Lock()
+
+
+def get_converter():
+    global _converter
+    if _converter is None:
+        with _converter_lock:
+            if _converter is None:
+                options = {**DEFAULT_OPTIONS, **getattr(settings, 'DOCUMENT_CONVERTER', {})}
+                converter = BACKENDS[options['BACKEND']](options)
+                converter.start()
+                atexit.register(converter.close)
+                _converter = converter
+    return _converter
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import document_stats
+from .models import SubmissionReview, UserAccount
+
+CACHE_PREFIX = 'users:dashboard:'
+ROLE_FLAGS = ('is_active', 'is_staff', 'is_superuser', 'is_dean', 'is_headdept', 'is_faculty', 'is_student')
+KIND_BY_CONTENT_TYPE = {model.lower(): kind for model, kind in document_stats.KIND_BY_MODEL.items()}
+
+
+def user_counts():
+    """Users per role flag, counted in a single pass over the table."""
+    return UserAccount.objects.aggregate(
+        total=Count('pk'),
+        **{flag: Count('pk', filter=Q(**{flag: True})) for flag in ROLE_FLAGS},
+    )
+
+
+def submission_counts():
+    return document_stats.summary()
+
+
+def review_counts():
+    """Reviews per status, overall and per reviewed document type."""
+    by_status = {status: 0 for status, _ in SubmissionReview.STATUS_CHOICES}
+    by_type = {}
+    rows = SubmissionReview.objects.values('content_type__model', 'status').annotate(total=Count('pk')).order_by()
+    for row in rows:
+        # A null status is the default, pending.
+        status = row['status'] or 'pending'
+        kind = KIND_BY_CONTENT_TYPE.get(row['content_type__model'], row['content_type__model'] or 'unlinked')
+        by_status[status] = by_status.get(status, 0) + row['total']
+        kinds = by_type.setdefault(kind, dict.fromkeys(by_status, 0))
+        kinds[status] = kinds.get(status, 0) + row['total']
+    return {'total': sum(by_status.values()), 'by_status': by_status, 'by_type': by_type}
+
+
+SECTIONS = {
+    'users': user_counts,
+    'submissions': submission_counts,
+    'reviews': review_counts,
+}
+
+
+def section(name):
+    """One dashboard section from the Django cache, computed on a miss."""
+    key = CACHE_PREFIX + name
+    cached = cache.get(key)
+    if cached is None:
+        cached = {'data': SECTIONS[name](), 'computed_at': timezone.now().isoformat()}
+        cache.set(key, cached, getattr(settings, 'DASHBOARD_CACHE_TTL', 60))
+    return cached
+
+
+def snapshot():
+    sections = {name: section(name) for name in SECTIONS}
+    return {
+        **{name: cached['data'] for name, cached in sections.items()},
+        'computed_at': {name: cached['computed_at'] for name, cached in sections.items()},
+    }
+
+
+def invalidate(*names):
+    """Drop the given sections (all by default); the next request recomputes only those."""
+    cache.delete_many([CACHE_PREFIX + name for name in names or SECTIONS])
@@ -0,0 +1,139 @@
+from collections import defaultdict
+
+from django.apps import apps as django_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+# kind -> (model label, department field or None). Only defense applications carry a department.
+SOURCES = {
+    'manuscript': ('users.Manuscript', None),
+    'application': ('users.ApplicationDefense', 'department'),
+    'panel': ('users.PanelApplication', None),
+}
+KIND_BY_MODEL = {label.split('.')[1]: kind for kind, (label, _) in SOURCES.items()}
+
+
+def stat_key(kind, department, created_at):
+    return kind, department or '', timezone.localtime(created_at).date().replace(day=1)
+
+
+def instance_key(instance):
+    kind = KIND_BY_MODEL[type(instance).__name__]
+    department_field = SOURCES[kind][1]
+    department = getattr(instance, department_field) if department_field else ''
+    return stat_key(kind, department, instance.created_at)
+
+
+def stored_key(instance):
+    """The key of the row as it is in the database, or None if it is not saved yet."""
+    kind = KIND_BY_MODEL[type(instance).__name__]
+    department_field = SOURCES[kind][1]
+    fields = ['created_at', department_field] if department_field else ['created_at']
+    row = type(instance).objects.filter(pk=instance.pk).values(*fields).first() if instance.pk else None
+    if row is None:
+        return None
+    return stat_key(kind, row.get(department_field) if department_field else '', row['created_at'])
+
+
+def _invalidate_dashboard():
+    from . import dashboard
+
+    dashboard.invalidate('submissions')
+
+
+def bump(key, delta):
+    """Add delta to one counter with a single UPDATE, creating the row on first use."""
+    from .models import DocumentStat
+
+    kind, department, month = key
+    counter = DocumentStat.objects.filter(kind=kind, department=department, month=month)
+    transaction.on_commit(_invalidate_dashboard)
+    if counter.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            DocumentStat.objects.create(kind=kind, department=department, month=month, count=delta)
+    except IntegrityError:
+        # Another writer created it first.
+        counter.update(count=F('count') + delta)
+
+
+def record_created(instances):
+    """Count rows that were inserted without post_save, e.g. by bulk_create()."""
+    deltas = defaultdict(int)
+    for instance in instances:
+        deltas[instance_key(instance)] += 1
+    for key, delta in deltas.items():
+        bump(key, delta)
+
+
+def compute_counts(apps=django_apps):
+    """{(kind, department, month): count} straight from the document tables."""
+    counts = {}
+    for kind, (label, department_field) in SOURCES.items():
+        model = apps.get_model(label)
+        group_by = [department_field] if department_field else []
+        rows = (
+            model.objects.annotate(month=TruncMonth('created_at', output_field=DateField()))
+            .values('month', *group_by)
+            .annotate(total=Count('pk'))
+            .order_by()
+        )
+        for row in rows:
+            key = (kind, (row.get(department_field) if department_field else '') or '', row['month'])
+            counts[key] = counts.get(key, 0) + row['total']
+    return counts
+
+
+def _current_counts(DocumentStat, lock=False):
+    rows = DocumentStat.objects.select_for_update() if lock else DocumentStat.objects.all()
+    return {(row.kind, row.department, row.month): row.count for row in rows}
+
+
+def _changes(current, expected):
+    return {
+        key: (current.get(key, 0), expected.get(key, 0))
+        for key in current.keys() | expected.keys()
+        if current.get(key, 0) != expected.get(key, 0)
+    }
+
+
+def drift(apps=django_apps):
+    """{key: (counter, actual)} for the counters that disagree with the document tables."""
+    with transaction.atomic():
+        return _changes(_current_counts(apps.get_model('users', 'DocumentStat')), compute_counts(apps))
+
+
+def rebuild(apps=django_apps):
+    """Replace every counter with a fresh count; returns the cells that changed, as drift() does."""
+    DocumentStat = apps.get_model('users', 'DocumentStat')
+    with transaction.atomic():
+        current = _current_counts(DocumentStat, lock=True)
+        expected = compute_counts(apps)
+        DocumentStat.objects.all().delete()
+        DocumentStat.objects.bulk_create(
+            DocumentStat(kind=kind, department=department, month=month, count=count)
+            for (kind, department, month), count in expected.items()
+        )
+    return _changes(current, expected)
+
+
+def summary():
+    """Dashboard totals from the counters: by type, by department and by month."""
+    from .models import DocumentStat
+
+    by_type = defaultdict(int)
+    by_department = defaultdict(lambda: defaultdict(int))
+    by_month = defaultdict(lambda: defaultdict(int))
+    rows = DocumentStat.objects.exclude(count=0).values_list('kind', 'department', 'month', 'count')
+    for kind, department, month, count in rows:
+        by_type[kind] += count
+        by_department[department or 'Unassigned'][kind] += count
+        by_month[month.strftime('%Y-%m')][kind] += count
+    return {
+        'by_type': {kind: by_type.get(kind, 0) for kind in SOURCES},
+        'by_department': {department: dict(kinds) for department, kinds in sorted(by_department.items())},
+        'by_month': [{'month': month, **kinds} for month, kinds in sorted(by_month.items())],
+    }
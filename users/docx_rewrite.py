@@ -0,0 +1,103 @@
+import os
+import struct
+import threading
+import zipfile
+
+from .utils import atomic_writer
+
+_COPY_CHUNK = 1024 * 1024
+
+
+class PlaceholderIndex:
+    """Which members of a DOCX contain which placeholders, computed once per file version."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def members(self, docx_path, placeholders):
+        stat = os.stat(docx_path)
+        key = (docx_path, tuple(sorted(placeholders)))
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            with self._lock:
+                entry = (version, self._scan(docx_path, placeholders))
+                self._entries[key] = entry
+        return entry[1]
+
+    def _scan(self, docx_path, placeholders):
+        needles = [placeholder.encode('utf-8') for placeholder in placeholders]
+        members = set()
+        with zipfile.ZipFile(docx_path) as archive:
+            for info in archive.infolist():
+                if not info.filename.endswith('.xml'):
+                    continue
+                data = archive.read(info)
+                if any(needle in data for needle in needles):
+                    members.add(info.filename)
+        return frozenset(members)
+
+
+placeholder_index = PlaceholderIndex()
+
+
+def _copy_raw(source, info, target):
+    # Move the member's compressed bytes across untouched: no inflate, no deflate.
+    source.fp.seek(info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, source.fp.read(zipfile.sizeFileHeader))
+    source.fp.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR)
+
+    copied = zipfile.ZipInfo(info.filename, info.date_time)
+    copied.compress_type = info.compress_type
+    copied.comment = info.comment
+    copied.extra = info.extra
+    copied.create_system = info.create_system
+    copied.external_attr = info.external_attr
+    # CRC and sizes go in the local header, so no trailing data descriptor is needed.
+    copied.flag_bits = info.flag_bits & ~0x08
+    copied.CRC = info.CRC
+    copied.compress_size = info.compress_size
+    copied.file_size = info.file_size
+    copied.header_offset = target.fp.tell()
+
+    target.fp.write(copied.FileHeader())
+    remaining = info.compress_size
+    while remaining:
+        chunk = source.fp.read(min(remaining, _COPY_CHUNK))
+        if not chunk:
+            raise zipfile.BadZipFile(f'Truncated member {info.filename}')
+        target.fp.write(chunk)
+        remaining -= len(chunk)
+
+    target.filelist.append(copied)
+    target.NameToInfo[copied.filename] = copied
+    target.start_dir = target.fp.tell()
+    target._didModify = True
+
+
+def rewrite_docx(source_path, output_path, replacements):
+    """Write source_path to output_path with placeholders replaced; False if none are present.
+
+    Only the members that contain a placeholder are inflated and patched; all other parts
+    are copied byte-for-byte. The output is renamed into place once complete.
+    """
+    members = placeholder_index.members(source_path, list(replacements))
+    if not members:
+        return False
+
+    with zipfile.ZipFile(source_path) as source, atomic_writer(output_path) as f:
+        with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                if info.filename not in members:
+                    _copy_raw(source, info, target)
+                    continue
+                xml_content = source.read(info).decode('utf-8', errors='ignore')
+                for placeholder, value in replacements.items():
+                    xml_content = xml_content.replace(placeholder, value)
+                patched = zipfile.ZipInfo(info.filename, info.date_time)
+                patched.compress_type = zipfile.ZIP_DEFLATED
+                patched.external_attr = info.external_attr
+                target.writestr(patched, xml_content.encode('utf-8'))
+    return True
@@ -0,0 +1,123 @@
+import copy
+import hashlib
+import os
+import threading
+import time
+from io import BytesIO
+
+from docx import Document
+from docxtpl import DocxTemplate
+from jinja2 import Environment
+
+
+class CachingEnvironment(Environment):
+    # docxtpl compiles every XML part with from_string() on each render; keep the result.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compiled = {}
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is not None or template_class is not None:
+            return super().from_string(source, globals, template_class)
+        template = self._compiled.get(source)
+        if template is None:
+            template = super().from_string(source)
+            self._compiled[source] = template
+        return template
+
+
+class CompiledTemplate:
+    def __init__(self, template_path, version):
+        self.template_path = template_path
+        self.version = version
+        with open(template_path, 'rb') as f:
+            self.digest = hashlib.sha256(f.read()).hexdigest()
+        self.document = Document(template_path)
+        self.jinja_env = CachingEnvironment()
+        self.patched_xml = {}
+        self.loaded_at = time.time()
+
+    def clone(self):
+        return CachedDocxTemplate(self)
+
+
+class CachedDocxTemplate(DocxTemplate):
+    """A DocxTemplate backed by a pre-parsed document and shared compiled XML parts."""
+
+    def __init__(self, compiled):
+        super().__init__(compiled.template_path)
+        self.compiled = compiled
+        self.docx = copy.deepcopy(compiled.document)
+
+    def patch_xml(self, src_xml):
+        patched = self.compiled.patched_xml.get(src_xml)
+        if patched is None:
+            patched = super().patch_xml(src_xml)
+            self.compiled.patched_xml[src_xml] = patched
+        return patched
+
+    def render(self, context, jinja_env=None, autoescape=False):
+        if jinja_env is None and not autoescape:
+            jinja_env = self.compiled.jinja_env
+        super().render(context, jinja_env, autoescape)
+
+
+class TemplateCache:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template_path, key=None):
+        return self.entry(template_path, key).clone()
+
+    def entry(self, template_path, key=None):
+        # key groups successive files of one logical template, so a new revision replaces the old entry.
+        key = key or template_path
+        stat = os.stat(template_path)
+        version = (template_path, stat.st_mtime_ns, stat.st_size)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                entry = CompiledTemplate(template_path, version)
+                self._entries[key] = entry
+            else:
+                self.hits += 1
+        return entry
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'templates': [
+                {
+                    'template': os.path.basename(key),
+                    'file': os.path.basename(entry.template_path),
+                    'mtime_ns': entry.version[1],
+                    'size': entry.version[2],
+                    'digest': entry.digest,
+                    'compiled_parts': len(entry.jinja_env._compiled),
+                    'loaded_at': entry.loaded_at,
+                }
+                for key, entry in list(self._entries.items())
+            ],
+        }
+
+
+template_cache = TemplateCache()
+
+
+def render_docx(template_path, context, key=None):
+    doc = template_cache.get(template_path, key)
+    doc.render(context)
+    output = BytesIO()
+    doc.save(output)
+    return output.getvalue()
@@ -0,0 +1,75 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Faculty
+
+VERSION_KEY = 'users:faculty-cache-version'
+
+
+class FacultySnapshot:
+    def __init__(self, version):
+        from .serializers import FacultySerializer
+
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.by_id = Faculty.objects.in_bulk()
+        self.data = FacultySerializer(list(self.by_id.values()), many=True).data
+
+
+class FacultyCache:
+    """All Faculty rows held in memory, reloaded when the version token changes or after
+    FACULTY_CACHE_TTL seconds.
+
+    The token lives in the Django cache. With a shared backend (Redis, Memcached, database),
+    a write in any process reloads every process on its next lookup. With the default
+    per-process LocMemCache, only the writing process reloads at once, and the others
+    catch up when their snapshot expires. Cached instances are shared between requests:
+    treat them as read-only.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    def _stale(self, snapshot, version):
+        ttl = getattr(settings, 'FACULTY_CACHE_TTL', 30)
+        return snapshot is None or snapshot.version != version or time.monotonic() - snapshot.loaded_at > ttl
+
+    def snapshot(self):
+        version = self._version()
+        snapshot = self._snapshot
+        if self._stale(snapshot, version):
+            with self._lock:
+                snapshot = self._snapshot
+                if self._stale(snapshot, version):
+                    snapshot = FacultySnapshot(version)
+                    self._snapshot = snapshot
+        return snapshot
+
+    def get(self, faculty_id):
+        return self.snapshot().by_id.get(int(faculty_id))
+
+    def resolve(self, faculty_ids):
+        by_id = self.snapshot().by_id
+        return {faculty_id: by_id[faculty_id] for faculty_id in faculty_ids if faculty_id in by_id}
+
+    def serialized(self):
+        return self.snapshot().data
+
+    def invalidate(self):
+        self._snapshot = None
+        cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+faculty_cache = FacultyCache()
@@ -0,0 +1,137 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone as django_timezone
+
+from .models import StoredFile
+from .pdf_metadata import known_digest
+
+# Top-level media directory -> catalog kind.
+KIND_BY_DIRECTORY = {
+    'manuscripts': 'manuscript',
+    'defense_application': 'application',
+    'panel_nomination': 'panel',
+    'generated_documents': 'generated',
+}
+OWNER_FIELDS = (
+    ('users.Manuscript', 'pdf'),
+    ('users.ApplicationDefense', 'pdf_file'),
+    ('users.PanelApplication', 'pdf_file'),
+    ('users.PanelApplication', 'docx_file'),
+)
+BATCH_SIZE = 500
+
+
+def kind_for(path):
+    return KIND_BY_DIRECTORY.get(path.split('/', 1)[0], 'other') if '/' in path else 'other'
+
+
+def _sha256(full_path):
+    hasher = hashlib.sha256()
+    with open(full_path, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _mtime(stat):
+    return datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+
+
+def register(path, owner=None, sha256=None):
+    """Catalog the media file at path (relative to MEDIA_ROOT); owner is the row that stores it."""
+    full_path = os.path.join(settings.MEDIA_ROOT, path)
+    try:
+        stat = os.stat(full_path)
+    except FileNotFoundError:
+        return unregister(path)
+    fields = {
+        'kind': kind_for(path),
+        'size': stat.st_size,
+        'mtime': _mtime(stat),
+        'sha256': sha256 or known_digest(path) or _sha256(full_path),
+    }
+    if owner is not None:
+        fields['content_type'] = ContentType.objects.get_for_model(owner)
+        fields['object_id'] = owner.pk
+    if not StoredFile.objects.filter(path=path).update(**fields):
+        StoredFile.objects.create(path=path, **fields)
+
+
+def unregister(path):
+    StoredFile.objects.filter(path=path).delete()
+
+
+def scan(root):
+    """Yield (path, stat) for every regular file under root; dot files and directories are skipped."""
+    pending = ['']
+    while pending:
+        relative = pending.pop()
+        try:
+            entries = os.scandir(os.path.join(root, relative))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                path = f'{relative}/{entry.name}' if relative else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield path, entry.stat(follow_symlinks=False)
+
+
+def _owners(apps):
+    owners = {}
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    for label, field in OWNER_FIELDS:
+        model = apps.get_model(label)
+        content_type = ContentType.objects.get_for_model(model)
+        rows = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).order_by('pk')
+        for pk, path in rows.values_list('pk', field).iterator():
+            owners.setdefault(path, (content_type.pk, pk))
+    return owners
+
+
+def reconcile(dry_run=False, apps=django_apps):
+    """Bring the catalog in line with MEDIA_ROOT; returns counts of added, updated and removed rows.
+
+    Files whose size and mtime still match their row are not read again.
+    """
+    StoredFile = apps.get_model('users', 'StoredFile')
+    known = {
+        path: (pk, size, mtime)
+        for pk, path, size, mtime in StoredFile.objects.values_list('pk', 'path', 'size', 'mtime').iterator()
+    }
+    owners = _owners(apps)
+    to_create, to_update, seen = [], [], set()
+    now = django_timezone.now()
+    for path, stat in scan(str(settings.MEDIA_ROOT)):
+        seen.add(path)
+        row = known.get(path)
+        mtime = _mtime(stat)
+        if row is not None and row[1] == stat.st_size and row[2] == mtime:
+            continue
+        content_type_id, object_id = owners.get(path, (None, None))
+        stored = StoredFile(
+            pk=row[0] if row else None, path=path, kind=kind_for(path), size=stat.st_size, mtime=mtime,
+            content_type_id=content_type_id, object_id=object_id, cataloged_at=now,
+            sha256='' if dry_run else known_digest(path) or _sha256(os.path.join(settings.MEDIA_ROOT, path)),
+        )
+        (to_update if row else to_create).append(stored)
+    stale = [known[path][0] for path in known.keys() - seen]
+
+    if not dry_run:
+        StoredFile.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        StoredFile.objects.bulk_update(
+            to_update, ['kind', 'size', 'mtime', 'sha256', 'content_type', 'object_id', 'cataloged_at'],
+            batch_size=BATCH_SIZE,
+        )
+        for start in range(0, len(stale), BATCH_SIZE):
+            StoredFile.objects.filter(pk__in=stale[start:start + BATCH_SIZE]).delete()
+    return {'added': len(to_create), 'updated': len(to_update), 'removed': len(stale)}
@@ -0,0 +1,245 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.crypto import get_random_string
+from django.utils.http import http_date, parse_http_date_safe
+
+_RANGE_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+_MAX_RANGES = 32
+_CHUNK_SIZE = 64 * 1024
+DELIVERY_MODES = ('django', 'x-accel-redirect', 'x-sendfile')
+
+
+class _DigestCache:
+    """SHA-256 ETags for files with no known content hash, keyed by inode, size and mtime."""
+
+    def __init__(self, max_entries=2048):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+
+    def get(self, path, stat):
+        key = (path, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._entries.get(key)
+            if digest is not None:
+                self._entries.move_to_end(key)
+                return digest
+
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+
+        with self._lock:
+            self._entries[key] = digest
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return digest
+
+
+digest_cache = _DigestCache()
+
+
+def _etag_matches(header, etag):
+    # Weak comparison (RFC 9110 13.1.2): If-None-Match ignores the W/ prefix.
+    if header.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in header.split(',')]
+    return any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and int(mtime) <= since
+
+
+def _range_applies(request, etag, mtime):
+    # If-Range: serve the range only if the client's copy is still current, otherwise send it all.
+    if_range = request.headers.get('If-Range')
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def parse_ranges(header, size):
+    """Return [(start, end_inclusive)] for a bytes= Range header, [] if unsatisfiable, None to ignore it."""
+    if not header or not header.startswith('bytes='):
+        return None
+    specs = header[len('bytes='):].split(',')
+    if len(specs) > _MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        match = _RANGE_RE.match(spec)
+        if match is None:
+            return None
+        first, last = match.groups()
+        if first == '' and last == '':
+            return None
+        if first == '':
+            length = int(last)
+            if length == 0:
+                continue
+            ranges.append((max(size - length, 0), size - 1))
+            continue
+        start = int(first)
+        if last != '' and int(last) < start:
+            return None
+        if start >= size:
+            continue
+        end = int(last) if last != '' else size - 1
+        ranges.append((start, min(end, size - 1)))
+
+    # Overlapping or adjacent ranges are merged so a client cannot multiply the response size.
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def delivery_mode():
+    mode = getattr(settings, 'MEDIA_DELIVERY', 'django')
+    if mode not in DELIVERY_MODES:
+        raise ImproperlyConfigured(f'MEDIA_DELIVERY must be one of {", ".join(DELIVERY_MODES)}, not {mode!r}.')
+    return mode
+
+
+def offload_header(path):
+    """(header, value) that hands path to the front web server, or None to stream it from Django.
+
+    Only files under MEDIA_ROOT are offloaded; anything else is always served by Django.
+    """
+    mode = delivery_mode()
+    if mode == 'django':
+        return None
+    root = os.path.realpath(settings.MEDIA_ROOT)
+    real_path = os.path.realpath(path)
+    if os.path.commonpath([root, real_path]) != root:
+        return None
+    if mode == 'x-sendfile':
+        return 'X-Sendfile', real_path
+    relative = os.path.relpath(real_path, root).replace(os.sep, '/')
+    prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/').rstrip('/')
+    return 'X-Accel-Redirect', f'{prefix}/{quote(relative)}'
+
+
+def _read_slices(path, slices):
+    with open(path, 'rb') as f:
+        for item in slices:
+            if isinstance(item, bytes):
+                yield item
+                continue
+            start, end = item
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining:
+                chunk = f.read(min(_CHUNK_SIZE, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+
+def serve_file(request, path, content_type='application/octet-stream', filename=None,
+               disposition='inline', digest=None):
+    """Serve a file with strong ETags, Last-Modified, 304s and single or multi-part byte ranges.
+
+    digest is the file's known content hash (used as the ETag); without one the file is
+    hashed once per version. Only GET and HEAD get conditional and range handling.
+
+    When MEDIA_DELIVERY offloads, GET and HEAD return only headers and the front web
+    server streams the file, ranges included. The worker is free as soon as the view
+    returns. Django still answers If-None-Match when the digest is known. Otherwise the
+    web server's own validators take over, and the file is never read in Python.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    headers = {'Cache-Control': 'private, no-cache'}
+    if filename:
+        headers['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+
+    offload = offload_header(path) if request.method in ('GET', 'HEAD') else None
+    if offload is not None:
+        if digest and _etag_matches(request.headers.get('If-None-Match', ''), f'"{digest}"'):
+            response = HttpResponse(status=304)
+            response['ETag'] = f'"{digest}"'
+        else:
+            response = HttpResponse(content_type=content_type)
+            response[offload[0]] = offload[1]
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    etag = f'"{digest or digest_cache.get(path, stat)}"'
+    headers['ETag'] = etag
+    headers['Last-Modified'] = http_date(stat.st_mtime)
+
+    if request.method not in ('GET', 'HEAD'):
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    headers['Accept-Ranges'] = 'bytes'
+
+    if _not_modified(request, etag, stat.st_mtime):
+        response = HttpResponse(status=304)
+        for name in ('ETag', 'Last-Modified', 'Cache-Control'):
+            response[name] = headers[name]
+        return response
+
+    ranges = None
+    if 'Range' in request.headers and _range_applies(request, etag, stat.st_mtime):
+        ranges = parse_ranges(request.headers['Range'], size)
+
+    if ranges is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    elif not ranges:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(_read_slices(path, ranges), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        boundary = get_random_string(24)
+        slices = []
+        for start, end in ranges:
+            slices.append((
+                f'\r\n--{boundary}\r\n'
+                f'Content-Type: {content_type}\r\n'
+                f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+            ).encode('ascii'))
+            slices.append((start, end))
+        slices.append(f'\r\n--{boundary}--\r\n'.encode('ascii'))
+        length = sum(len(item) if isinstance(item, bytes) else item[1] - item[0] + 1 for item in slices)
+        response = StreamingHttpResponse(
+            _read_slices(path, slices), status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response['Content-Length'] = str(length)
+
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -0,0 +1,36 @@
+from django.apps import apps
+from django.conf import settings
+
+from . import file_catalog
+from .models import Manuscript
+from .pdf_metadata import refresh_manuscript_metadata, refresh_pdf_metadata
+from .page_images import render_manuscript_thumbnail
+from .pdf_optimize import optimize_manuscript, optimize_media_file
+from .search import extract_manuscript_text
+
+# Background post-processing of stored PDFs. Each pipeline is one job, in this order, so
+# no later stage reads a file that optimization is replacing.
+
+
+def process_manuscript_pdf(manuscript_id):
+    if settings.PDF_OPTIMIZE_ON_INGEST:
+        optimize_manuscript(manuscript_id)
+    extract_manuscript_text(manuscript_id)
+    values = refresh_manuscript_metadata(manuscript_id)
+    manuscript = Manuscript.objects.only('pdf').filter(pk=manuscript_id).first()
+    if values is not None and manuscript is not None:
+        file_catalog.register(manuscript.pdf.name, owner=manuscript, sha256=values['pdf_sha256'])
+    render_manuscript_thumbnail(manuscript_id)
+
+
+def process_generated_pdf(name, owner=None):
+    """name is relative to MEDIA_ROOT; queue this only once the rows pointing at it exist.
+
+    owner is a (model label, pk) pair for the catalog.
+    """
+    if settings.PDF_OPTIMIZE_ON_INGEST:
+        optimize_media_file(name)
+    values = refresh_pdf_metadata(name)
+    if values is not None:
+        record = apps.get_model(owner[0]).objects.filter(pk=owner[1]).first() if owner else None
+        file_catalog.register(name, owner=record, sha256=values['pdf_sha256'])
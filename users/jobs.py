@@ -0,0 +1,96 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .metrics import StageTimer
+from .utils import request_fingerprint
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'DOCUMENT_JOB_WORKERS', 2),
+                    thread_name_prefix='rkive-jobs',
+                )
+    return _executor
+
+
+def _run_in_background(func, args):
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Background task %s failed', getattr(func, '__name__', func))
+    finally:
+        close_old_connections()
+
+
+def submit(func, *args):
+    # Runs after the surrounding transaction commits so workers see the rows it wrote.
+    transaction.on_commit(lambda: get_executor().submit(_run_in_background, func, args))
+
+
+def enqueue_document_job(kind, user, payload, idempotency_key=None):
+    from .models import DocumentJob
+
+    try:
+        with transaction.atomic():
+            job = DocumentJob.objects.create(
+                kind=kind, user=user, payload=payload, idempotency_key=idempotency_key,
+                idempotency_fingerprint=request_fingerprint(kind, payload) if idempotency_key else '',
+            )
+    except IntegrityError:
+        if not idempotency_key:
+            raise
+        # A concurrent request with the same Idempotency-Key created the job first.
+        return DocumentJob.objects.get(user=user, idempotency_key=idempotency_key)
+    submit(run_document_job, job.jobID)
+    return job
+
+
+def run_document_job(job_id):
+    from .models import DocumentJob
+    from .views import DOCUMENT_GENERATORS, KEY_REUSED_ERROR
+
+    claimed = DocumentJob.objects.filter(jobID=job_id, status='queued').update(
+        status='running', started_at=timezone.now()
+    )
+    if not claimed:
+        return
+
+    job = DocumentJob.objects.select_related('user').get(jobID=job_id)
+    view = DOCUMENT_GENERATORS[job.kind]()
+    view.timer = StageTimer(view.template_name)
+    try:
+        try:
+            doc_record, pdf_file_path, pdf_filename = view.generate(job.user, job.payload, job.idempotency_key)
+        except IntegrityError:
+            # A synchronous request with the same Idempotency-Key saved its record first.
+            doc_record = view._find_idempotent_record(job.user, job.idempotency_key)
+            if doc_record is None:
+                raise
+            if view._key_reused(doc_record, job.idempotency_fingerprint):
+                raise ValueError(KEY_REUSED_ERROR)
+    except Exception as e:
+        logger.exception('Document job %s failed', job_id)
+        job.status = 'failed'
+        job.error = str(e)
+    else:
+        job.status = 'completed'
+        job.pdf_file = doc_record.pdf_file.name
+        job.record_id = doc_record.pk
+        view.timer.record()
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'pdf_file', 'record_id', 'finished_at'])
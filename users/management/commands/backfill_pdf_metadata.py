@@ -0,0 +1,49 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.models import ApplicationDefense, Manuscript, PanelApplication
+from users.pdf_metadata import known_digest, read_pdf_metadata, save_pdf_metadata
+
+
+class Command(BaseCommand):
+    help = 'Fills the PDF metadata columns (pages, size, SHA-256, text length, version) of existing rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute rows that already have metadata.')
+        parser.add_argument('--workers', type=int, default=None, help='Reader processes (default: CPU count).')
+
+    def handle(self, *args, **options):
+        names = set()
+        for model, field in ((Manuscript, 'pdf'), (ApplicationDefense, 'pdf_file'), (PanelApplication, 'pdf_file')):
+            rows = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            if not options['all']:
+                rows = rows.filter(pdf_metadata_at__isnull=True)
+            names.update(rows.values_list(field, flat=True).distinct())
+
+        # Rows sharing a file (render cache hits, deduplicated manuscripts) are read once.
+        names = sorted(names)
+        present = [name for name in names if os.path.isfile(os.path.join(settings.MEDIA_ROOT, name))]
+        missing = len(names) - len(present)
+        for name in sorted(set(names) - set(present)):
+            self.stderr.write(f'Missing file: {name}')
+
+        updated = 0
+        # Spawned workers only read files; every database write happens here.
+        with ProcessPoolExecutor(max_workers=options['workers'] or os.cpu_count(),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = pool.map(
+                read_pdf_metadata,
+                [os.path.join(settings.MEDIA_ROOT, name) for name in present],
+                [known_digest(name) for name in present],
+                chunksize=max(1, len(present) // (4 * (os.cpu_count() or 1))),
+            )
+            for name, values in zip(present, results):
+                updated += save_pdf_metadata(name, values)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Read {len(present)} PDF(s) and updated {updated} row(s); {missing} file(s) missing.'
+        ))
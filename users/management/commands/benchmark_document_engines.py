@@ -0,0 +1,66 @@
+import os
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users.converters import get_converter
+from users.docx_templates import template_cache
+from users.metrics import LatencyHistogram
+from users.pdf_forms import pdf_form_cache
+from users.template_store import template_store
+
+
+class Command(BaseCommand):
+    help = 'Compares DOCX rendering + PDF conversion against direct PDF form filling on the same payloads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', default='template_application.docx',
+                            help='Word template name; its PDF form twin is looked up in DOCUMENT_PDF_TEMPLATES_DIR.')
+        parser.add_argument('--pdf-template', help='Path to the AcroForm PDF to compare against.')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--no-flatten', action='store_true', help='Leave the filled PDF forms editable.')
+
+    def handle(self, *args, **options):
+        docx_path = template_store.resolve(options['template'])
+        pdf_path = options['pdf_template'] or os.path.join(
+            settings.DOCUMENT_PDF_TEMPLATES_DIR, f"{os.path.splitext(options['template'])[0]}.pdf"
+        )
+        for path in (docx_path, pdf_path):
+            if not os.path.exists(path):
+                raise CommandError(f'Template not found: {path}')
+
+        compiled = template_cache.entry(docx_path, options['template'])
+        form = pdf_form_cache.entry(pdf_path)
+        fields = sorted(set(compiled.clone().get_undeclared_template_variables()) | set(form.fields))
+        payloads = [
+            {field: f'{field.replace("_", " ").title()} {index}' for field in fields}
+            for index in range(options['iterations'])
+        ]
+        flatten = not options['no_flatten']
+
+        docx_times, pdf_times = LatencyHistogram(), LatencyHistogram()
+        converter = get_converter()
+        for payload in payloads:
+            start = time.perf_counter()
+            doc = compiled.clone()
+            doc.render(payload)
+            buffer = BytesIO()
+            doc.save(buffer)
+            converter.convert_bytes(buffer.getvalue())
+            docx_times.observe((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            form.fill(payload, flatten=flatten)
+            pdf_times.observe((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(f'{len(payloads)} payloads, {len(fields)} fields, flatten={flatten}')
+        for name, histogram in (('docx+convert', docx_times), ('pdf_form', pdf_times)):
+            summary = histogram.summary()
+            self.stdout.write(
+                f"{name:>13}: mean {summary['mean_ms']} ms, p50 {summary['p50_ms']} ms, "
+                f"p95 {summary['p95_ms']} ms, max {summary['max_ms']} ms"
+            )
+        speedup = docx_times.total / pdf_times.total if pdf_times.total else float('inf')
+        self.stdout.write(self.style.SUCCESS(f'pdf_form is {speedup:.1f}x faster on these payloads.'))
@@ -0,0 +1,69 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.models import Manuscript
+from users.storage import manuscript_storage
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = 'Moves existing manuscript PDFs into deduplicated, content-addressed storage.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report how much space would be freed.')
+
+    def handle(self, *args, **options):
+        legacy = [
+            (manuscript_id, name)
+            for manuscript_id, name in Manuscript.objects.exclude(pdf='').values_list('pk', 'pdf')
+            if not manuscript_storage.is_blob(name)
+        ]
+
+        if options['dry_run']:
+            seen, duplicate_bytes = set(), 0
+            for _, name in legacy:
+                path = manuscript_storage.path(name)
+                if not os.path.exists(path):
+                    continue
+                digest = _sha256(path)
+                if digest in seen:
+                    duplicate_bytes += os.path.getsize(path)
+                seen.add(digest)
+            self.stdout.write(
+                f'{len(legacy)} legacy file(s), {len(seen)} distinct; '
+                f'{duplicate_bytes / 1024 / 1024:.1f} MB would be freed.'
+            )
+            return
+
+        moved, freed, missing = 0, 0, 0
+        for manuscript_id, name in legacy:
+            path = manuscript_storage.path(name)
+            if not os.path.exists(path):
+                missing += 1
+                self.stderr.write(f'Missing file for manuscript {manuscript_id}: {name}')
+                continue
+            with transaction.atomic(), open(path, 'rb') as f:
+                blob_name = manuscript_storage.save(name, File(f, name=os.path.basename(name)))
+                # update() skips the model signals: the reference was already taken by save().
+                Manuscript.objects.filter(pk=manuscript_id).update(pdf=blob_name)
+            moved += 1
+            if not Manuscript.objects.filter(pdf=name).exists():
+                freed += os.path.getsize(path)
+                # Through the storage, so the file also leaves the StoredFile catalog.
+                manuscript_storage.delete(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {moved} manuscript(s) into deduplicated storage; '
+            f'freed {freed / 1024 / 1024:.1f} MB, {missing} file(s) missing.'
+        ))
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from users.media_gc import MediaCollector
+
+REASONS = {
+    'temp': 'leftover temporary files',
+    'upload': 'abandoned partial uploads',
+    'blob': 'unreferenced deduplicated blobs',
+    'unreferenced': 'files no row refers to',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Finds files under MEDIA_ROOT that no FileField refers to (deleted rows, failed renders, '
+        'leftover temporaries, abandoned uploads) and deletes them, or only reports them with --dry-run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report orphans; nothing is deleted.')
+        parser.add_argument('--workers', type=int, default=8, help='Threads listing directories.')
+        parser.add_argument('--min-age', type=float, default=24,
+                            help='Hours since a file was last modified before it may be collected.')
+        parser.add_argument('--upload-expiry', type=float, default=7 * 24,
+                            help='Hours after which an unfinished resumable upload is discarded.')
+        parser.add_argument('--max-deletes-per-second', type=float, default=0, help='0 means no limit.')
+        parser.add_argument('--checkpoint',
+                            help='File recording finished directories; an interrupted run resumes from it.')
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+
+        def on_orphan(orphan):
+            if verbosity > 1:
+                self.stdout.write(f'{orphan.reason:>12}  {filesizeformat(orphan.size):>10}  {orphan.path}')
+
+        stats = MediaCollector(
+            dry_run=options['dry_run'],
+            workers=options['workers'],
+            min_age=timedelta(hours=options['min_age']),
+            upload_expiry=timedelta(hours=options['upload_expiry']),
+            deletes_per_second=options['max_deletes_per_second'],
+            checkpoint=options['checkpoint'],
+            on_orphan=on_orphan,
+        ).run()
+
+        verb = 'would be' if options['dry_run'] else 'were'
+        resumed = f", {stats['skipped_directories']} finished earlier" if stats['skipped_directories'] else ''
+        self.stdout.write(f"Scanned {stats['files']} file(s) in {stats['directories']} directories{resumed}.")
+        self.stdout.write(f"{stats['expired_uploads']} expired upload(s) {verb} discarded.")
+        for reason, (count, size) in sorted(stats['orphans'].items()):
+            self.stdout.write(f'{count:>8} {REASONS[reason]} ({filesizeformat(size)})')
+        copies, size = stats['duplicates']
+        if copies:
+            self.stdout.write(
+                f'{copies} cataloged file(s) ({filesizeformat(size)}) duplicate another file; '
+                'dedupe_manuscripts moves manuscript copies into shared storage.'
+            )
+        if options['dry_run']:
+            total = sum(size for _, size in stats['orphans'].values())
+            self.stdout.write(self.style.SUCCESS(f'{filesizeformat(total)} would be freed.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Deleted {stats['deleted']} file(s), freeing {filesizeformat(stats['deleted_bytes'])}."
+            ))
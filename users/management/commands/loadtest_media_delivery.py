@@ -0,0 +1,94 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+
+from users.file_serving import serve_file
+from users.metrics import LatencyHistogram
+from users.models import Manuscript
+
+MODES = ('django', 'x-accel-redirect')
+
+
+class Command(BaseCommand):
+    help = (
+        'Downloads one media file repeatedly through serve_file() under each MEDIA_DELIVERY mode '
+        'and reports how long a worker stays busy per request, and how many workers a request '
+        'rate needs (Little\'s law: workers = rate x busy time).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--manuscript', type=int, help='manuscriptID whose PDF to serve (default: the largest).')
+        parser.add_argument('--file', help='Path of a file under MEDIA_ROOT to serve instead.')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--client-kbps', type=float, default=0,
+                            help='Simulated client download speed; a sync worker is blocked until the '
+                                 'client has the whole body. 0 drains as fast as possible.')
+        parser.add_argument('--rate', type=float, default=20, help='Downloads per second to size workers for.')
+
+    def handle(self, *args, **options):
+        path = self._target(options)
+        size = os.path.getsize(path)
+        factory = RequestFactory()
+        bytes_per_second = options['client_kbps'] * 1024
+
+        def download():
+            start = time.perf_counter()
+            response = serve_file(factory.get('/'), path, 'application/pdf', filename=os.path.basename(path))
+            chunks = response.streaming_content if response.streaming else [response.content]
+            for chunk in chunks:
+                if bytes_per_second:
+                    time.sleep(len(chunk) / bytes_per_second)
+            response.close()
+            return (time.perf_counter() - start) * 1000
+
+        client = f'{options["client_kbps"]:g} KiB/s' if bytes_per_second else 'unthrottled'
+        self.stdout.write(
+            f'{path} ({size / 1024:.0f} KiB), {options["requests"]} requests, '
+            f'concurrency {options["concurrency"]}, client {client}'
+        )
+        workers = {}
+        for mode in MODES:
+            with override_settings(MEDIA_DELIVERY=mode):
+                download()  # warm the page cache and the ETag digest
+                histogram = LatencyHistogram()
+                wall = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                    for elapsed in pool.map(lambda _: download(), range(options['requests'])):
+                        histogram.observe(elapsed)
+                wall = time.perf_counter() - wall
+
+            summary = histogram.summary()
+            workers[mode] = options['rate'] * summary['mean_ms'] / 1000
+            self.stdout.write(
+                f"{mode:>16}: busy mean {summary['mean_ms']} ms, p95 {summary['p95_ms']} ms, "
+                f"{options['requests'] / wall:.0f} req/s, "
+                f"{workers[mode]:.2f} busy workers at {options['rate']:g} req/s"
+            )
+
+        freed = workers['django'] - workers['x-accel-redirect']
+        self.stdout.write(self.style.SUCCESS(
+            f'Offloading frees {freed:.2f} of {workers["django"]:.2f} workers '
+            f'({freed / workers["django"] * 100 if workers["django"] else 0:.0f}%) at {options["rate"]:g} downloads/s.'
+        ))
+
+    def _target(self, options):
+        if options['file']:
+            path = os.path.realpath(options['file'])
+        else:
+            manuscripts = Manuscript.objects.defer('body_text').exclude(pdf='')
+            if options['manuscript']:
+                manuscripts = manuscripts.filter(manuscriptID=options['manuscript'])
+            candidates = [m.pdf.path for m in manuscripts if os.path.exists(m.pdf.path)]
+            if not candidates:
+                raise CommandError('No manuscript PDF found; pass --file.')
+            path = os.path.realpath(max(candidates, key=os.path.getsize))
+
+        root = os.path.realpath(settings.MEDIA_ROOT)
+        if not os.path.isfile(path) or os.path.commonpath([root, path]) != root:
+            raise CommandError(f'{path} is not a file under MEDIA_ROOT.')
+        return path
@@ -0,0 +1,96 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Count, Sum
+from django.template.defaultfilters import filesizeformat
+
+from users.models import Manuscript, PdfOptimization
+from users.pdf_metadata import refresh_manuscript_metadata, refresh_pdf_metadata
+from users.pdf_optimize import optimize_manuscript, optimize_media_file, optimize_pdf
+
+
+def _in_thread(func, *args):
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+def _optimize_manuscript(manuscript_id):
+    optimize_manuscript(manuscript_id)
+    refresh_manuscript_metadata(manuscript_id)
+
+
+def _optimize_file(name):
+    optimize_media_file(name)
+    refresh_pdf_metadata(name)
+
+
+def _estimate(path):
+    try:
+        tmp_path = optimize_pdf(path)
+    except Exception:
+        return 0
+    if tmp_path is None:
+        return 0
+    saved = os.path.getsize(path) - os.path.getsize(tmp_path)
+    os.remove(tmp_path)
+    return saved
+
+
+class Command(BaseCommand):
+    help = 'Optimizes existing PDFs under MEDIA_ROOT and reports the bytes saved so far.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only estimate the savings; no file is replaced or recorded.')
+
+    def handle(self, *args, **options):
+        done = set(PdfOptimization.objects.values_list('name', flat=True))
+        # One manuscript per stored file: optimizing it moves every manuscript sharing the blob.
+        manuscripts = {}
+        for manuscript_id, name in Manuscript.objects.exclude(pdf='').values_list('pk', 'pdf'):
+            if name not in done:
+                manuscripts.setdefault(name, manuscript_id)
+
+        media_root = str(settings.MEDIA_ROOT)
+        files = []
+        for directory, dirnames, filenames in os.walk(media_root):
+            relative = os.path.relpath(directory, media_root).replace(os.sep, '/')
+            # Manuscripts go through their rows above; dot-directories hold partial uploads.
+            dirnames[:] = [d for d in dirnames if not d.startswith('.') and not (relative == '.' and d == 'manuscripts')]
+            for filename in filenames:
+                name = filename if relative == '.' else f'{relative}/{filename}'
+                if filename.lower().endswith('.pdf') and not filename.startswith('.') and name not in done:
+                    files.append(name)
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            if options['dry_run']:
+                paths = [os.path.join(media_root, name) for name in [*manuscripts, *files]]
+                saved = sum(pool.map(lambda path: _in_thread(_estimate, path), paths))
+                self.stdout.write(
+                    f'{len(paths)} unoptimized PDF(s); about {filesizeformat(saved)} would be saved.'
+                )
+                return
+            list(pool.map(lambda manuscript_id: _in_thread(_optimize_manuscript, manuscript_id), manuscripts.values()))
+            list(pool.map(lambda name: _in_thread(_optimize_file, name), files))
+
+        self.stdout.write(f'Processed {len(manuscripts)} manuscript PDF(s) and {len(files)} other PDF(s).')
+        for row in PdfOptimization.objects.values('status').annotate(
+            files=Count('pk'), original=Sum('original_size'), saved=Sum('bytes_saved')
+        ).order_by('status'):
+            self.stdout.write(
+                f"{row['status']:>10}: {row['files']} file(s), "
+                f"{filesizeformat(row['original'])} originally, {filesizeformat(row['saved'])} saved"
+            )
+        totals = PdfOptimization.objects.aggregate(original=Sum('original_size'), saved=Sum('bytes_saved'))
+        if totals['original']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Saved {filesizeformat(totals['saved'])} of {filesizeformat(totals['original'])} "
+                f"({totals['saved'] / totals['original'] * 100:.1f}%) across media/."
+            ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from users.jobs import run_document_job
+from users.models import DocumentJob
+
+
+class Command(BaseCommand):
+    help = 'Runs queued document generation jobs, e.g. ones left behind by a restarted web worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requeue-running', action='store_true',
+                            help='Also retry jobs stuck in the running state.')
+
+    def handle(self, *args, **options):
+        if options['requeue_running']:
+            DocumentJob.objects.filter(status='running').update(status='queued', started_at=None)
+
+        processed = 0
+        for job_id in DocumentJob.objects.filter(status='queued').order_by('created_at').values_list('jobID', flat=True):
+            run_document_job(job_id)
+            processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} document job(s).'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from users import dashboard
+from users.document_stats import drift, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the document counters behind document-count/ from the database rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report counters that have drifted.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            changed = drift()
+        else:
+            changed = rebuild()
+            dashboard.invalidate('submissions')
+
+        for (kind, department, month), (old, new) in sorted(changed.items()):
+            self.stdout.write(f'{kind:>11} {department or "-":<30} {month:%Y-%m}: {old} -> {new}')
+        verb = 'would change' if options['dry_run'] else 'changed'
+        self.stdout.write(self.style.SUCCESS(f'{len(changed)} counter(s) {verb}.'))
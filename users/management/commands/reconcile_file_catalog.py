@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from users.file_catalog import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Scans MEDIA_ROOT and brings the StoredFile catalog behind list-files/ in line with it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change.')
+
+    def handle(self, *args, **options):
+        counts = reconcile(dry_run=options['dry_run'])
+        verb = 'would be' if options['dry_run'] else 'were'
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['added']} file(s) {verb} added, {counts['updated']} updated "
+            f"and {counts['removed']} removed from the catalog."
+        ))
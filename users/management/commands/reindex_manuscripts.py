@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from users.models import Manuscript
+from users.search import extract_manuscript_text, index_manuscript
+
+
+def _extract(manuscript_id):
+    close_old_connections()
+    try:
+        extract_manuscript_text(manuscript_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the manuscript full-text index, extracting PDF text where it is missing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Re-extract text from every PDF, not only manuscripts never extracted.')
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        pending = Manuscript.objects.exclude(pdf='')
+        if not options['all']:
+            pending = pending.filter(text_extracted_at__isnull=True)
+        pending_ids = set(pending.values_list('pk', flat=True))
+
+        indexed = 0
+        for manuscript in Manuscript.objects.exclude(pk__in=pending_ids).iterator():
+            index_manuscript(manuscript)
+            indexed += 1
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            list(pool.map(_extract, pending_ids))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {indexed} manuscript(s) and extracted text from {len(pending_ids)} PDF(s).'
+        ))
@@ -0,0 +1,250 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .file_catalog import unregister
+from .models import ManuscriptUpload, StoredFile
+from .page_images import page_image_cache
+from .storage import manuscript_storage
+from .uploads import discard_partial, upload_dir
+
+# Temporaries of storage._save() and pdf_optimize; atomic_write() leaves '.*.tmp' too.
+TEMP_PREFIXES = ('.upload-', '.optimize-')
+
+
+class Orphan(NamedTuple):
+    path: str
+    reason: str  # 'temp', 'upload', 'blob' or 'unreferenced'
+    size: int
+
+
+def file_fields():
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field
+
+
+def referenced_names():
+    """Every name stored in a FileField of any model, streamed with one query per field."""
+    names = set()
+    for model, field in file_fields():
+        rows = model._base_manager.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+        names.update(rows.values_list(field.name, flat=True).iterator(chunk_size=10_000))
+    return names
+
+
+def is_referenced(name):
+    return any(
+        model._base_manager.filter(**{field.name: name}).exists()
+        for model, field in file_fields()
+    )
+
+
+def _relative(path):
+    """path relative to MEDIA_ROOT with '/' separators, or None if it lies outside."""
+    root = os.path.realpath(settings.MEDIA_ROOT)
+    path = os.path.realpath(path)
+    if os.path.commonpath([root, path]) != root or path == root:
+        return None
+    return os.path.relpath(path, root).replace(os.sep, '/')
+
+
+def _parent(path):
+    return path.rpartition('/')[0]
+
+
+class MediaCollector:
+    """Finds, and unless dry_run deletes, files under MEDIA_ROOT that nothing refers to.
+
+    Directories are listed with os.scandir on a thread pool and every file is checked
+    against the names stored in all FileFields, loaded up front. Deletes happen on the
+    calling thread, at most deletes_per_second, after re-checking the database. Only
+    files older than min_age are touched, so in-flight uploads and renders are safe.
+
+    With a checkpoint path, every directory whose whole subtree has been handled is
+    appended to that file, and a rerun skips those directories; the file is removed
+    once a run completes.
+    """
+
+    def __init__(self, dry_run=False, workers=8, min_age=timedelta(hours=24),
+                 upload_expiry=timedelta(days=7), deletes_per_second=0, checkpoint=None, on_orphan=None):
+        self.dry_run = dry_run
+        self.workers = workers
+        self.min_age = min_age
+        self.upload_expiry = upload_expiry
+        self.deletes_per_second = deletes_per_second
+        self.checkpoint = checkpoint
+        self.on_orphan = on_orphan
+        self.root = str(settings.MEDIA_ROOT)
+        self.stats = {
+            'directories': 0, 'files': 0, 'expired_uploads': 0,
+            'orphans': {}, 'deleted': 0, 'deleted_bytes': 0, 'skipped_directories': 0,
+        }
+        self._next_delete = 0.0
+
+    def run(self):
+        self.stats['expired_uploads'] = self._expire_uploads()
+        self._referenced = referenced_names()
+        self._live_partials = {
+            f'{upload_id}.part'
+            for upload_id in ManuscriptUpload.objects.filter(
+                manuscript__isnull=True, updated_at__gte=timezone.now() - self.upload_expiry,
+            ).values_list('pk', flat=True).iterator()
+        }
+        self._uploads = _relative(upload_dir())
+        self._cutoff = time.time() - self.min_age.total_seconds()
+
+        done = self._load_checkpoint()
+        skip = done | {path for path in [_relative(page_image_cache.root)] if path}
+        self.stats['skipped_directories'] = len(done)
+        checkpoint = open(self.checkpoint, 'a') if self.checkpoint else None
+        try:
+            self._walk(skip, checkpoint)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        if self.checkpoint:
+            os.remove(self.checkpoint)
+        self.stats['duplicates'] = duplicate_summary()
+        return self.stats
+
+    def _expire_uploads(self):
+        expired = ManuscriptUpload.objects.filter(
+            manuscript__isnull=True, updated_at__lt=timezone.now() - self.upload_expiry,
+        )
+        if self.dry_run:
+            return expired.count()
+        count = 0
+        for upload in expired.iterator():
+            discard_partial(upload)
+            upload.delete()
+            count += 1
+        return count
+
+    def _load_checkpoint(self):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return set()
+        with open(self.checkpoint) as f:
+            return {line.rstrip('\n') for line in f if line.strip()}
+
+    def _walk(self, skip, checkpoint):
+        # pending[d] counts d's own listing plus its unfinished subdirectories.
+        pending = {'': 1}
+
+        def finished(directory):
+            pending[directory] -= 1
+            if pending[directory]:
+                return
+            del pending[directory]
+            if directory:
+                if checkpoint is not None:
+                    checkpoint.write(directory + '\n')
+                    checkpoint.flush()
+                finished(_parent(directory))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._scan, '', skip)}
+            while futures:
+                completed, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    directory, subdirs, files, orphans = future.result()
+                    self.stats['directories'] += 1
+                    self.stats['files'] += files
+                    for subdir in subdirs:
+                        pending[subdir] = 1
+                        pending[directory] += 1
+                        futures.add(pool.submit(self._scan, subdir, skip))
+                    for orphan in orphans:
+                        self._collect(orphan)
+                    finished(directory)
+
+    def _scan(self, directory, skip):
+        subdirs, orphans, files = [], [], 0
+        try:
+            entries = os.scandir(os.path.join(self.root, directory))
+        except FileNotFoundError:
+            return directory, subdirs, files, orphans
+        with entries:
+            for entry in entries:
+                path = f'{directory}/{entry.name}' if directory else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if path not in skip:
+                        subdirs.append(path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                files += 1
+                reason = self._classify(path, entry.name, directory)
+                if reason is None:
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                if stat.st_mtime < self._cutoff:
+                    orphans.append(Orphan(path, reason, stat.st_size))
+        return directory, subdirs, files, orphans
+
+    def _classify(self, path, name, directory):
+        if directory == self._uploads:
+            return None if name in self._live_partials or not name.endswith('.part') else 'upload'
+        if name.startswith('.'):
+            # Other dot files, such as the blob store's .lock, belong to someone.
+            return 'temp' if name.endswith('.tmp') or name.startswith(TEMP_PREFIXES) else None
+        if path in self._referenced:
+            return None
+        return 'blob' if manuscript_storage.is_blob(path) else 'unreferenced'
+
+    def _collect(self, orphan):
+        count, size = self.stats['orphans'].get(orphan.reason, (0, 0))
+        self.stats['orphans'][orphan.reason] = (count + 1, size + orphan.size)
+        if self.on_orphan is not None:
+            self.on_orphan(orphan)
+        if self.dry_run:
+            return
+        self._throttle()
+        if self._delete(orphan):
+            self.stats['deleted'] += 1
+            self.stats['deleted_bytes'] += orphan.size
+
+    def _throttle(self):
+        if not self.deletes_per_second:
+            return
+        now = time.monotonic()
+        if self._next_delete > now:
+            time.sleep(self._next_delete - now)
+        self._next_delete = max(now, self._next_delete) + 1 / self.deletes_per_second
+
+    def _delete(self, orphan):
+        if orphan.reason == 'blob':
+            return manuscript_storage.discard_orphan(orphan.path, lambda: is_referenced(orphan.path))
+        # A row may have started using the file since the references were loaded.
+        if orphan.reason == 'unreferenced' and is_referenced(orphan.path):
+            return False
+        try:
+            os.remove(os.path.join(self.root, orphan.path))
+        except FileNotFoundError:
+            return False
+        unregister(orphan.path)
+        return True
+
+
+def duplicate_summary():
+    """Files in the catalog that share content with another one: (extra copies, bytes they take)."""
+    copies, size = 0, 0
+    groups = StoredFile.objects.exclude(sha256='').values('sha256').annotate(
+        files=Count('pk'), size=Max('size'),
+    ).filter(files__gt=1)
+    for group in groups.iterator():
+        copies += group['files'] - 1
+        size += group['size'] * (group['files'] - 1)
+    return copies, size
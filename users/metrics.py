@@ -0,0 +1,130 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Log-spaced buckets from 10µs to ~49min; each bucket is 5% wider than the last, so
+# percentiles are accurate to within ~2.5% with a fixed 400-slot array per series.
+_MIN_MS = 0.01
+_GROWTH = 1.05
+_LOG_GROWTH = math.log(_GROWTH)
+_BUCKETS = 400
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        if ms <= _MIN_MS:
+            index = 0
+        else:
+            index = min(int(math.log(ms / _MIN_MS) / _LOG_GROWTH), _BUCKETS - 1)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += ms
+            if ms > self.max:
+                self.max = ms
+
+    def percentile(self, q):
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+            maximum = self.max
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket in enumerate(counts):
+            seen += bucket
+            if seen >= rank:
+                # Geometric midpoint of the bucket, never above the largest value seen.
+                return min(_MIN_MS * _GROWTH ** (index + 0.5), maximum)
+        return maximum
+
+    def summary(self):
+        with self._lock:
+            count, total, maximum = self.count, self.total, self.max
+        return {
+            'count': count,
+            'mean_ms': round(total / count, 2) if count else None,
+            'p50_ms': _round(self.percentile(0.50)),
+            'p95_ms': _round(self.percentile(0.95)),
+            'p99_ms': _round(self.percentile(0.99)),
+            'max_ms': round(maximum, 2),
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+class StageMetrics:
+    """Process-wide latency histograms keyed by (template, stage)."""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe(self, template, stage, ms):
+        key = (template, stage)
+        histogram = self._series.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._series.setdefault(key, LatencyHistogram())
+        histogram.observe(ms)
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+            self.started_at = time.time()
+
+    def snapshot(self):
+        # Copied under the lock: observe() may add a series while this iterates.
+        with self._lock:
+            series = sorted(self._series.items())
+            started_at = self.started_at
+        templates = {}
+        for (template, stage), histogram in series:
+            templates.setdefault(template, {})[stage] = histogram.summary()
+        return {'since': started_at, 'templates': templates}
+
+
+stage_metrics = StageMetrics()
+
+
+class StageTimer:
+    """Times the stages of one document request; cheap enough to leave on everywhere."""
+
+    def __init__(self, template):
+        self.template = template
+        self.stages = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, (time.perf_counter() - start) * 1000))
+
+    def record(self):
+        stages = self.stages + [('total', (time.perf_counter() - self._started) * 1000)]
+        for name, ms in stages:
+            stage_metrics.observe(self.template, name, ms)
+        return stages
+
+    def finish(self, response):
+        stages = self.record()
+        if getattr(settings, 'DOCUMENT_SERVER_TIMING', True):
+            response['Server-Timing'] = ', '.join(f'{name};dur={ms:.1f}' for name, ms in stages)
+        return response
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_documentjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicationdefense',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Hash of template and rendered form data', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='applicationdefense',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='documentjob',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='panelapplication',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Hash of template and rendered form data', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='panelapplication',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='applicationdefense',
+            constraint=models.UniqueConstraint(fields=('user', 'idempotency_key'), name='unique_application_idempotency_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='documentjob',
+            constraint=models.UniqueConstraint(fields=('user', 'idempotency_key'), name='unique_job_idempotency_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='panelapplication',
+            constraint=models.UniqueConstraint(fields=('user', 'idempotency_key'), name='unique_panel_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:46
+
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE users_manuscript_fts USING fts5("
+            "title, description, body, tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            'INSERT INTO users_manuscript_fts (rowid, title, description, body) '
+            'SELECT "manuscriptID", title, description, body_text FROM users_manuscript'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE TABLE users_manuscript_search ('
+            'manuscript_id integer PRIMARY KEY REFERENCES users_manuscript ("manuscriptID") ON DELETE CASCADE, '
+            'document tsvector NOT NULL)'
+        )
+        schema_editor.execute(
+            'CREATE INDEX users_manuscript_search_document ON users_manuscript_search USING GIN (document)'
+        )
+        schema_editor.execute(
+            'INSERT INTO users_manuscript_search (manuscript_id, document) '
+            'SELECT "manuscriptID", '
+            "setweight(to_tsvector('english', title), 'A') || "
+            "setweight(to_tsvector('english', description), 'B') || "
+            "setweight(to_tsvector('english', body_text), 'C') FROM users_manuscript"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS users_manuscript_fts')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP TABLE IF EXISTS users_manuscript_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_render_cache_and_idempotency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manuscript',
+            name='body_text',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Text extracted from the PDF for full-text search'),
+        ),
+        migrations.AddField(
+            model_name='manuscript',
+            name='text_extracted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
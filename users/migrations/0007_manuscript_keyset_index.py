@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_manuscript_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='manuscript',
+            index=models.Index(fields=['-created_at', '-manuscriptID'], name='manuscript_created_keyset'),
+        ),
+    ]
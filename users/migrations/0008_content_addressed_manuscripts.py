@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:49
+
+import users.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_manuscript_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('digest', models.CharField(help_text='SHA-256 of the file contents', max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='Storage name of the single stored copy', max_length=255, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Content Blob',
+                'verbose_name_plural': 'Deduplicated Files',
+            },
+        ),
+        migrations.AlterField(
+            model_name='manuscript',
+            name='pdf',
+            field=models.FileField(help_text='Upload the PDF file here', storage=users.storage.get_manuscript_storage, upload_to='manuscripts/'),
+        ),
+    ]
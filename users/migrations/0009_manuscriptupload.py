@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:49
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_content_addressed_manuscripts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ManuscriptUpload',
+            fields=[
+                ('uploadID', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('length', models.BigIntegerField(help_text='Declared size of the complete file in bytes')),
+                ('offset', models.BigIntegerField(default=0, help_text='Bytes received so far')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('manuscript', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='users.manuscript')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='manuscript_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Manuscript Upload',
+                'verbose_name_plural': 'Resumable Manuscript Uploads',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_manuscriptupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PdfOptimization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Media path of the file as it is stored now', max_length=255, unique=True)),
+                ('original_name', models.CharField(blank=True, help_text='Media path before optimization, if it changed', max_length=255)),
+                ('status', models.CharField(choices=[('optimized', 'Optimized'), ('skipped', 'Skipped'), ('failed', 'Failed')], max_length=10)),
+                ('original_size', models.BigIntegerField()),
+                ('optimized_size', models.BigIntegerField()),
+                ('bytes_saved', models.BigIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'PDF Optimization',
+                'verbose_name_plural': 'PDF Optimizations',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
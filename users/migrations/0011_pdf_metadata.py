@@ -0,0 +1,103 @@
+# Generated by Django 5.1.4 on 2026-10-18 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_pdf_optimization'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicationdefense',
+            name='pdf_metadata_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='applicationdefense',
+            name='pdf_page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='applicationdefense',
+            name='pdf_sha256',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='applicationdefense',
+            name='pdf_size',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Size of the PDF in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='applicationdefense',
+            name='pdf_text_length',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Characters of extractable text', null=True),
+        ),
+        migrations.AddField(
+            model_name='applicationdefense',
+            name='pdf_version',
+            field=models.CharField(blank=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='manuscript',
+            name='pdf_metadata_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='manuscript',
+            name='pdf_page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='manuscript',
+            name='pdf_sha256',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='manuscript',
+            name='pdf_size',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Size of the PDF in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='manuscript',
+            name='pdf_text_length',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Characters of extractable text', null=True),
+        ),
+        migrations.AddField(
+            model_name='manuscript',
+            name='pdf_version',
+            field=models.CharField(blank=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='panelapplication',
+            name='pdf_metadata_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='panelapplication',
+            name='pdf_page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='panelapplication',
+            name='pdf_sha256',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='panelapplication',
+            name='pdf_size',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Size of the PDF in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='panelapplication',
+            name='pdf_text_length',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Characters of extractable text', null=True),
+        ),
+        migrations.AddField(
+            model_name='panelapplication',
+            name='pdf_version',
+            field=models.CharField(blank=True, default='', editable=False, max_length=10),
+        ),
+    ]
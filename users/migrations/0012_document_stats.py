@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-18 01:02
+
+from django.db import migrations, models
+
+
+def build_counters(apps, schema_editor):
+    from users.document_stats import rebuild
+
+    rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_pdf_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(help_text='manuscript, application or panel', max_length=20)),
+                ('department', models.CharField(blank=True, default='', max_length=255)),
+                ('month', models.DateField(help_text='First day of the month the documents were created in')),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Document Statistic',
+                'verbose_name_plural': 'Document Statistics',
+                'ordering': ['-month', 'kind', 'department'],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'department', 'month'), name='unique_document_stat')],
+            },
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-18 01:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('users', '0012_document_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('fileID', models.AutoField(primary_key=True, serialize=False)),
+                ('path', models.CharField(help_text='Path relative to MEDIA_ROOT', max_length=255, unique=True)),
+                ('kind', models.CharField(choices=[('manuscript', 'Manuscript'), ('application', 'Defense Application'), ('panel', 'Panel Nomination'), ('generated', 'Generated Document'), ('other', 'Other')], default='other', max_length=20)),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('size', models.BigIntegerField()),
+                ('sha256', models.CharField(blank=True, default='', max_length=64)),
+                ('mtime', models.DateTimeField(help_text='Modification time of the file')),
+                ('cataloged_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Stored File',
+                'verbose_name_plural': 'File Catalog',
+                'indexes': [models.Index(fields=['mtime', 'fileID'], name='storedfile_mtime_keyset'), models.Index(fields=['size', 'fileID'], name='storedfile_size_keyset'), models.Index(fields=['kind', 'mtime', 'fileID'], name='storedfile_kind_mtime_keyset')],
+            },
+        ),
+    ]
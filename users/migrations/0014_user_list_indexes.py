@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-18 01:11
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0013_file_catalog'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='useraccount',
+            index=models.Index(condition=models.Q(('is_student', False)), fields=['userID'], name='user_non_student_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='useraccount',
+            index=models.Index(condition=models.Q(('is_faculty', True)), fields=['userID'], name='user_faculty_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='useraccount',
+            index=models.Index(condition=models.Q(('is_dean', True)), fields=['userID'], name='user_dean_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='useraccount',
+            index=models.Index(condition=models.Q(('is_headdept', True)), fields=['userID'], name='user_headdept_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='useraccount',
+            index=models.Index(condition=models.Q(('is_staff', True)), fields=['userID'], name='user_staff_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='useraccount',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['userID'], name='user_inactive_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='useraccount',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='user_email_lower'),
+        ),
+    ]
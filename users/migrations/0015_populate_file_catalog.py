@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 01:21
+
+from django.db import migrations
+
+
+def populate_catalog(apps, schema_editor):
+    from users.file_catalog import reconcile
+
+    reconcile(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_user_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_catalog, migrations.RunPython.noop),
+    ]
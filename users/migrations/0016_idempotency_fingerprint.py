@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0015_populate_file_catalog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicationdefense',
+            name='idempotency_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, help_text='SHA-256 of the endpoint and request body sent with the Idempotency-Key', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='documentjob',
+            name='idempotency_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, help_text='SHA-256 of the endpoint and request body sent with the Idempotency-Key', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='panelapplication',
+            name='idempotency_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, help_text='SHA-256 of the endpoint and request body sent with the Idempotency-Key', max_length=64),
+        ),
+    ]
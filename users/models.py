@@ -1,7 +1,11 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.conf import settings
+from django.db.models.functions import Lower
 from django.utils import timezone
 from .managers import UserAccountManager
+from .storage import get_manuscript_storage
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
@@ -29,6 +33,18 @@ class UserAccount(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = "User Account"
         verbose_name_plural = "User Accounts"
+        indexes = [
+            # list-users/?is_<role>= pages through one role in userID order. Only the rare
+            # side of each flag is indexed; the common side is a primary key scan anyway.
+            models.Index(fields=['userID'], condition=models.Q(is_student=False), name='user_non_student_keyset'),
+            models.Index(fields=['userID'], condition=models.Q(is_faculty=True), name='user_faculty_keyset'),
+            models.Index(fields=['userID'], condition=models.Q(is_dean=True), name='user_dean_keyset'),
+            models.Index(fields=['userID'], condition=models.Q(is_headdept=True), name='user_headdept_keyset'),
+            models.Index(fields=['userID'], condition=models.Q(is_staff=True), name='user_staff_keyset'),
+            models.Index(fields=['userID'], condition=models.Q(is_active=False), name='user_inactive_keyset'),
+            # list-users/?email= prefix search, case-insensitive.
+            models.Index(Lower('email'), name='user_email_lower'),
+        ]
 
     def __str__(self):
         return self.email
@@ -39,23 +55,46 @@ class Faculty(models.Model):
     title = models.CharField(max_length=255, blank=True, null=True)
     department = models.CharField(max_length=255, blank=True, null=True)
 
-class Manuscript(models.Model):
+class PdfMetadata(models.Model):
+    """Facts about the stored PDF, filled in the background so listings never open the file."""
+    pdf_page_count = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    pdf_size = models.BigIntegerField(null=True, blank=True, editable=False, help_text="Size of the PDF in bytes")
+    pdf_sha256 = models.CharField(max_length=64, blank=True, default='', editable=False)
+    pdf_text_length = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Characters of extractable text")
+    pdf_version = models.CharField(max_length=10, blank=True, default='', editable=False)
+    pdf_metadata_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+class Manuscript(PdfMetadata):
     manuscriptID = models.AutoField(primary_key=True)
     title = models.CharField(max_length=200, help_text="Title of the manuscript")
     description = models.TextField(blank=True, help_text="Brief description or abstract of the manuscript")  
-    pdf = models.FileField(upload_to='manuscripts/', help_text="Upload the PDF file here")
+    pdf = models.FileField(upload_to='manuscripts/', storage=get_manuscript_storage, help_text="Upload the PDF file here")
     created_at = models.DateTimeField(default=timezone.now, help_text="Timestamp of submission")
     user = models.ForeignKey(UserAccount, on_delete=models.CASCADE, related_name="manuscripts")
+    body_text = models.TextField(blank=True, default='', editable=False, help_text="Text extracted from the PDF for full-text search")
+    text_extracted_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         verbose_name = "Manuscript"
         verbose_name_plural = "Student Manuscripts"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-manuscriptID'], name='manuscript_created_keyset'),
+        ]
 
     def __str__(self):
         return self.title
 
-class ApplicationDefense(models.Model):
+    def save(self, *args, **kwargs):
+        # Saving the file takes a reference on its blob before the INSERT/UPDATE runs;
+        # both must commit or roll back together, or the count stays raised for good.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+class ApplicationDefense(PdfMetadata):
     applicationID = models.AutoField(primary_key=True)
     department = models.CharField(max_length=255, null=True, blank=True)
     research_title = models.TextField(null=True, blank=True)
@@ -75,17 +114,23 @@ class ApplicationDefense(models.Model):
     panel3 = models.ForeignKey(Faculty, on_delete=models.SET_NULL, null=True, blank=True, related_name="application_panel3")
     documenter = models.CharField(max_length=255, null=True, blank=True)
     pdf_file = models.FileField(upload_to='defense_application/', blank=True, null=True)    
+    content_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True, help_text="Hash of template and rendered form data")
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+    idempotency_fingerprint = models.CharField(max_length=64, blank=True, default='', editable=False, help_text="SHA-256 of the endpoint and request body sent with the Idempotency-Key")
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(UserAccount, on_delete=models.CASCADE, related_name="application_defenses")
 
     class Meta:
         verbose_name = "Application Defense"
         verbose_name_plural = "Student Application Defenses"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='unique_application_idempotency_key'),
+        ]
 
     def __str__(self):
         return self.research_title
 
-class PanelApplication(models.Model):
+class PanelApplication(PdfMetadata):
     panelID = models.AutoField(primary_key=True)
     research_title = models.TextField(blank=True, null=True)
     lead_researcher = models.CharField(max_length=255, blank=True, null=True)
@@ -101,12 +146,18 @@ class PanelApplication(models.Model):
     panel3 = models.ForeignKey(Faculty, on_delete=models.SET_NULL, null=True, blank=True, related_name="panel_panel3")
     docx_file = models.FileField(upload_to='panel_nomination/')
     pdf_file = models.FileField(upload_to='panel_nomination/')
+    content_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True, help_text="Hash of template and rendered form data")
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+    idempotency_fingerprint = models.CharField(max_length=64, blank=True, default='', editable=False, help_text="SHA-256 of the endpoint and request body sent with the Idempotency-Key")
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(UserAccount, on_delete=models.CASCADE, related_name="panel_defenses")
 
     class Meta:
         verbose_name = "Panel Defense"
         verbose_name_plural = "Student Panel Defenses"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='unique_panel_idempotency_key'),
+        ]
 
     def __str__(self):
         return self.research_title
@@ -132,3 +183,146 @@ class SubmissionReview(models.Model):
 
     def __str__(self):
         return f"Review by {self.reviewer.name} - {self.status}"
+
+
+class DocumentJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    jobID = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', db_index=True)
+    error = models.TextField(blank=True, null=True)
+    pdf_file = models.FileField(blank=True, null=True)
+    record_id = models.PositiveIntegerField(null=True, blank=True)
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+    idempotency_fingerprint = models.CharField(max_length=64, blank=True, default='', editable=False, help_text="SHA-256 of the endpoint and request body sent with the Idempotency-Key")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    user = models.ForeignKey(UserAccount, on_delete=models.CASCADE, related_name="document_jobs")
+
+    class Meta:
+        verbose_name = "Document Job"
+        verbose_name_plural = "Document Generation Jobs"
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='unique_job_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job {self.jobID} - {self.status}"
+
+
+class ContentBlob(models.Model):
+    digest = models.CharField(max_length=64, primary_key=True, help_text="SHA-256 of the file contents")
+    name = models.CharField(max_length=255, unique=True, help_text="Storage name of the single stored copy")
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Content Blob"
+        verbose_name_plural = "Deduplicated Files"
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class ManuscriptUpload(models.Model):
+    uploadID = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(UserAccount, on_delete=models.CASCADE, related_name="manuscript_uploads")
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    filename = models.CharField(max_length=255)
+    length = models.BigIntegerField(help_text="Declared size of the complete file in bytes")
+    offset = models.BigIntegerField(default=0, help_text="Bytes received so far")
+    manuscript = models.ForeignKey(Manuscript, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Manuscript Upload"
+        verbose_name_plural = "Resumable Manuscript Uploads"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.length})"
+
+
+class PdfOptimization(models.Model):
+    STATUS_CHOICES = [
+        ('optimized', 'Optimized'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+    name = models.CharField(max_length=255, unique=True, help_text="Media path of the file as it is stored now")
+    original_name = models.CharField(max_length=255, blank=True, help_text="Media path before optimization, if it changed")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    original_size = models.BigIntegerField()
+    optimized_size = models.BigIntegerField()
+    bytes_saved = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "PDF Optimization"
+        verbose_name_plural = "PDF Optimizations"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.status}, {self.bytes_saved} bytes saved)"
+
+
+class DocumentStat(models.Model):
+    kind = models.CharField(max_length=20, help_text="manuscript, application or panel")
+    department = models.CharField(max_length=255, blank=True, default='')
+    month = models.DateField(help_text="First day of the month the documents were created in")
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Document Statistic"
+        verbose_name_plural = "Document Statistics"
+        ordering = ['-month', 'kind', 'department']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'department', 'month'], name='unique_document_stat'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.department or '-'} {self.month:%Y-%m}: {self.count}"
+
+
+class StoredFile(models.Model):
+    KIND_CHOICES = [
+        ('manuscript', 'Manuscript'),
+        ('application', 'Defense Application'),
+        ('panel', 'Panel Nomination'),
+        ('generated', 'Generated Document'),
+        ('other', 'Other'),
+    ]
+    fileID = models.AutoField(primary_key=True)
+    path = models.CharField(max_length=255, unique=True, help_text="Path relative to MEDIA_ROOT")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='other')
+    content_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True)
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    owner = GenericForeignKey('content_type', 'object_id')
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True, default='')
+    mtime = models.DateTimeField(help_text="Modification time of the file")
+    cataloged_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Stored File"
+        verbose_name_plural = "File Catalog"
+        indexes = [
+            models.Index(fields=['mtime', 'fileID'], name='storedfile_mtime_keyset'),
+            models.Index(fields=['size', 'fileID'], name='storedfile_size_keyset'),
+            models.Index(fields=['kind', 'mtime', 'fileID'], name='storedfile_kind_mtime_keyset'),
+        ]
+
+    def __str__(self):
+        return self.path
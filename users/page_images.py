@@ -0,0 +1,155 @@
+import logging
+import os
+import threading
+
+import fitz
+from django.conf import settings
+
+from .file_serving import digest_cache
+from .pdf_metadata import known_digest
+from .utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+JPEG_QUALITY = 80
+# Very tall pages (posters, scrolls) are scaled down so no image exceeds this height/width ratio.
+MAX_ASPECT = 4
+
+
+class PageNotFound(LookupError):
+    pass
+
+
+def snap_width(value, default=None):
+    """Requested width rounded up to PAGE_IMAGE_WIDTH_STEP and clamped, so few sizes ever get cached."""
+    step = getattr(settings, 'PAGE_IMAGE_WIDTH_STEP', 100)
+    max_width = getattr(settings, 'PAGE_IMAGE_MAX_WIDTH', 2000)
+    if value in (None, ''):
+        return default or getattr(settings, 'PAGE_IMAGE_DEFAULT_WIDTH', 800)
+    width = int(value)
+    if width <= 0:
+        raise ValueError('width must be positive.')
+    return min(-(-width // step) * step, max_width)
+
+
+def render_page(pdf_path, page_number, width):
+    """JPEG bytes of 1-based page_number, width pixels wide."""
+    with fitz.open(pdf_path, filetype='pdf') as doc:
+        if not 1 <= page_number <= doc.page_count:
+            raise PageNotFound(f'Page {page_number} does not exist; the document has {doc.page_count}.')
+        page = doc.load_page(page_number - 1)
+        zoom = min(width / page.rect.width, MAX_ASPECT * width / page.rect.height)
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return pixmap.tobytes('jpeg', jpg_quality=JPEG_QUALITY)
+
+
+def pdf_digest(name, path):
+    return known_digest(name) or digest_cache.get(path, os.stat(path))
+
+
+class PageImageCache:
+    """Rendered pages on disk, keyed by PDF content hash, page and width.
+
+    A hit bumps the image's mtime, and eviction removes the oldest mtimes first (LRU)
+    until the directory is back under 90% of PAGE_IMAGE_CACHE_MAX_BYTES. Each process
+    tracks the running total from its own writes and rescans the directory when it
+    crosses the budget, so processes sharing the directory converge on the same bound.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._size = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def root(self):
+        return str(getattr(settings, 'PAGE_IMAGE_CACHE_DIR', None) or os.path.join(settings.MEDIA_ROOT, '.page_cache'))
+
+    @property
+    def max_bytes(self):
+        return getattr(settings, 'PAGE_IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+
+    def path(self, digest, page_number, width):
+        return os.path.join(self.root, digest[:2], digest, f'{page_number}-{width}.jpg')
+
+    def get(self, pdf_path, digest, page_number, width):
+        """Return the cached image path, rendering it first on a miss."""
+        path = self.path(digest, page_number, width)
+        try:
+            os.utime(path)
+            self.hits += 1
+            return path
+        except FileNotFoundError:
+            pass
+        data = render_page(pdf_path, page_number, width)
+        atomic_write(path, data)
+        self.misses += 1
+        self._added(len(data))
+        return path
+
+    def _added(self, size):
+        with self._lock:
+            if self._size is None:
+                # The first scan already counts the file just written.
+                self._size = sum(entry[1] for entry in self._entries())
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._size = self._evict()
+
+    def _entries(self):
+        entries = []
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not filename.endswith('.jpg'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(directory, filename))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, os.path.join(directory, filename)))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(entry[1] for entry in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'bytes': self._size,
+            'max_bytes': self.max_bytes,
+        }
+
+
+page_image_cache = PageImageCache()
+
+
+def render_manuscript_thumbnail(manuscript_id):
+    from .models import Manuscript
+
+    name = Manuscript.objects.filter(pk=manuscript_id).values_list('pdf', flat=True).first()
+    if not name:
+        return
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    if not os.path.isfile(path):
+        return
+    try:
+        page_image_cache.get(path, pdf_digest(name, path), 1, getattr(settings, 'PAGE_THUMBNAIL_WIDTH', 200))
+    except Exception:
+        logger.warning('Could not render a thumbnail for manuscript %s', manuscript_id, exc_info=True)
@@ -0,0 +1,83 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPaginator:
+    """Keyset pagination on (field, primary key), newest/largest first by default.
+
+    Each page is one index range scan that starts after the last row of the previous
+    page, so page N costs the same as page 1 and concurrent inserts never shift rows
+    between pages the way OFFSET does. field holds datetimes, or integers with
+    value_type=int; it may be the primary key itself. Rows may be instances or
+    values() dicts.
+    """
+
+    def __init__(self, field, pk_field, default_limit=50, max_limit=200, descending=True, value_type='datetime'):
+        self.field = field
+        self.pk_field = pk_field
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+        self.descending = descending
+        self.value_type = value_type
+
+    def parse_limit(self, value):
+        if value in (None, ''):
+            return self.default_limit
+        try:
+            limit = int(value)
+        except (TypeError, ValueError):
+            raise InvalidCursor('limit must be an integer.')
+        return max(1, min(limit, self.max_limit))
+
+    def encode(self, obj):
+        get = obj.get if isinstance(obj, dict) else lambda name: getattr(obj, name)
+        value = get(self.field)
+        if self.value_type == 'datetime':
+            value = value.isoformat()
+        payload = [value, get(self.pk_field)]
+        return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            value, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if self.value_type == 'datetime':
+                value = parse_datetime(value)
+            elif type(value) is not int:
+                raise ValueError
+            if value is None or type(pk) is not int:
+                raise ValueError
+        except (ValueError, TypeError, UnicodeError):
+            raise InvalidCursor('Invalid cursor.')
+        return value, pk
+
+    def ordered(self, queryset):
+        sign = '-' if self.descending else ''
+        fields = dict.fromkeys([self.field, self.pk_field])
+        return queryset.order_by(*(f'{sign}{field}' for field in fields))
+
+    def page(self, queryset, cursor=None, limit=None):
+        """Return (rows, next_cursor); next_cursor is None on the last page."""
+        limit = limit or self.default_limit
+        queryset = self.ordered(queryset)
+        if cursor:
+            value, pk = self.decode(cursor)
+            after = 'lt' if self.descending else 'gt'
+            if self.field == self.pk_field:
+                queryset = queryset.filter(**{f'{self.pk_field}__{after}': pk})
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{self.field}__{after}': value})
+                    | Q(**{self.field: value, f'{self.pk_field}__{after}': pk})
+                )
+        rows = list(queryset[:limit + 1])
+        if len(rows) > limit:
+            return rows[:limit], self.encode(rows[limit - 1])
+        return rows, None
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import threading
+import time
+
+import fitz
+
+
+class PdfFormTemplate:
+    """An AcroForm PDF kept in memory and filled field-by-field, with no office round-trip."""
+
+    def __init__(self, template_path, version):
+        self.template_path = template_path
+        self.version = version
+        with open(template_path, 'rb') as f:
+            self.data = f.read()
+        self.digest = hashlib.sha256(self.data).hexdigest()
+        with fitz.open(stream=self.data, filetype='pdf') as doc:
+            self.fields = sorted({widget.field_name for page in doc for widget in page.widgets()})
+        if not self.fields:
+            raise ValueError(f'{os.path.basename(template_path)} has no form fields.')
+        self.loaded_at = time.time()
+
+    def fill(self, context, flatten=True):
+        with fitz.open(stream=self.data, filetype='pdf') as doc:
+            for page in doc:
+                for widget in page.widgets():
+                    if widget.field_name not in context:
+                        continue
+                    value = context[widget.field_name]
+                    if widget.field_type == fitz.PDF_WIDGET_TYPE_CHECKBOX:
+                        widget.field_value = widget.on_state() if value else 'Off'
+                    else:
+                        widget.field_value = '' if value is None else str(value)
+                    widget.update()
+            if flatten:
+                # Burn the filled values into the page content so the result is no longer editable.
+                doc.bake()
+            return doc.tobytes(garbage=3, deflate=True)
+
+
+class PdfFormCache:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def entry(self, template_path):
+        stat = os.stat(template_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self._entries.get(template_path)
+        if entry is not None and entry.version == version:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(template_path)
+            if entry is None or entry.version != version:
+                entry = PdfFormTemplate(template_path, version)
+                self._entries[template_path] = entry
+        return entry
+
+
+pdf_form_cache = PdfFormCache()
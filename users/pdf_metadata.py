@@ -0,0 +1,77 @@
+import hashlib
+import logging
+import os
+
+import fitz
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _file_fields():
+    from .models import ApplicationDefense, Manuscript, PanelApplication
+
+    return ((Manuscript, 'pdf'), (ApplicationDefense, 'pdf_file'), (PanelApplication, 'pdf_file'))
+
+
+def read_pdf_metadata(path, digest=None):
+    """Return PdfMetadata column values for the file at path.
+
+    Uses no Django state, so it can run in spawned worker processes. digest skips
+    hashing when the SHA-256 is already known. Size and hash are still recorded for
+    files PyMuPDF cannot open.
+    """
+    if digest is None:
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+    values = {
+        'pdf_size': os.path.getsize(path),
+        'pdf_sha256': digest,
+        'pdf_page_count': None,
+        'pdf_text_length': None,
+        'pdf_version': '',
+    }
+    try:
+        with fitz.open(path, filetype='pdf') as doc:
+            values['pdf_page_count'] = doc.page_count
+            values['pdf_text_length'] = sum(len(page.get_text()) for page in doc)
+            values['pdf_version'] = (doc.metadata or {}).get('format', '').removeprefix('PDF ')[:10]
+    except Exception:
+        logger.warning('Could not read PDF metadata from %s', path, exc_info=True)
+    return values
+
+
+def known_digest(name):
+    # Deduplicated manuscript blobs are named after their SHA-256.
+    from .storage import manuscript_storage
+
+    if manuscript_storage.is_blob(name):
+        return os.path.splitext(os.path.basename(name))[0]
+    return None
+
+
+def save_pdf_metadata(name, values):
+    """Store values on every row whose PDF is the media file name; returns the rows updated."""
+    values = {**values, 'pdf_metadata_at': timezone.now()}
+    return sum(model.objects.filter(**{field: name}).update(**values) for model, field in _file_fields())
+
+
+def refresh_pdf_metadata(name):
+    """Re-read the file and store its metadata on every row using it; returns the values, or None."""
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    if not name or not os.path.isfile(path):
+        return None
+    values = read_pdf_metadata(path, known_digest(name))
+    save_pdf_metadata(name, values)
+    return values
+
+
+def refresh_manuscript_metadata(manuscript_id):
+    from .models import Manuscript
+
+    name = Manuscript.objects.filter(pk=manuscript_id).values_list('pdf', flat=True).first()
+    return refresh_pdf_metadata(name) if name else None
@@ -0,0 +1,133 @@
+import hashlib
+import logging
+import os
+import stat
+import tempfile
+
+import fitz
+from django.conf import settings
+
+from .models import Manuscript, PdfOptimization
+from .storage import manuscript_storage
+
+logger = logging.getLogger(__name__)
+
+# garbage=4 drops unused objects and merges duplicates, which covers fonts and images
+# embedded more than once. no_new_id keeps the output deterministic, so the same upload
+# always optimizes to the same blob.
+SAVE_OPTIONS = {
+    'garbage': 4,
+    'deflate': True,
+    'deflate_images': True,
+    'deflate_fonts': True,
+    'linear': True,
+    'no_new_id': True,
+}
+
+
+def optimize_pdf(path):
+    """Write an optimized copy of path beside it; return the copy's path, or None to keep the original.
+
+    The copy is kept only if it is smaller and reopens cleanly with the same page count.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.optimize-', suffix='.pdf')
+    os.close(fd)
+    try:
+        with fitz.open(path) as doc:
+            if doc.needs_pass:
+                os.remove(tmp_path)
+                return None
+            page_count = doc.page_count
+            doc.save(tmp_path, **SAVE_OPTIONS)
+        if os.path.getsize(tmp_path) >= os.path.getsize(path) or not _is_valid(tmp_path, page_count):
+            os.remove(tmp_path)
+            return None
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+    return tmp_path
+
+
+def _is_valid(path, page_count):
+    with fitz.open(path) as doc:
+        if doc.is_repaired or doc.page_count != page_count:
+            return False
+        return page_count == 0 or doc.load_page(page_count - 1) is not None
+
+
+def _record(name, original_size, optimized_size=None, status='optimized', original_name='', error=None):
+    optimized_size = original_size if optimized_size is None else optimized_size
+    fields = {
+        'original_name': original_name,
+        'status': status,
+        'original_size': original_size,
+        'optimized_size': optimized_size,
+        'bytes_saved': original_size - optimized_size,
+        'error': error,
+    }
+    # Plain update-then-insert, no read-then-write transaction (see ContentAddressedStorage._add_references).
+    if not PdfOptimization.objects.filter(name=name).update(**fields):
+        PdfOptimization.objects.create(name=name, **fields)
+
+
+def _optimize(name, path):
+    # Returns (original_size, optimized copy or None); a None outcome is recorded here.
+    original_size = os.path.getsize(path)
+    try:
+        tmp_path = optimize_pdf(path)
+    except Exception as exc:
+        logger.exception('Could not optimize %s', name)
+        _record(name, original_size, status='failed', error=str(exc))
+        return original_size, None
+    if tmp_path is None:
+        _record(name, original_size, status='skipped')
+    return original_size, tmp_path
+
+
+def optimize_media_file(name):
+    """Optimize a PDF under MEDIA_ROOT in place (generated documents, legacy manuscripts)."""
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    if PdfOptimization.objects.filter(name=name).exists() or not os.path.isfile(path):
+        return
+    original_size, tmp_path = _optimize(name, path)
+    if tmp_path is None:
+        return
+    optimized_size = os.path.getsize(tmp_path)
+    # Readers that already opened the file keep the old inode.
+    os.replace(tmp_path, path)
+    _record(name, original_size, optimized_size)
+
+
+def optimize_manuscript(manuscript_id):
+    """Optimize a manuscript's PDF; a deduplicated blob moves to the blob of its optimized content."""
+    name = Manuscript.objects.filter(pk=manuscript_id).values_list('pdf', flat=True).first()
+    if not name:
+        return
+    if not manuscript_storage.is_blob(name):
+        return optimize_media_file(name)
+
+    path = manuscript_storage.path(name)
+    if PdfOptimization.objects.filter(name=name).exists() or not os.path.isfile(path):
+        return
+    original_size, tmp_path = _optimize(name, path)
+    if tmp_path is None:
+        return
+
+    try:
+        optimized_size = os.path.getsize(tmp_path)
+        digest = hashlib.sha256()
+        with open(tmp_path, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        # update() skips the model signals: references move with the blob, none are released.
+        new_name = manuscript_storage.supersede(
+            name, tmp_path, digest.hexdigest(), optimized_size,
+            lambda blob_name: Manuscript.objects.filter(pdf=name).update(pdf=blob_name),
+        )
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if new_name is not None:
+        _record(new_name, original_size, optimized_size, original_name=name)
@@ -0,0 +1,151 @@
+import html
+import logging
+import re
+
+import fitz
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'users_manuscript_fts'
+TSVECTOR_TABLE = 'users_manuscript_search'
+
+# Private-use sentinels survive html.escape(), so snippets can be escaped before highlighting.
+_MARK_START, _MARK_END = '\ue000', '\ue001'
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _highlight(snippet):
+    return html.escape(snippet or '').replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+class SQLiteSearchBackend:
+    """FTS5 table keyed by manuscriptID and ranked with BM25 (title > abstract > PDF text)."""
+
+    def index(self, cursor, manuscript):
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [manuscript.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, body) VALUES (%s, %s, %s, %s)',
+            [manuscript.pk, manuscript.title, manuscript.description, manuscript.body_text],
+        )
+
+    def remove(self, cursor, manuscript_id):
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [manuscript_id])
+
+    def search(self, cursor, query, limit):
+        terms = _TERM_RE.findall(query)
+        if not terms:
+            return []
+        # Each word becomes a quoted prefix term, so user input can never be FTS5 syntax.
+        match = ' '.join(f'"{term}"*' for term in terms)
+        cursor.execute(
+            f"SELECT rowid, -bm25({FTS_TABLE}, 10.0, 4.0, 1.0), "
+            f"snippet({FTS_TABLE}, -1, %s, %s, '…', 24) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY bm25({FTS_TABLE}, 10.0, 4.0, 1.0) LIMIT %s",
+            [_MARK_START, _MARK_END, match, limit],
+        )
+        return cursor.fetchall()
+
+
+class PostgresSearchBackend:
+    """Weighted tsvector column with a GIN index; ts_rank_cd stands in for BM25."""
+
+    config = 'english'
+
+    def index(self, cursor, manuscript):
+        cursor.execute(
+            f'INSERT INTO {TSVECTOR_TABLE} (manuscript_id, document) VALUES (%s, '
+            f"setweight(to_tsvector('{self.config}', %s), 'A') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'B') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'C')) "
+            'ON CONFLICT (manuscript_id) DO UPDATE SET document = EXCLUDED.document',
+            [manuscript.pk, manuscript.title, manuscript.description, manuscript.body_text],
+        )
+
+    def remove(self, cursor, manuscript_id):
+        cursor.execute(f'DELETE FROM {TSVECTOR_TABLE} WHERE manuscript_id = %s', [manuscript_id])
+
+    def search(self, cursor, query, limit):
+        # Headlines are built only for the rows that survive the LIMIT.
+        cursor.execute(
+            'SELECT hits.manuscript_id, hits.rank, '
+            f"ts_headline('{self.config}', m.title || ' ' || m.description || ' ' || m.body_text, hits.query, %s) "
+            f'FROM (SELECT s.manuscript_id, ts_rank_cd(s.document, q) AS rank, q AS query '
+            f"FROM {TSVECTOR_TABLE} s, websearch_to_tsquery('{self.config}', %s) q "
+            'WHERE s.document @@ q ORDER BY rank DESC LIMIT %s) hits '
+            'JOIN users_manuscript m ON m."manuscriptID" = hits.manuscript_id '
+            'ORDER BY hits.rank DESC',
+            [f'StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords=35, MinWords=15, MaxFragments=2',
+             query, limit],
+        )
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend():
+    backend = BACKENDS.get(connection.vendor)
+    return backend() if backend else None
+
+
+def index_manuscript(manuscript):
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.index(cursor, manuscript)
+
+
+def remove_manuscript(manuscript_id):
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.remove(cursor, manuscript_id)
+
+
+def search_manuscripts(query, limit=None):
+    """Return [(manuscriptID, score, snippet_html)] best first, or None without a search backend."""
+    backend = get_backend()
+    if backend is None:
+        return None
+    limit = limit or getattr(settings, 'MANUSCRIPT_SEARCH_LIMIT', 200)
+    with connection.cursor() as cursor:
+        rows = backend.search(cursor, query, limit)
+    return [(manuscript_id, score, _highlight(snippet)) for manuscript_id, score, snippet in rows]
+
+
+def extract_pdf_text(pdf_path):
+    max_chars = getattr(settings, 'MANUSCRIPT_TEXT_MAX_CHARS', 1_000_000)
+    parts, size = [], 0
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            text = page.get_text()
+            parts.append(text)
+            size += len(text)
+            if size >= max_chars:
+                break
+    return '\n'.join(parts)[:max_chars]
+
+
+def extract_manuscript_text(manuscript_id):
+    from .models import Manuscript
+
+    manuscript = Manuscript.objects.filter(pk=manuscript_id).first()
+    if manuscript is None or not manuscript.pdf:
+        return
+    try:
+        body_text = extract_pdf_text(manuscript.pdf.path)
+    except Exception:
+        logger.exception('Could not extract text from manuscript %s', manuscript_id)
+        body_text = ''
+    # update() rather than save(): no post_save, so extraction does not reschedule itself.
+    Manuscript.objects.filter(pk=manuscript_id).update(body_text=body_text, text_extracted_at=timezone.now())
+    manuscript.body_text = body_text
+    index_manuscript(manuscript)
@@ -0,0 +1,95 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import dashboard
+from .document_stats import bump, instance_key, stored_key
+from .faculty_cache import faculty_cache
+from .ingest import process_manuscript_pdf
+from .jobs import submit
+from .models import ApplicationDefense, Faculty, Manuscript, PanelApplication, SubmissionReview, UserAccount
+from .search import index_manuscript, remove_manuscript
+from .storage import manuscript_storage
+
+
+@receiver(post_save, sender=Faculty)
+@receiver(post_delete, sender=Faculty)
+def invalidate_faculty_cache(sender, **kwargs):
+    # After commit, so no process can reload the old rows under the new version.
+    transaction.on_commit(faculty_cache.invalidate)
+
+
+@receiver(post_save, sender=UserAccount)
+@receiver(post_delete, sender=UserAccount)
+def invalidate_user_dashboard(sender, update_fields=None, **kwargs):
+    # Every login saves last_login, which no dashboard count depends on.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    transaction.on_commit(lambda: dashboard.invalidate('users'))
+
+
+@receiver(post_save, sender=SubmissionReview)
+@receiver(post_delete, sender=SubmissionReview)
+def invalidate_review_dashboard(sender, **kwargs):
+    transaction.on_commit(lambda: dashboard.invalidate('reviews'))
+
+
+@receiver(post_save, sender=Manuscript)
+def index_manuscript_on_save(sender, instance, created, update_fields=None, **kwargs):
+    transaction.on_commit(lambda: index_manuscript(instance))
+    if created or update_fields is None or 'pdf' in update_fields:
+        submit(process_manuscript_pdf, instance.pk)
+
+
+@receiver(post_delete, sender=Manuscript)
+def remove_manuscript_from_index(sender, instance, **kwargs):
+    manuscript_id = instance.pk
+    transaction.on_commit(lambda: remove_manuscript(manuscript_id))
+
+
+@receiver(pre_save, sender=Manuscript)
+def remember_previous_pdf(sender, instance, **kwargs):
+    instance._previous_pdf = None
+    if instance.pk:
+        instance._previous_pdf = Manuscript.objects.filter(pk=instance.pk).values_list('pdf', flat=True).first()
+
+
+@receiver(post_save, sender=Manuscript)
+def release_replaced_pdf(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_pdf', None)
+    if previous and previous != instance.pdf.name:
+        transaction.on_commit(lambda: manuscript_storage.release(previous))
+
+
+@receiver(post_delete, sender=Manuscript)
+def release_deleted_pdf(sender, instance, **kwargs):
+    name = instance.pdf.name
+    transaction.on_commit(lambda: manuscript_storage.release(name))
+
+
+@receiver(pre_save, sender=Manuscript)
+@receiver(pre_save, sender=ApplicationDefense)
+@receiver(pre_save, sender=PanelApplication)
+def remember_stat_key(sender, instance, **kwargs):
+    instance._previous_stat_key = stored_key(instance)
+
+
+@receiver(post_save, sender=Manuscript)
+@receiver(post_save, sender=ApplicationDefense)
+@receiver(post_save, sender=PanelApplication)
+def count_saved_document(sender, instance, created, **kwargs):
+    key = instance_key(instance)
+    previous = getattr(instance, '_previous_stat_key', None)
+    if created:
+        bump(key, 1)
+    elif previous is not None and previous != key:
+        # Department or creation month edited: move the document between counters.
+        bump(previous, -1)
+        bump(key, 1)
+
+
+@receiver(post_delete, sender=Manuscript)
+@receiver(post_delete, sender=ApplicationDefense)
+@receiver(post_delete, sender=PanelApplication)
+def count_deleted_document(sender, instance, **kwargs):
+    bump(instance_key(instance), -1)
@@ -0,0 +1,191 @@
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+try:
+    import fcntl
+except ImportError:  # Windows: the in-process lock is all we get.
+    fcntl = None
+
+_blob_lock = threading.Lock()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores each distinct upload once, under its SHA-256 digest, with a reference count.
+
+    Saving hashes the upload while it streams to a temporary file. If a blob with that
+    digest already exists, the copy is discarded and the existing name is returned.
+    Every save takes a reference on the blob, and release() drops one. The file is
+    deleted together with its last reference.
+    """
+
+    blob_dir = 'manuscripts/blobs'
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save().
+        return name
+
+    def delete(self, name):
+        from .file_catalog import unregister
+
+        super().delete(name)
+        unregister(name)
+
+    def blob_name(self, digest, extension):
+        return f'{self.blob_dir}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def is_blob(self, name):
+        return bool(name) and name.startswith(f'{self.blob_dir}/')
+
+    @contextmanager
+    def _locked(self):
+        # Serializes acquire/release across threads and processes, so a blob can never be
+        # deleted between another upload finding it and taking its reference.
+        directory = self.path(self.blob_dir)
+        os.makedirs(directory, exist_ok=True)
+        with _blob_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(directory, '.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save(self, name, content):
+        directory = self.path(self.blob_dir)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-', suffix='.tmp')
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            return self.adopt(tmp_path, digest.hexdigest(), size, os.path.splitext(name)[1].lower())
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def adopt(self, path, digest, size, extension='.pdf'):
+        """Take a reference on the blob for a file already on disk and hashed; returns its name.
+
+        path is moved into the blob store, or left for the caller to remove if the blob
+        already exists. It must be on the same filesystem as the storage location. Call it
+        inside the transaction that saves the referencing row. If that transaction rolls
+        back, so does the reference. A newly placed file is then left untracked, for the
+        next upload of the same content or gc_media to pick up.
+        """
+        with self._locked():
+            name = self._add_references(digest, self.blob_name(digest, extension), size, 1)
+            self._place(path, name)
+        return name
+
+    def _add_references(self, digest, name, size, count):
+        from .models import ContentBlob
+
+        # Write first: on SQLite a transaction that reads before it writes cannot wait
+        # for the database lock and fails at once under concurrent writers.
+        blob = ContentBlob.objects.filter(pk=digest)
+        if not blob.update(ref_count=F('ref_count') + count):
+            try:
+                with transaction.atomic():
+                    ContentBlob.objects.create(digest=digest, name=name, size=size, ref_count=count)
+            except IntegrityError:
+                # Another process's first upload of this content committed meanwhile.
+                blob.update(ref_count=F('ref_count') + count)
+        return blob.values_list('name', flat=True).get()
+
+    def _place(self, path, name):
+        blob_path = self.path(name)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.chmod(path, self.file_permissions_mode or settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+            os.replace(path, blob_path)
+
+    def supersede(self, name, path, digest, size, repoint):
+        """Move every reference on blob name to the content at path, e.g. an optimized copy.
+
+        repoint(new_name) must update the rows that store name and return how many it
+        changed; the new blob is counted from that. adopt() returns before its caller
+        commits, so a reference may still be in flight: the old blob's row is locked
+        first, which waits for that transaction, and the old blob is deleted only if
+        repoint() moved all of its references. Returns the new name, or None if name is
+        not a blob (any more) or no row uses it. As with adopt(), path is left behind if
+        its blob already exists.
+        """
+        from .models import ContentBlob
+
+        with self._locked():
+            with transaction.atomic():
+                old = ContentBlob.objects.filter(name=name)
+                # A no-op write takes the row lock (the database write lock on SQLite)
+                # before anything is read, so the count below includes every reference
+                # whose transaction was still open.
+                if not old.update(ref_count=F('ref_count')):
+                    return None
+                old = old.select_for_update().get()
+                if old.digest == digest:
+                    return name
+                new_name = (
+                    ContentBlob.objects.filter(pk=digest).values_list('name', flat=True).first()
+                    or self.blob_name(digest, os.path.splitext(name)[1])
+                )
+                moved = repoint(new_name)
+                if not moved:
+                    return None
+                self._add_references(digest, new_name, size, moved)
+                self._place(path, new_name)
+                remaining = old.ref_count - moved
+                if remaining > 0:
+                    ContentBlob.objects.filter(pk=old.pk).update(ref_count=remaining)
+                else:
+                    ContentBlob.objects.filter(pk=old.pk).delete()
+            if remaining <= 0:
+                self.delete(name)
+        return new_name
+
+    def release(self, name):
+        """Drop one reference to a blob; legacy (non-blob) files are left alone."""
+        from .models import ContentBlob
+
+        if not self.is_blob(name):
+            return
+        with self._locked():
+            ContentBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+            deleted, _ = ContentBlob.objects.filter(name=name, ref_count__lte=0).delete()
+            if deleted:
+                self.delete(name)
+
+    def discard_orphan(self, name, is_referenced):
+        """Delete blob name and its ContentBlob row unless is_referenced() says a row still uses it.
+
+        The check runs under the blob lock, so an upload cannot take a reference in between.
+        Returns whether the blob was deleted.
+        """
+        from .models import ContentBlob
+
+        with self._locked():
+            if is_referenced():
+                return False
+            ContentBlob.objects.filter(name=name).delete()
+            self.delete(name)
+        return True
+
+
+manuscript_storage = ContentAddressedStorage()
+
+
+def get_manuscript_storage():
+    return manuscript_storage
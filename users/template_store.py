@@ -0,0 +1,128 @@
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.utils.crypto import get_random_string
+
+from .utils import atomic_write
+
+POINTER_NAME = 'CURRENT'
+_REVISION_RE = re.compile(r'^r(\d+)_[A-Za-z0-9]+\.docx$')
+
+
+class TemplateStore:
+    """Immutable template revisions with an atomically replaced CURRENT pointer.
+
+    A revision file is never modified after it is published, so a render that resolved
+    one keeps using it while a newer revision is published. Every process re-reads the
+    pointer whenever it is replaced, so no restart is needed.
+    """
+
+    def __init__(self):
+        self._pointers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def root(self):
+        return str(getattr(settings, 'DOCUMENT_TEMPLATE_STORE', os.path.join(settings.BASE_DIR, 'template_revisions')))
+
+    @property
+    def keep(self):
+        return getattr(settings, 'DOCUMENT_TEMPLATE_REVISIONS', 10)
+
+    def base_path(self, name):
+        return os.path.join(settings.BASE_DIR, 'rkive', 'templates', 'word_templates', name)
+
+    def _directory(self, name):
+        return os.path.join(self.root, os.path.splitext(name)[0])
+
+    def current_revision(self, name):
+        pointer_path = os.path.join(self._directory(name), POINTER_NAME)
+        try:
+            stat = os.stat(pointer_path)
+        except FileNotFoundError:
+            return None
+
+        # The pointer is replaced, never rewritten, so a new inode always means a new revision.
+        version = (stat.st_ino, stat.st_mtime_ns)
+        cached = self._pointers.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with open(pointer_path, encoding='utf-8') as f:
+            revision = f.read().strip() or None
+        self._pointers[name] = (version, revision)
+        return revision
+
+    def resolve(self, name):
+        # Templates that were never revised through the store use the file shipped in the repo.
+        revision = self.current_revision(name)
+        if revision is None:
+            return self.base_path(name)
+        return os.path.join(self._directory(name), revision)
+
+    def revisions(self, name):
+        directory = self._directory(name)
+        try:
+            filenames = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        matched = [(int(m.group(1)), filename) for filename in filenames if (m := _REVISION_RE.match(filename))]
+        current = self.current_revision(name)
+        return [
+            {
+                'revision': filename,
+                'current': filename == current,
+                'size': os.path.getsize(os.path.join(directory, filename)),
+                'created_at': os.path.getmtime(os.path.join(directory, filename)),
+            }
+            for _, filename in sorted(matched, reverse=True)
+        ]
+
+    def publish(self, name, write):
+        """Call write(path) to create a new revision, then make it current."""
+        directory = self._directory(name)
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            revision, path = self._reserve(directory)
+            try:
+                write(path)
+            except BaseException:
+                os.remove(path)
+                raise
+            self._point_to(name, revision)
+            self._prune(name)
+        return revision, path
+
+    def rollback(self, name, revision):
+        if not _REVISION_RE.match(revision or ''):
+            raise ValueError('Invalid revision name.')
+        if not os.path.isfile(os.path.join(self._directory(name), revision)):
+            raise FileNotFoundError(f'Revision {revision} does not exist.')
+        with self._lock:
+            self._point_to(name, revision)
+        return revision
+
+    def _reserve(self, directory):
+        numbers = [int(m.group(1)) for filename in os.listdir(directory) if (m := _REVISION_RE.match(filename))]
+        number = max(numbers, default=0) + 1
+        while True:
+            revision = f'r{number:04d}_{get_random_string(8)}.docx'
+            path = os.path.join(directory, revision)
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return revision, path
+            except FileExistsError:
+                number += 1
+
+    def _point_to(self, name, revision):
+        atomic_write(os.path.join(self._directory(name), POINTER_NAME), revision.encode('utf-8'))
+
+    def _prune(self, name):
+        directory = self._directory(name)
+        for entry in self.revisions(name)[self.keep:]:
+            if not entry['current']:
+                os.remove(os.path.join(directory, entry['revision']))
+
+
+template_store = TemplateStore()
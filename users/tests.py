@@ -1,3 +1,1008 @@
-from django.test import TestCase
+import os
+import stat
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+import fitz
+from docx import Document
+from rest_framework.test import APIClient
+
+from .batch import render_many, stream_zip
+from . import document_stats
+from .converters import DEFAULT_OPTIONS, ConversionError, LibreOfficeConverter, UnoserverWorker
+from .faculty_cache import FacultyCache
+from .file_catalog import reconcile
+from .file_serving import parse_ranges, serve_file
+from .jobs import enqueue_document_job, run_document_job
+from .media_gc import MediaCollector
+from .metrics import LatencyHistogram, StageMetrics
+from .models import (
+    ApplicationDefense, ContentBlob, DocumentJob, DocumentStat, Faculty, Manuscript, ManuscriptUpload, PanelApplication,
+    PdfOptimization, UserAccount,
+)
+from .pdf_optimize import SAVE_OPTIONS, optimize_manuscript, optimize_media_file
+from .pagination import InvalidCursor, KeysetPaginator
+from .search import search_manuscripts
+from .storage import manuscript_storage
+from .uploads import append_chunk, create_upload, finalize_upload, partial_path
+from .utils import request_fingerprint
+from .views import ApplicationDocxView
+
+# Stands in for the unoserver executable: parses the arguments the way unoserver 3.7 does,
+# including Path(--user-installation).as_uri(), then answers info() over XML-RPC.
+FAKE_UNOSERVER = textwrap.dedent('''\
+    import argparse, sys
+    from pathlib import Path
+    from xmlrpc.server import SimpleXMLRPCServer
+
+    parser = argparse.ArgumentParser()
+    for option in ('--interface', '--port', '--uno-port', '--executable',
+                   '--user-installation', '--conversion-timeout'):
+        parser.add_argument(option)
+    args = parser.parse_args()
+    print('user installation', Path(args.user_installation).as_uri(), flush=True)
+    server = SimpleXMLRPCServer((args.interface, int(args.port)), logRequests=False)
+    server.register_function(lambda: {'unoserver': 'fake'}, 'info')
+    server.serve_forever()
+''')
+
+FAILING_UNOSERVER = textwrap.dedent('''\
+    import sys
+    sys.stderr.write('soffice: cannot open display\\n')
+    sys.exit(1)
+''')
+
+
+class UnoserverWorkerTests(SimpleTestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+
+    def _options(self, script):
+        path = os.path.join(self.tmpdir, 'unoserver')
+        with open(path, 'w') as f:
+            f.write(f'#!{sys.executable}\n{script}')
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+        return {**DEFAULT_OPTIONS, 'UNOSERVER': path, 'PROFILE_ROOT': self.tmpdir, 'STARTUP_TIMEOUT': 10, 'WORKERS': 1}
+
+    def test_start_passes_a_plain_profile_path(self):
+        worker = UnoserverWorker(0, self._options(FAKE_UNOSERVER))
+        self.addCleanup(worker.stop)
+        worker.start()
+        self.assertTrue(worker.healthy())
+        self.assertIn(f'user installation file://{worker.profile_dir}', worker.output())
+
+    def test_start_failure_reports_the_worker_output(self):
+        worker = UnoserverWorker(0, self._options(FAILING_UNOSERVER))
+        with self.assertRaisesRegex(ConversionError, 'cannot open display'):
+            worker.start()
+        self.assertIsNone(worker.process)
+
+    def test_pool_starts_workers_on_checkout(self):
+        converter = LibreOfficeConverter(self._options(FAKE_UNOSERVER))
+        self.addCleanup(converter.close)
+        worker = converter._checkout()
+        try:
+            self.assertTrue(worker.alive())
+        finally:
+            converter._idle.put(worker)
+
+
+class ListDocumentFilesTests(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        media = override_settings(MEDIA_ROOT=tmpdir.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        for name in ('manuscripts/legacy.pdf', 'manuscripts/blobs/ab/cd/abcd.pdf', 'generated_documents/out.pdf'):
+            path = os.path.join(tmpdir.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'%PDF-1.4')
+        self.client = APIClient()
+        self.client.force_authenticate(UserAccount.objects.create(email='admin@example.com', is_staff=True))
+
+    def test_legacy_listing_includes_blob_paths(self):
+        reconcile()
+        response = self.client.get('/api/list-files/')
+        self.assertEqual(response.json(), {
+            'generated_documents_files': ['out.pdf'],
+            'manuscripts_files': ['blobs/ab/cd/abcd.pdf', 'legacy.pdf'],
+        })
+
+
+class FacultyCacheTests(TestCase):
+    def test_snapshot_expires_without_an_invalidation(self):
+        faculty = Faculty.objects.create(name='Dr. Old')
+        faculty_cache = FacultyCache()
+        self.assertEqual(faculty_cache.get(faculty.pk).name, 'Dr. Old')
+        # update() sends no signal, as if another process had written the row.
+        Faculty.objects.filter(pk=faculty.pk).update(name='Dr. New')
+        self.assertEqual(faculty_cache.get(faculty.pk).name, 'Dr. Old')
+        with override_settings(FACULTY_CACHE_TTL=0):
+            self.assertEqual(faculty_cache.get(faculty.pk).name, 'Dr. New')
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        media = override_settings(MEDIA_ROOT=tmpdir.name, PDF_OPTIMIZE_ON_INGEST=False)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.user = UserAccount.objects.create(email='student@example.com')
+
+    def _manuscript(self, content=b'%PDF-1.4 same', title='T'):
+        manuscript = Manuscript(user=self.user, title=title)
+        manuscript.pdf = ContentFile(content, name='upload.pdf')
+        manuscript.save()
+        return manuscript
+
+    def _blob(self, name):
+        return ContentBlob.objects.get(name=name)
+
+    def test_identical_uploads_share_one_counted_blob(self):
+        first, second = self._manuscript(), self._manuscript()
+        self.assertEqual(first.pdf.name, second.pdf.name)
+        self.assertTrue(manuscript_storage.is_blob(first.pdf.name))
+        self.assertEqual(self._blob(first.pdf.name).ref_count, 2)
+        self.assertNotEqual(self._manuscript(b'%PDF-1.4 other').pdf.name, first.pdf.name)
+
+    def test_last_release_deletes_the_blob(self):
+        first, second = self._manuscript(), self._manuscript()
+        name = first.pdf.name
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self._blob(name).ref_count, 1)
+        self.assertTrue(manuscript_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(ContentBlob.objects.filter(name=name).exists())
+        self.assertFalse(manuscript_storage.exists(name))
+
+    def test_release_ignores_legacy_files_and_never_goes_negative(self):
+        manuscript_storage.release('manuscripts/legacy.pdf')
+        name = self._manuscript().pdf.name
+        ContentBlob.objects.filter(name=name).update(ref_count=0)
+        manuscript_storage.release(name)
+        self.assertFalse(ContentBlob.objects.filter(name=name).exists())
+
+    def test_failed_save_rolls_back_the_reference(self):
+        name = self._manuscript().pdf.name
+        with self.assertRaises(IntegrityError):
+            self._manuscript(title=None)
+        self.assertEqual(self._blob(name).ref_count, 1)
+
+    def test_outer_rollback_rolls_back_a_new_blob(self):
+        with transaction.atomic():
+            name = self._manuscript(b'%PDF-1.4 rolled back').pdf.name
+            transaction.set_rollback(True)
+        self.assertFalse(ContentBlob.objects.filter(name=name).exists())
+        # The untracked file is picked up again by the next upload of the same content.
+        self.assertEqual(self._manuscript(b'%PDF-1.4 rolled back').pdf.name, name)
+        self.assertEqual(self._blob(name).ref_count, 1)
+
+    def _replacement(self, content=b'%PDF-1.4 smaller'):
+        path = os.path.join(manuscript_storage.path(''), 'replacement.pdf')
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_supersede_moves_every_reference(self):
+        first, second = self._manuscript(), self._manuscript()
+        old_name = first.pdf.name
+        digest = 'b' * 64
+
+        def repoint(new_name):
+            return Manuscript.objects.filter(pdf=old_name).update(pdf=new_name)
+
+        new_name = manuscript_storage.supersede(old_name, self._replacement(), digest, 16, repoint)
+        self.assertEqual(new_name, manuscript_storage.blob_name(digest, '.pdf'))
+        self.assertEqual(self._blob(new_name).ref_count, 2)
+        self.assertFalse(ContentBlob.objects.filter(name=old_name).exists())
+        self.assertFalse(manuscript_storage.exists(old_name))
+        self.assertEqual(set(Manuscript.objects.values_list('pdf', flat=True)), {new_name})
+        self.assertIsNone(manuscript_storage.supersede(old_name, self._replacement(), digest, 16, repoint))
+
+    def test_supersede_counts_an_upload_adopted_in_an_open_transaction(self):
+        first = self._manuscript()
+        old_name = first.pdf.name
+        with transaction.atomic():
+            # The upload has taken its reference, but its transaction has not committed.
+            second = self._manuscript()
+            new_name = manuscript_storage.supersede(
+                old_name, self._replacement(), 'c' * 64, 16,
+                lambda new_name: Manuscript.objects.filter(pdf=old_name).update(pdf=new_name),
+            )
+        self.assertEqual(self._blob(new_name).ref_count, 2)
+        self.assertFalse(ContentBlob.objects.filter(name=old_name).exists())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(manuscript_storage.exists(new_name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(manuscript_storage.exists(new_name))
+
+    def test_supersede_keeps_the_old_blob_for_references_it_did_not_move(self):
+        first, second = self._manuscript(), self._manuscript()
+        old_name = first.pdf.name
+        # As if second's row were not yet visible to repoint().
+        new_name = manuscript_storage.supersede(
+            old_name, self._replacement(), 'd' * 64, 16,
+            lambda new_name: Manuscript.objects.filter(pk=first.pk).update(pdf=new_name),
+        )
+        self.assertEqual(self._blob(new_name).ref_count, 1)
+        self.assertEqual(self._blob(old_name).ref_count, 1)
+        self.assertTrue(manuscript_storage.exists(old_name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(manuscript_storage.exists(old_name))
+        self.assertTrue(manuscript_storage.exists(new_name))
+
+
+class FinalizeUploadTests(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        media = override_settings(MEDIA_ROOT=tmpdir.name, PDF_OPTIMIZE_ON_INGEST=False)
+        media.enable()
+        self.addCleanup(media.disable)
+        # PDF processing would run on the job threads, outside the test transaction.
+        patcher = mock.patch('users.signals.submit')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        data = b'%PDF-1.4 resumable upload'
+        self.upload = create_upload(UserAccount.objects.create(email='student@example.com'), 'T', '', 'a.pdf', len(data))
+        append_chunk(self.upload, 0, BytesIO(data))
+
+    def test_failed_finalize_keeps_the_partial_for_a_retry(self):
+        with mock.patch.object(Manuscript, 'save', side_effect=RuntimeError('database went away')):
+            with self.assertRaises(RuntimeError):
+                finalize_upload(self.upload)
+        self.assertTrue(os.path.exists(partial_path(self.upload)))
+        self.assertFalse(ContentBlob.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            manuscript = finalize_upload(self.upload)
+        self.assertEqual(ContentBlob.objects.get(name=manuscript.pdf.name).ref_count, 1)
+        self.assertTrue(manuscript_storage.exists(manuscript.pdf.name))
+        self.assertFalse(os.path.exists(partial_path(self.upload)))
+
+    def test_partial_is_discarded_only_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            finalize_upload(self.upload)
+        self.assertTrue(os.path.exists(partial_path(self.upload)))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(os.path.exists(partial_path(self.upload)))
+        blob_dir = manuscript_storage.path(manuscript_storage.blob_dir)
+        self.assertFalse([name for name in os.listdir(blob_dir) if name.startswith('.upload-')])
+
+
+class EnqueueDocumentJobTests(TestCase):
+    def test_same_idempotency_key_returns_the_existing_job(self):
+        user = UserAccount.objects.create(email='student@example.com')
+        first = enqueue_document_job('application', user, {'research_title': 'T'}, 'key-1')
+        # The second request missed the lookup and raced the first to the INSERT.
+        second = enqueue_document_job('application', user, {'research_title': 'T'}, 'key-1')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(DocumentJob.objects.count(), 1)
+        self.assertNotEqual(enqueue_document_job('application', user, {}, None).pk, first.pk)
+
+
+class IdempotencyKeyTests(TestCase):
+    payload = {'research_title': 'T', 'department': 'CS'}
+
+    def setUp(self):
+        self.user = UserAccount.objects.create(email='student@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _post(self, url, payload, key='key-1'):
+        return self.client.post(url, payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_async_replay_must_match_body_and_endpoint(self):
+        first = self._post('/api/application-docx/?async=1', self.payload)
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(self._post('/api/application-docx/?async=1', self.payload).json()['jobID'], first.json()['jobID'])
+        self.assertEqual(self._post('/api/application-docx/?async=1', {**self.payload, 'research_title': 'U'}).status_code, 422)
+        self.assertEqual(self._post('/api/final-application-docx/?async=1', self.payload).status_code, 422)
+
+    def test_sync_replay_with_a_different_body_is_rejected(self):
+        ApplicationDefense.objects.create(
+            user=self.user, research_title='T', pdf_file='defense_application/a.pdf', idempotency_key='key-1',
+            idempotency_fingerprint=request_fingerprint('application', self.payload),
+        )
+        response = self._post('/api/application-docx/', {**self.payload, 'research_title': 'U'})
+        self.assertEqual(response.status_code, 422)
+        # Proposal and final applications share the table, not the endpoint.
+        self.assertEqual(self._post('/api/proposal-application-docx/', self.payload).status_code, 422)
+
+    def _sync_record(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        media = override_settings(MEDIA_ROOT=tmpdir.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        os.makedirs(os.path.join(tmpdir.name, 'defense_application'))
+        with open(os.path.join(tmpdir.name, 'defense_application', 'a.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4')
+        return ApplicationDefense.objects.create(
+            user=self.user, research_title='T', pdf_file='defense_application/a.pdf', idempotency_key='key-1',
+            idempotency_fingerprint=request_fingerprint('application', self.payload),
+        )
+
+    def test_async_retry_of_a_sync_request_returns_its_record(self):
+        self._sync_record()
+        response = self.client.post(
+            '/api/application-docx/', self.payload, format='json',
+            HTTP_IDEMPOTENCY_KEY='key-1', HTTP_PREFER='respond-async',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Render-Cache'], 'idempotent')
+        self.assertEqual(self._post('/api/application-docx/?async=1', {**self.payload, 'research_title': 'U'}).status_code, 422)
+        self.assertFalse(DocumentJob.objects.exists())
+
+    def _run_job_after_sync_record(self, payload):
+        DocumentJob.objects.all().delete()
+        job = DocumentJob.objects.create(
+            kind='application', user=self.user, payload=payload, idempotency_key='key-1',
+            idempotency_fingerprint=request_fingerprint('application', payload),
+        )
+        # generate() hits the record's (user, idempotency_key) constraint.
+        with mock.patch.object(ApplicationDocxView, 'generate', side_effect=IntegrityError('UNIQUE constraint failed')):
+            run_document_job(job.pk)
+        job.refresh_from_db()
+        return job
+
+    def test_job_losing_the_key_to_a_sync_request_completes_with_its_record(self):
+        record = self._sync_record()
+        job = self._run_job_after_sync_record(self.payload)
+        self.assertEqual((job.status, job.record_id, job.pdf_file.name), ('completed', record.pk, 'defense_application/a.pdf'))
+        with self.assertLogs('users.jobs', 'ERROR'):
+            job = self._run_job_after_sync_record({**self.payload, 'research_title': 'U'})
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('Idempotency-Key', job.error)
+
+
+class StageMetricsTests(SimpleTestCase):
+    def test_summary_percentiles(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.observe(ms)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['max_ms'], 100)
+        self.assertAlmostEqual(summary['p50_ms'], 50, delta=50 * 0.03)
+        self.assertAlmostEqual(summary['p99_ms'], 99, delta=99 * 0.03)
+
+    def test_snapshot_while_new_series_appear(self):
+        metrics = StageMetrics()
+
+        def observe():
+            for index in range(3000):
+                metrics.observe(f't{index}', 'total', 1.0)
+
+        thread = threading.Thread(target=observe)
+        thread.start()
+        try:
+            while thread.is_alive():
+                metrics.snapshot()
+        finally:
+            thread.join()
+        self.assertEqual(len(metrics.snapshot()['templates']), 3000)
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        self.user = UserAccount.objects.create(email='student@example.com')
+        self.paginator = KeysetPaginator('created_at', 'manuscriptID', default_limit=2)
+
+    def _manuscripts(self, *created_at):
+        return [
+            Manuscript.objects.create(user=self.user, title='T', pdf='manuscripts/a.pdf', created_at=at).pk
+            for at in created_at
+        ]
+
+    def _walk(self, paginator, queryset):
+        pks, cursor = [], None
+        while True:
+            rows, cursor = paginator.page(queryset, cursor)
+            pks += [row['manuscriptID'] if isinstance(row, dict) else row.pk for row in rows]
+            if cursor is None:
+                return pks
+
+    def test_cursor_round_trip(self):
+        at = timezone.now()
+        manuscript = Manuscript(pk=7, created_at=at)
+        self.assertEqual(self.paginator.decode(self.paginator.encode(manuscript)), (at, 7))
+        self.assertEqual(self.paginator.decode(self.paginator.encode({'created_at': at, 'manuscriptID': 7})), (at, 7))
+        by_id = KeysetPaginator('userID', 'userID', value_type=int)
+        self.assertEqual(by_id.decode(by_id.encode({'userID': 3})), (3, 3))
+
+    def test_invalid_cursors(self):
+        by_id = KeysetPaginator('userID', 'userID', value_type=int)
+        for paginator, cursor in [
+            (self.paginator, 'not base64!'),
+            (self.paginator, 'bm90IGpzb24'),  # "not json"
+            (self.paginator, by_id.encode({'userID': 3})),  # an int where a datetime belongs
+            (by_id, self.paginator.encode({'created_at': timezone.now(), 'manuscriptID': 7})),
+            (by_id, 'WzMsICIzIl0'),  # [3, "3"]: the pk must be an int
+            (by_id, 'WzNd'),  # [3]
+        ]:
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                paginator.decode(cursor)
+
+    def test_ties_on_the_field_are_broken_by_pk(self):
+        at = timezone.now()
+        pks = self._manuscripts(at, at, at, at - timedelta(seconds=1), at)
+        expected = sorted(pks[:3] + pks[4:], reverse=True) + [pks[3]]
+        self.assertEqual(self._walk(self.paginator, Manuscript.objects.all()), expected)
+        self.assertEqual(self._walk(self.paginator, Manuscript.objects.values('manuscriptID', 'created_at')), expected)
+        ascending = KeysetPaginator('created_at', 'manuscriptID', default_limit=2, descending=False)
+        self.assertEqual(self._walk(ascending, Manuscript.objects.all()), expected[::-1])
+
+    def test_pk_as_field(self):
+        pks = self._manuscripts(*[timezone.now()] * 5)
+        paginator = KeysetPaginator('manuscriptID', 'manuscriptID', default_limit=2, descending=False, value_type=int)
+        self.assertEqual(self._walk(paginator, Manuscript.objects.all()), pks)
+
+    def test_parse_limit(self):
+        self.assertEqual(self.paginator.parse_limit(None), 2)
+        self.assertEqual(self.paginator.parse_limit(''), 2)
+        self.assertEqual(self.paginator.parse_limit('0'), 1)
+        self.assertEqual(self.paginator.parse_limit('1000'), 200)
+        with self.assertRaises(InvalidCursor):
+            self.paginator.parse_limit('ten')
+
+
+class FileServingTests(SimpleTestCase):
+    content = bytes(range(100))
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, 'a.pdf')
+        with open(self.path, 'wb') as f:
+            f.write(self.content)
+        self.mtime = os.stat(self.path).st_mtime
+
+    def _get(self, method='get', **headers):
+        request = getattr(RequestFactory(), method)('/', headers=headers)
+        return serve_file(request, self.path, 'application/pdf', digest='abc')
+
+    def test_parse_ranges(self):
+        for header, expected in [
+            ('bytes=0-9', [(0, 9)]),
+            ('bytes=-10', [(90, 99)]),
+            ('bytes=-500', [(0, 99)]),
+            ('bytes=90-', [(90, 99)]),
+            ('bytes=95-200', [(95, 99)]),
+            ('bytes=0-9,5-19,20-29', [(0, 29)]),  # overlapping and adjacent ranges merge
+            ('bytes=50-59, 0-9', [(0, 9), (50, 59)]),
+            ('bytes=100-', []),
+            ('bytes=-0', []),
+            ('bytes=100-200,-0', []),
+            ('bytes=9-0', None),
+            ('bytes=-', None),
+            ('bytes=a-b', None),
+            ('items=0-9', None),
+            ('bytes=' + ','.join(['0-0'] * 33), None),
+        ]:
+            with self.subTest(header=header):
+                self.assertEqual(parse_ranges(header, 100), expected)
+
+    def test_single_and_suffix_ranges(self):
+        response = self._get(Range='bytes=-10')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 90-99/100')
+        self.assertEqual(b''.join(response.streaming_content), self.content[90:])
+
+    def test_multiple_ranges(self):
+        response = self._get(Range='bytes=50-59,0-4,2-9')
+        self.assertEqual(response.status_code, 206)
+        body = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(body))
+        self.assertIn(b'Content-Range: bytes 0-9/100\r\n\r\n' + self.content[:10], body)
+        self.assertIn(b'Content-Range: bytes 50-59/100\r\n\r\n' + self.content[50:60], body)
+        self.assertEqual(body.count(b'Content-Range'), 2)
+
+    def test_unsatisfiable_range(self):
+        response = self._get(Range='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_if_range(self):
+        self.assertEqual(self._get(Range='bytes=0-9', If_Range='"abc"').status_code, 206)
+        self.assertEqual(self._get(Range='bytes=0-9', If_Range='"old"').status_code, 200)
+        self.assertEqual(self._get(Range='bytes=0-9', If_Range=http_date(self.mtime + 60)).status_code, 206)
+        self.assertEqual(self._get(Range='bytes=0-9', If_Range=http_date(self.mtime - 60)).status_code, 200)
+
+    def test_not_modified(self):
+        response = self._get(If_None_Match='"other", W/"abc"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], '"abc"')
+        self.assertEqual(self._get(If_None_Match='"other"').status_code, 200)
+        self.assertEqual(self._get(If_Modified_Since=http_date(self.mtime + 60)).status_code, 304)
+        # If-None-Match wins over If-Modified-Since.
+        self.assertEqual(self._get(If_None_Match='"other"', If_Modified_Since=http_date(self.mtime + 60)).status_code, 200)
+        self.assertEqual(self._get('head', If_None_Match='"abc"').status_code, 304)
+
+
+class MediaCollectorTests(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = tmpdir.name
+        media = override_settings(MEDIA_ROOT=self.root, MANUSCRIPT_UPLOAD_DIR=None, PAGE_IMAGE_CACHE_DIR=None)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.user = UserAccount.objects.create(email='student@example.com')
+        self.digest = 'a' * 64
+        self.blob = manuscript_storage.blob_name(self.digest, '.pdf')
+        ContentBlob.objects.create(digest=self.digest, name=self.blob, size=4, ref_count=1)
+        self.live = ManuscriptUpload.objects.create(user=self.user, title='T', filename='a.pdf', length=4)
+        expired = ManuscriptUpload.objects.create(user=self.user, title='T', filename='b.pdf', length=4)
+        ManuscriptUpload.objects.filter(pk=expired.pk).update(updated_at=timezone.now() - timedelta(days=30))
+        self.expired = expired
+        Manuscript.objects.create(user=self.user, title='T', pdf='manuscripts/kept.pdf')
+        for name in [
+            'manuscripts/kept.pdf', 'manuscripts/orphan.pdf', 'manuscripts/.upload-1.tmp', 'manuscripts/.a.pdf.tmp',
+            'manuscripts/blobs/.lock', self.blob, f'.uploads/{self.live.pk}.part', f'.uploads/{expired.pk}.part',
+            '.uploads/unknown.part', '.uploads/notes.txt', '.page_cache/ab/abc/1-800.jpg',
+        ]:
+            self._write(name)
+        self._write('manuscripts/fresh.pdf', age=timedelta(0))
+
+    def _write(self, name, age=timedelta(days=2)):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'data')
+        mtime = time.time() - age.total_seconds()
+        os.utime(path, (mtime, mtime))
+
+    def _exists(self, name):
+        return os.path.exists(os.path.join(self.root, name))
+
+    def _run(self, **options):
+        orphans = []
+        stats = MediaCollector(workers=2, on_orphan=orphans.append, **options).run()
+        return stats, {orphan.path: orphan.reason for orphan in orphans}
+
+    def test_classifies_orphans(self):
+        stats, orphans = self._run(dry_run=True)
+        self.assertEqual(orphans, {
+            'manuscripts/orphan.pdf': 'unreferenced',
+            'manuscripts/.upload-1.tmp': 'temp',
+            'manuscripts/.a.pdf.tmp': 'temp',
+            self.blob: 'blob',
+            '.uploads/unknown.part': 'upload',
+            # Not live any more: the expired upload's row is only discarded in a real run.
+            f'.uploads/{self.expired.pk}.part': 'upload',
+        })
+        self.assertEqual(stats['expired_uploads'], 1)
+
+    def test_dry_run_deletes_nothing(self):
+        stats, _ = self._run(dry_run=True)
+        self.assertEqual(stats['deleted'], 0)
+        for name in ['manuscripts/orphan.pdf', 'manuscripts/.upload-1.tmp', self.blob, '.uploads/unknown.part']:
+            self.assertTrue(self._exists(name))
+        self.assertTrue(ContentBlob.objects.filter(pk=self.digest).exists())
+        self.assertTrue(ManuscriptUpload.objects.filter(pk=self.expired.pk).exists())
+
+        output = StringIO()
+        call_command('gc_media', '--dry-run', '--workers=2', stdout=output)
+        self.assertIn('would be freed', output.getvalue())
+        self.assertTrue(self._exists('manuscripts/orphan.pdf'))
+
+    def test_deletes_orphans_only(self):
+        stats, _ = self._run()
+        # The expired upload's partial goes with its row, before the walk.
+        self.assertEqual(stats['deleted'], 5)
+        for name in [
+            'manuscripts/orphan.pdf', 'manuscripts/.upload-1.tmp', 'manuscripts/.a.pdf.tmp', self.blob,
+            '.uploads/unknown.part', f'.uploads/{self.expired.pk}.part',
+        ]:
+            self.assertFalse(self._exists(name), name)
+        for name in [
+            'manuscripts/kept.pdf', 'manuscripts/fresh.pdf', 'manuscripts/blobs/.lock',
+            f'.uploads/{self.live.pk}.part', '.uploads/notes.txt', '.page_cache/ab/abc/1-800.jpg',
+        ]:
+            self.assertTrue(self._exists(name), name)
+        self.assertFalse(ContentBlob.objects.filter(pk=self.digest).exists())
+        self.assertFalse(ManuscriptUpload.objects.filter(pk=self.expired.pk).exists())
+
+    def test_min_age(self):
+        _, orphans = self._run(dry_run=True, min_age=timedelta(0))
+        self.assertIn('manuscripts/fresh.pdf', orphans)
+        _, orphans = self._run(dry_run=True, min_age=timedelta(days=3))
+        self.assertEqual(orphans, {})
+
+    def test_rechecks_references_before_deleting(self):
+        # Rows that start using a file after the references were loaded.
+        Manuscript.objects.create(user=self.user, title='T', pdf='manuscripts/orphan.pdf')
+        Manuscript.objects.create(user=self.user, title='T', pdf=self.blob)
+        with mock.patch('users.media_gc.referenced_names', return_value=set()):
+            stats, orphans = self._run()
+        self.assertEqual(orphans[self.blob], 'blob')
+        self.assertTrue(self._exists('manuscripts/orphan.pdf'))
+        self.assertTrue(self._exists('manuscripts/kept.pdf'))
+        self.assertTrue(self._exists(self.blob))
+        self.assertTrue(ContentBlob.objects.filter(pk=self.digest).exists())
+        self.assertEqual(stats['deleted'], 3)
+
+    def test_resumes_from_checkpoint(self):
+        checkpoint = os.path.join(self.root, 'gc.checkpoint')
+        with open(checkpoint, 'w') as f:
+            f.write('manuscripts\n')
+        stats, orphans = self._run(dry_run=True, checkpoint=checkpoint)
+        self.assertEqual(stats['skipped_directories'], 1)
+        self.assertEqual(set(orphans), {'.uploads/unknown.part', f'.uploads/{self.expired.pk}.part'})
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_checkpoint_records_finished_directories(self):
+        checkpoint = os.path.join(self.root, 'gc.checkpoint')
+
+        def interrupt(orphan):
+            if orphan.path.startswith('.uploads/'):
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            MediaCollector(dry_run=True, workers=1, checkpoint=checkpoint, on_orphan=interrupt).run()
+        with open(checkpoint) as f:
+            done = set(f.read().split())
+        self.assertNotIn('.uploads', done)
+        self.assertLessEqual(done, {'manuscripts', 'manuscripts/blobs', 'manuscripts/blobs/aa', 'manuscripts/blobs/aa/aa'})
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmp = tmpdir.name
+        media = override_settings(MEDIA_ROOT=self.tmp)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    @override_settings(DOCUMENT_BATCH_PROCESSES=2)
+    def test_render_many_keeps_input_order(self):
+        path = os.path.join(self.tmp, 'template.docx')
+        document = Document()
+        document.add_paragraph('Title: {{ research_title }}')
+        document.save(path)
+        titles = [f'T{index}' for index in range(5)]
+        rendered = render_many(path, [{'research_title': title} for title in titles], 'template.docx')
+        texts = [Document(BytesIO(docx)).paragraphs[0].text for docx in rendered]
+        self.assertEqual(texts, [f'Title: {title}' for title in titles])
+
+    def test_stream_zip_writes_a_valid_archive_without_seeking(self):
+        path = os.path.join(self.tmp, 'large.pdf')
+        content = os.urandom(200 * 1024)
+        with open(path, 'wb') as f:
+            f.write(content)
+        chunks = list(stream_zip([('001_a.pdf', path), ('manifest.json', b'[]')], chunk_size=64 * 1024))
+        # The file is streamed as it is read, not buffered whole.
+        self.assertLess(max(len(chunk) for chunk in chunks), len(content))
+        with zipfile.ZipFile(BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), ['001_a.pdf', 'manifest.json'])
+            self.assertEqual(archive.read('001_a.pdf'), content)
+            self.assertEqual(archive.read('manifest.json'), b'[]')
+            self.assertEqual(archive.getinfo('001_a.pdf').compress_type, zipfile.ZIP_STORED)
+
+    def test_failed_batch_removes_its_pdfs_and_saves_no_rows(self):
+        user = UserAccount.objects.create(email='student@example.com')
+        view = ApplicationDocxView()
+        items = [{'research_title': 'A', 'department': 'CS'}, {'research_title': 'B', 'department': 'CS'}]
+        converter = mock.Mock(options={})
+        with mock.patch('users.views.render_many', return_value=[b'docx', b'docx']), \
+                mock.patch('users.views.get_converter', return_value=converter), \
+                mock.patch.object(ApplicationDocxView, '_load_template', return_value=mock.Mock(digest='d')), \
+                mock.patch.object(ApplicationDocxView, '_convert_to_pdf', return_value=b'%PDF-1.4'), \
+                mock.patch('users.views.document_stats.record_created', side_effect=RuntimeError('counters')):
+            with self.assertRaises(RuntimeError):
+                view.generate_batch(user, items)
+        self.assertFalse(ApplicationDefense.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.tmp, 'defense_application')), [])
+
+
+class DocumentStatsTests(TestCase):
+    def setUp(self):
+        self.user = UserAccount.objects.create(email='student@example.com')
+
+    def assertInSync(self):
+        self.assertEqual(document_stats.drift(), {})
+        by_type = dict.fromkeys(document_stats.SOURCES, 0)
+        for (kind, _, _), count in document_stats.compute_counts().items():
+            by_type[kind] += count
+        self.assertEqual(document_stats.summary()['by_type'], by_type)
+
+    def _manuscript(self, **fields):
+        return Manuscript.objects.create(user=self.user, title='T', pdf='manuscripts/a.pdf', **fields)
+
+    def test_create_and_delete(self):
+        manuscript = self._manuscript()
+        ApplicationDefense.objects.create(user=self.user, department='CS')
+        panel = PanelApplication.objects.create(user=self.user)
+        self.assertInSync()
+        self.assertEqual(document_stats.summary()['by_type'], {'manuscript': 1, 'application': 1, 'panel': 1})
+        manuscript.delete()
+        panel.delete()
+        self.assertInSync()
+        self.assertEqual(document_stats.summary()['by_type'], {'manuscript': 0, 'application': 1, 'panel': 0})
+
+    def test_edit_moves_the_document_between_cells(self):
+        application = ApplicationDefense.objects.create(user=self.user, department='CS')
+        application.department = 'IT'
+        application.save()
+        self.assertInSync()
+        self.assertEqual(document_stats.summary()['by_department'], {'IT': {'application': 1}})
+
+        manuscript = self._manuscript(created_at=timezone.now() - timedelta(days=62))
+        manuscript.created_at = timezone.now()
+        manuscript.save()
+        # Saving without a change leaves the counters alone.
+        manuscript.save()
+        self.assertInSync()
+
+    def test_bulk_create_is_counted_by_record_created(self):
+        records = ApplicationDefense.objects.bulk_create(
+            [ApplicationDefense(user=self.user, department=department) for department in ['CS', 'CS', '']]
+        )
+        self.assertEqual(len(document_stats.drift()), 2)
+        document_stats.record_created(records)
+        self.assertInSync()
+        self.assertEqual(
+            document_stats.summary()['by_department'], {'CS': {'application': 2}, 'Unassigned': {'application': 1}},
+        )
+
+    def test_rebuild_repairs_drift(self):
+        self._manuscript()
+        self._manuscript(created_at=timezone.now() - timedelta(days=62))
+        ApplicationDefense.objects.create(user=self.user, department='CS')
+        DocumentStat.objects.filter(kind='manuscript').update(count=5)
+        DocumentStat.objects.create(kind='panel', department='', month=timezone.now().date().replace(day=1), count=3)
+        changed = document_stats.drift()
+        self.assertEqual(sorted(old for old, _ in changed.values()), [3, 5, 5])
+        self.assertEqual(document_stats.rebuild(), changed)
+        self.assertInSync()
+        self.assertEqual(document_stats.rebuild(), {})
+
+
+class ListUsersTests(TestCase):
+    def setUp(self):
+        self.users = {
+            email: UserAccount.objects.create(email=email, is_faculty=faculty, is_student=not faculty)
+            for email, faculty in [
+                ('abz@example.com', False), ('AB.Case@example.com', True), ('ac@example.com', False),
+                ('aa@example.com', True), ('ab@example.com', False),
+            ]
+        }
+        self.client = APIClient()
+        self.client.force_authenticate(self.users['aa@example.com'])
+
+    def _get(self, **params):
+        return self.client.get('/api/list-users/', params)
+
+    def _emails(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [row['email'] for row in response.json()['results']]
+
+    def test_email_prefix(self):
+        self.assertEqual(self._emails(self._get(email='ab')), ['abz@example.com', 'AB.Case@example.com', 'ab@example.com'])
+        self.assertEqual(self._emails(self._get(email='AB.')), ['AB.Case@example.com'])
+        self.assertEqual(self._emails(self._get(email='abz@example.com')), ['abz@example.com'])
+        self.assertEqual(self._emails(self._get(email='b')), [])
+
+    def test_role_flags(self):
+        self.assertEqual(self._emails(self._get(is_faculty='true', email='a')), ['AB.Case@example.com', 'aa@example.com'])
+        self.assertEqual(len(self._emails(self._get(is_faculty='0'))), 3)
+        response = self._get(is_faculty='maybe')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('is_faculty', response.json()['error'])
+
+    def test_fields(self):
+        response = self._get(fields='email, is_dean')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['results'][0]), {'userID', 'email', 'is_dean'})
+        response = self._get(fields='email,password,last_login')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Unknown field(s): last_login, password.')
+
+    def test_paging(self):
+        seen, params = [], {'limit': 2, 'fields': 'email'}
+        while True:
+            response = self._get(**params)
+            body = response.json()
+            seen += [row['userID'] for row in body['results']]
+            if body['next_cursor'] is None:
+                self.assertIsNone(body['next'])
+                break
+            self.assertIn(f"cursor={body['next_cursor']}", body['next'])
+            params['cursor'] = body['next_cursor']
+        self.assertEqual(seen, sorted(user.pk for user in self.users.values()))
+        self.assertEqual(self._get(cursor='garbage').status_code, 400)
+        self.assertEqual(self._get(limit='ten').status_code, 400)
+
+    def test_without_parameters_every_user_is_listed(self):
+        response = self._get()
+        self.assertEqual(len(response.json()), 5)
+
+
+class ManuscriptSearchTests(TestCase):
+    def setUp(self):
+        # PDF processing would run on the job threads, outside the test transaction.
+        patcher = mock.patch('users.signals.submit')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = UserAccount.objects.create(email='student@example.com')
+
+    def _manuscript(self, title, description='', body_text=''):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Manuscript.objects.create(
+                user=self.user, title=title, description=description, body_text=body_text, pdf='manuscripts/a.pdf',
+            )
+
+    def _ids(self, query):
+        return [manuscript_id for manuscript_id, _, _ in search_manuscripts(query)]
+
+    def test_title_match_outranks_body_match(self):
+        in_body = self._manuscript('Crop yields', body_text='A study using neural networks to forecast rainfall.')
+        in_title = self._manuscript('Neural networks for rainfall', body_text='Forecasting with historical data.')
+        self._manuscript('Unrelated', body_text='Nothing to see here.')
+        self.assertEqual(self._ids('neural networks'), [in_title.pk, in_body.pk])
+        # Words are matched as prefixes.
+        self.assertEqual(self._ids('netw'), [in_title.pk, in_body.pk])
+
+    def test_snippets_are_escaped_but_highlighted(self):
+        self._manuscript('<script>alert(1)</script> rainfall & drought')
+        [(_, score, snippet)] = search_manuscripts('rainfall')
+        self.assertGreater(score, 0)
+        self.assertNotIn('<script>', snippet)
+        self.assertIn('&lt;script&gt;', snippet)
+        self.assertIn('<mark>rainfall</mark> &amp; drought', snippet)
+
+    def test_query_syntax_is_not_interpreted(self):
+        manuscript = self._manuscript('Rainfall AND drought', body_text='title: "quoted" NEAR(words)')
+        for query in ['"', 'AND(', '*', 'rainfall"', 'title:rainfall', 'NEAR(rainfall', 'rainfall OR', '-drought', '']:
+            with self.subTest(query=query):
+                self.assertIsInstance(search_manuscripts(query), list)
+        self.assertEqual(self._ids('"rainfall" AND('), [manuscript.pk])
+
+    def test_deleted_manuscript_leaves_the_index(self):
+        manuscript = self._manuscript('Rainfall')
+        self.assertEqual(self._ids('rainfall'), [manuscript.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            manuscript.delete()
+        self.assertEqual(self._ids('rainfall'), [])
+
+    def test_edits_are_reindexed(self):
+        manuscript = self._manuscript('Rainfall')
+        manuscript.title = 'Drought'
+        with self.captureOnCommitCallbacks(execute=True):
+            manuscript.save()
+        self.assertEqual(self._ids('rainfall'), [])
+        self.assertEqual(self._ids('drought'), [manuscript.pk])
+
+
+class PdfOptimizeTests(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = tmpdir.name
+        media = override_settings(MEDIA_ROOT=self.root, PDF_OPTIMIZE_ON_INGEST=False)
+        media.enable()
+        self.addCleanup(media.disable)
+        patcher = mock.patch('users.signals.submit')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _pdf(self, **save_options):
+        with fitz.open() as doc:
+            for index in range(3):
+                page = doc.new_page()
+                page.insert_text((72, 72), f'Page {index}')
+                for line in range(40):
+                    page.insert_text((72, 100 + line * 15), 'A line of text that compresses well. ' * 2)
+            return doc.tobytes(**save_options)
+
+    def _media_file(self, content, name='defense_application/a.pdf'):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return name, path
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def assertNoTemporaries(self, directory):
+        self.assertEqual([name for name in os.listdir(directory) if name.startswith('.optimize-')], [])
+
+    def test_media_file_is_replaced_by_a_smaller_copy(self):
+        content = self._pdf()
+        name, path = self._media_file(content)
+        optimize_media_file(name)
+        record = PdfOptimization.objects.get(name=name)
+        self.assertEqual(record.status, 'optimized')
+        self.assertEqual(record.original_size, len(content))
+        self.assertEqual(record.optimized_size, os.path.getsize(path))
+        self.assertGreater(record.bytes_saved, 0)
+        with fitz.open(path) as doc:
+            self.assertEqual(doc.page_count, 3)
+        self.assertNoTemporaries(os.path.dirname(path))
+
+    def test_larger_result_keeps_the_original(self):
+        content = self._pdf(**SAVE_OPTIONS)
+        name, path = self._media_file(content)
+        optimize_media_file(name)
+        self.assertEqual(self._read(path), content)
+        record = PdfOptimization.objects.get(name=name)
+        self.assertEqual((record.status, record.bytes_saved), ('skipped', 0))
+        self.assertNoTemporaries(os.path.dirname(path))
+
+    def test_invalid_result_keeps_the_original(self):
+        content = self._pdf()
+        name, path = self._media_file(content)
+        with mock.patch('users.pdf_optimize._is_valid', return_value=False):
+            optimize_media_file(name)
+        self.assertEqual(self._read(path), content)
+        self.assertEqual(PdfOptimization.objects.get(name=name).status, 'skipped')
+        self.assertNoTemporaries(os.path.dirname(path))
+
+    def test_unreadable_pdf_is_recorded_as_failed(self):
+        name, path = self._media_file(b'not a pdf')
+        with self.assertLogs('users.pdf_optimize', 'ERROR'):
+            optimize_media_file(name)
+        self.assertEqual(self._read(path), b'not a pdf')
+        record = PdfOptimization.objects.get(name=name)
+        self.assertEqual(record.status, 'failed')
+        self.assertTrue(record.error)
+        # Recorded outcomes are not retried.
+        with mock.patch('users.pdf_optimize.optimize_pdf') as optimize_pdf:
+            optimize_media_file(name)
+        optimize_pdf.assert_not_called()
+
+    def test_blob_moves_every_reference_to_the_optimized_blob(self):
+        content = self._pdf()
+        user = UserAccount.objects.create(email='student@example.com')
+        manuscripts = []
+        for _ in range(2):
+            manuscript = Manuscript(user=user, title='T')
+            manuscript.pdf = ContentFile(content, name='upload.pdf')
+            manuscript.save()
+            manuscripts.append(manuscript)
+        old_name = manuscripts[0].pdf.name
+
+        optimize_manuscript(manuscripts[0].pk)
+        names = set(Manuscript.objects.values_list('pdf', flat=True))
+        self.assertEqual(len(names), 1)
+        new_name = names.pop()
+        self.assertNotEqual(new_name, old_name)
+        self.assertTrue(manuscript_storage.is_blob(new_name))
+        self.assertEqual(ContentBlob.objects.get(name=new_name).ref_count, 2)
+        self.assertFalse(ContentBlob.objects.filter(name=old_name).exists())
+        self.assertFalse(manuscript_storage.exists(old_name))
+        self.assertLess(manuscript_storage.size(new_name), len(content))
+        record = PdfOptimization.objects.get(name=new_name)
+        self.assertEqual((record.status, record.original_name), ('optimized', old_name))
+        self.assertNoTemporaries(manuscript_storage.path(manuscript_storage.blob_dir))
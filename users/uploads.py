@@ -0,0 +1,176 @@
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Manuscript, ManuscriptUpload
+from .storage import manuscript_storage
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CHUNK_SIZE = 64 * 1024
+
+# Running SHA-256 per upload, valid while its offset matches the upload's. A chunk that
+# lands in another process, or a restart, just means re-hashing the partial file once.
+_hash_states = {}
+_hash_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def upload_dir():
+    return str(getattr(settings, 'MANUSCRIPT_UPLOAD_DIR', None) or os.path.join(settings.MEDIA_ROOT, '.uploads'))
+
+
+def partial_path(upload):
+    return os.path.join(upload_dir(), f'{upload.uploadID}.part')
+
+
+def create_upload(user, title, description, filename, length):
+    max_size = getattr(settings, 'MANUSCRIPT_UPLOAD_MAX_SIZE', 500 * 1024 * 1024)
+    if length <= 0 or length > max_size:
+        raise UploadError(f'Upload-Length must be between 1 and {max_size} bytes.', status=413 if length > 0 else 400)
+
+    upload = ManuscriptUpload.objects.create(
+        user=user, title=title, description=description, filename=filename, length=length
+    )
+    path = partial_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return upload
+
+
+@contextmanager
+def _exclusive(f):
+    # One writer per upload: a second PATCH racing on the same upload gets a 409 instead of interleaving.
+    if fcntl is None:
+        yield
+        return
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        raise UploadError('Another chunk for this upload is in progress.', status=409)
+    try:
+        yield
+    finally:
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _hasher_at(upload, path):
+    with _hash_lock:
+        state = _hash_states.pop(upload.uploadID, None)
+    if state is not None and state[0] == upload.offset:
+        return state[1]
+    hasher = hashlib.sha256()
+    remaining = upload.offset
+    with open(path, 'rb') as f:
+        while remaining:
+            chunk = f.read(min(CHUNK_SIZE * 16, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+
+def append_chunk(upload, offset, stream):
+    """Write the request body at offset and return the new offset; nothing is buffered in memory."""
+    if upload.manuscript_id:
+        raise UploadError('Upload is already complete.', status=409, offset=upload.offset)
+    if offset != upload.offset:
+        raise UploadError('Upload-Offset does not match the server offset.', status=409, offset=upload.offset)
+
+    path = partial_path(upload)
+    with open(path, 'r+b') as f, _exclusive(f):
+        upload.refresh_from_db(fields=['offset'])
+        if offset != upload.offset:
+            raise UploadError('Upload-Offset does not match the server offset.', status=409, offset=upload.offset)
+
+        hasher = _hasher_at(upload, path)
+        f.seek(offset)
+        f.truncate()
+        written = 0
+        try:
+            while chunk := stream.read(CHUNK_SIZE):
+                if offset + written + len(chunk) > upload.length:
+                    raise UploadError('Chunk extends past Upload-Length.', status=413)
+                f.write(chunk)
+                hasher.update(chunk)
+                written += len(chunk)
+        finally:
+            # Keep whatever arrived intact, even from an interrupted request, so the client resumes there.
+            f.truncate(offset + written)
+            f.flush()
+            os.fsync(f.fileno())
+            upload.offset = offset + written
+            ManuscriptUpload.objects.filter(pk=upload.pk).update(offset=upload.offset)
+            with _hash_lock:
+                _hash_states[upload.uploadID] = (upload.offset, hasher)
+    return upload.offset
+
+
+def finalize_upload(upload):
+    """Move the assembled file into manuscript storage and create its Manuscript."""
+    upload.refresh_from_db()
+    if upload.manuscript_id:
+        return upload.manuscript
+    if upload.offset != upload.length:
+        raise UploadError('Upload is incomplete.', status=409, offset=upload.offset)
+
+    path = partial_path(upload)
+    with open(path, 'rb') as f:
+        if f.read(5) != b'%PDF-':
+            raise UploadError('Uploaded file is not a PDF.', status=415)
+    digest = _hasher_at(upload, path).hexdigest()
+
+    staged = _stage(path)
+    try:
+        with transaction.atomic():
+            upload = ManuscriptUpload.objects.select_for_update().get(pk=upload.pk)
+            if upload.manuscript_id:
+                return upload.manuscript
+            manuscript = Manuscript(user=upload.user, title=upload.title, description=upload.description)
+            manuscript.pdf.name = manuscript_storage.adopt(staged, digest, upload.length)
+            manuscript.save()
+            upload.manuscript = manuscript
+            upload.save(update_fields=['manuscript', 'updated_at'])
+            # Only once the Manuscript exists: until then the client can retry finalize.
+            transaction.on_commit(lambda: discard_partial(upload))
+    finally:
+        if os.path.exists(staged):
+            os.remove(staged)
+    return manuscript
+
+
+def _stage(path):
+    """A second name for the partial file inside the blob store, for adopt() to move."""
+    directory = manuscript_storage.path(manuscript_storage.blob_dir)
+    os.makedirs(directory, exist_ok=True)
+    staged = os.path.join(directory, f'.upload-{uuid.uuid4().hex}.tmp')
+    try:
+        os.link(path, staged)
+    except OSError:
+        # No hard links on this filesystem; a copy costs one more write of the file.
+        shutil.copyfile(path, staged)
+    return staged
+
+
+def discard_partial(upload):
+    with _hash_lock:
+        _hash_states.pop(upload.uploadID, None)
+    path = partial_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
@@ -14,8 +14,23 @@ from .views import(
     FinalApplicationDocxView,
     PanelDocxView,
     PanelAdminDocxView,
+    TemplateRevisionListView,
+    TemplateRollbackView,
+    DocumentBatchView,
+    DocumentJobView,
+    DocumentMetricsView,
+    DocumentJobPdfView,
+    DocumentCacheStatsView,
     ManuscriptSubmissionView,
+    ManuscriptPdfView,
+    ManuscriptPageView,
+    ApplicationPageView,
+    PanelPageView,
+    ManuscriptUploadView,
+    ManuscriptUploadDetailView,
+    ManuscriptUploadFinalizeView,
     DocumentCountView,
+    DashboardView,
     ListDocumentFilesView,
     ListUsersView,
     SubmissionReviewViewSet,
@@ -45,9 +60,28 @@ urlpatterns = [
     path('defense-application-admin/', ApplicationAdminDocxView.as_view()),
     path('panel-docx/', PanelDocxView.as_view()),
     path('defense-panel-admin/', PanelAdminDocxView.as_view()),
+    path('template-revisions/<str:template_name>/', TemplateRevisionListView.as_view()),
+    path('template-revisions/<str:template_name>/rollback/', TemplateRollbackView.as_view()),
+    path('documents/batch/', DocumentBatchView.as_view()),
+    path('document-jobs/<uuid:job_id>/', DocumentJobView.as_view()),
+    path('document-jobs/<uuid:job_id>/pdf/', DocumentJobPdfView.as_view()),
+    path('document-metrics/', DocumentMetricsView.as_view()),
+    path('document-cache-stats/', DocumentCacheStatsView.as_view()),
     path('manuscripts/', ManuscriptSubmissionView.as_view()),
+    path('manuscripts/<int:manuscript_id>/pdf/', ManuscriptPdfView.as_view()),
+    path('manuscripts/<int:manuscript_id>/pages/<int:page>/', ManuscriptPageView.as_view()),
+    path('manuscripts/<int:manuscript_id>/thumbnail/', ManuscriptPageView.as_view(thumbnail=True)),
+    path('manuscripts/uploads/', ManuscriptUploadView.as_view()),
+    path('manuscripts/uploads/<uuid:upload_id>/', ManuscriptUploadDetailView.as_view()),
+    path('manuscripts/uploads/<uuid:upload_id>/finalize/', ManuscriptUploadFinalizeView.as_view()),
+
+    path('applications/<int:record_id>/pages/<int:page>/', ApplicationPageView.as_view()),
+    path('applications/<int:record_id>/thumbnail/', ApplicationPageView.as_view(thumbnail=True)),
+    path('panel-applications/<int:record_id>/pages/<int:page>/', PanelPageView.as_view()),
+    path('panel-applications/<int:record_id>/thumbnail/', PanelPageView.as_view(thumbnail=True)),
 
     path('document-count/', DocumentCountView.as_view()),
+    path('dashboard/', DashboardView.as_view()),
     path('list-files/', ListDocumentFilesView.as_view()),
     path('list-users/', ListUsersView.as_view()),
     path('list-users/<int:userID>/', ListUsersView.as_view()),
@@ -0,0 +1,37 @@
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+@contextmanager
+def atomic_writer(path):
+    # Write next to the destination and rename over it, so readers never see a partial file.
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write(path, data):
+    with atomic_writer(path) as f:
+        f.write(data)
+
+
+def request_fingerprint(kind, payload):
+    """SHA-256 of an endpoint and its request body, kept with an Idempotency-Key to spot reuse."""
+    body = json.dumps({'kind': kind, 'payload': payload}, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
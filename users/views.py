@@ -1,18 +1,19 @@
+import hashlib
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 from io import BytesIO
 
-import pythoncom
-import zipfile
-from win32com.client import Dispatch
-from docxtpl import DocxTemplate
-from docx2pdf import convert
-
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
 from django.db.models import Q
-from django.http import HttpResponse, JsonResponse, FileResponse, Http404
+from django.db.models.functions import Lower
+from django.http import HttpResponse, JsonResponse, FileResponse, Http404, StreamingHttpResponse
+from django.utils.crypto import get_random_string
 from djoser.social.views import ProviderAuthView
 from rest_framework import viewsets
 from rest_framework.permissions import IsAdminUser
@@ -26,8 +27,26 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
 )
+from . import dashboard, document_stats
+from .batch import render_many, stream_zip
+from .converters import get_converter
+from .docx_rewrite import placeholder_index, rewrite_docx
+from .docx_templates import template_cache
+from .faculty_cache import faculty_cache
+from .file_serving import serve_file
+from .ingest import process_generated_pdf
+from .jobs import enqueue_document_job, submit
+from .metrics import StageTimer, stage_metrics
+from .page_images import PageNotFound, page_image_cache, pdf_digest, snap_width
+from .pagination import InvalidCursor, KeysetPaginator
+from .search import search_manuscripts
+from .storage import manuscript_storage
+from .pdf_forms import PdfFormTemplate, pdf_form_cache
+from .template_store import template_store
+from .uploads import UploadError, append_chunk, create_upload, discard_partial, finalize_upload
 from .models import *
 from .serializers import *
+from .utils import atomic_write, request_fingerprint
 
 User = get_user_model()
 
@@ -128,158 +147,383 @@ class LogoutView(APIView):
 
 class FacultyListView(APIView):
     def get(self, request):
-        faculty = Faculty.objects.all()
-        serializer = FacultySerializer(faculty, many=True)
-        return Response(serializer.data)
+        return Response(faculty_cache.serialized())
 
 # Document Generation Views
-class ApplicationDocxView(APIView):
-    def post(self, request, *args, **kwargs):
-        context = request.data
-        user = request.user
-        template_path = os.path.join(
-            settings.BASE_DIR, 'rkive', 'templates', 'word_templates', 'template_application.docx'
-        )
+def _payload_to_dict(data):
+    if hasattr(data, 'dict'):
+        return data.dict()
+    return dict(data)
 
-        if not os.path.exists(template_path):
-            return JsonResponse({'error': 'Template file not found.'}, status=404)
 
-        try:
-            pythoncom.CoInitialize()
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            docx_filename = f'Application-for-Oral-Defense_{timestamp}.docx'
-            pdf_filename = docx_filename.replace('.docx', '.pdf')
-            docx_file_path = os.path.join(settings.MEDIA_ROOT, 'defense_application', docx_filename)
-            pdf_file_path = os.path.join(settings.MEDIA_ROOT, 'defense_application', pdf_filename)
+class RenderCacheCounters:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
 
-            os.makedirs(os.path.dirname(docx_file_path), exist_ok=True)
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
 
-            docx_context = self._prepare_docx_context(context)
-            doc = DocxTemplate(template_path)
-            doc.render(docx_context)
-            doc.save(docx_file_path)
 
-            self._convert_to_pdf(docx_file_path, pdf_file_path)
-            doc_record = self._save_application_record(user, context, pdf_filename)
-            os.remove(docx_file_path)
+render_cache = RenderCacheCounters()
 
-            return self._serve_pdf_response(pdf_file_path, pdf_filename)
 
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
-        finally:
-            pythoncom.CoUninitialize()
+KEY_REUSED_ERROR = 'This Idempotency-Key was already used with a different request body or endpoint.'
 
-    def _prepare_docx_context(self, context):
-        docx_context = context.copy()
-        for key in ['panel_chair', 'adviser', 'panel1', 'panel2', 'panel3']:
-            docx_context[key] = self._get_faculty_name(context.get(key))
-        return docx_context
 
-    def _get_faculty_name(self, faculty_id):
-        faculty = Faculty.objects.filter(facultyID=faculty_id).first()
-        return faculty.name if faculty else 'Unknown'
+class DocumentGenerationView(APIView):
+    template_name = None
+    output_dir = None
+    filename_prefix = None
+    job_kind = None
+    record_model = None
+    faculty_keys = ['panel_chair', 'adviser', 'panel1', 'panel2', 'panel3']
+    faculty_lookup = None
+    timer = None
 
-    def _get_faculty_object(self, faculty_id):
-        return Faculty.objects.filter(facultyID=faculty_id).first()
-
-    def _convert_to_pdf(self, docx_path, pdf_path):
-        word = Dispatch('Word.Application')
-        word.Visible = False
-        doc = word.Documents.Open(docx_path)
-        doc.SaveAs(pdf_path, FileFormat=17)
-        doc.Close()
-        word.Quit()
-
-    def _save_application_record(self, user, context, pdf_filename):
-        return ApplicationDefense.objects.create(
-            user=user,
-            department=context.get('department'),
-            lead_researcher=context.get('lead_researcher'),
-            lead_contactno=context.get('lead_contactno'),
-            co_researcher=context.get('co_researcher'),
-            co_researcher1=context.get('co_researcher1'),
-            co_researcher2=context.get('co_researcher2'),
-            co_researcher3=context.get('co_researcher3'),
-            co_researcher4=context.get('co_researcher4'),
-            research_title=context.get('research_title'),
-            datetime_defense=context.get('datetime_defense'),
-            place_defense=context.get('place_defense'),
-            panel_chair=self._get_faculty_object(context.get('panel_chair')),
-            adviser=self._get_faculty_object(context.get('adviser')),
-            panel1=self._get_faculty_object(context.get('panel1')),
-            panel2=self._get_faculty_object(context.get('panel2')),
-            panel3=self._get_faculty_object(context.get('panel3')),
-            documenter=context.get('documenter'),
-            pdf_file=f'defense_application/{pdf_filename}',
-        )
-
-    def _serve_pdf_response(self, pdf_path, pdf_filename):
-        pdf_file = open(pdf_path, 'rb')
-        response = FileResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="{pdf_filename}"'
-        return response
-
-class ProposalApplicationDocxView(APIView):
     def post(self, request, *args, **kwargs):
+        self.timer = StageTimer(self.template_name)
         context = request.data
         user = request.user
-        template_path = os.path.join(
-            settings.BASE_DIR, 'rkive', 'templates', 'word_templates', 'template_application_proposal.docx'
-        )
+        template_path = self._get_template_path()
+        idempotency_key = request.headers.get('Idempotency-Key') or None
 
         if not os.path.exists(template_path):
             return JsonResponse({'error': 'Template file not found.'}, status=404)
 
+        error = self._validate_payload(context)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+
+        fingerprint = request_fingerprint(self.job_kind, _payload_to_dict(context)) if idempotency_key else ''
+        if self._wants_async(request):
+            job = self._find_idempotent_job(user, idempotency_key)
+            if job is None:
+                # The key may have been used by a synchronous request, which saved the record.
+                doc_record = self._find_idempotent_record(user, idempotency_key)
+                if doc_record is not None:
+                    if self._key_reused(doc_record, fingerprint):
+                        return self._key_reused_response()
+                    return self.timer.finish(self._serve_record_response(doc_record, cache_status='idempotent'))
+                job = enqueue_document_job(self.job_kind, user, _payload_to_dict(context), idempotency_key)
+            if self._key_reused(job, fingerprint):
+                return self._key_reused_response()
+            return self._job_accepted_response(request, job)
+
         try:
-            pythoncom.CoInitialize()
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            docx_filename = f'Application-for-Oral-Defense_{timestamp}.docx'
-            pdf_filename = docx_filename.replace('.docx', '.pdf')
-            docx_file_path = os.path.join(settings.MEDIA_ROOT, 'defense_application', docx_filename)
-            pdf_file_path = os.path.join(settings.MEDIA_ROOT, 'defense_application', pdf_filename)
+            with self._stage('idempotency'):
+                doc_record = self._find_idempotent_record(user, idempotency_key)
+            if doc_record is not None:
+                if self._key_reused(doc_record, fingerprint):
+                    return self._key_reused_response()
+                return self.timer.finish(self._serve_record_response(doc_record, cache_status='idempotent'))
+
+            try:
+                doc_record, pdf_file_path, pdf_filename = self.generate(user, context, idempotency_key)
+            except IntegrityError:
+                # A concurrent retry with the same Idempotency-Key won the race.
+                doc_record = self._find_idempotent_record(user, idempotency_key)
+                if doc_record is None:
+                    raise
+                if self._key_reused(doc_record, fingerprint):
+                    return self._key_reused_response()
+                return self.timer.finish(self._serve_record_response(doc_record, cache_status='idempotent'))
+
+            with self._stage('response'):
+                response = self._serve_pdf_response(pdf_file_path, pdf_filename, doc_record.content_hash)
+            response['X-Render-Cache'] = 'hit' if doc_record.render_cache_hit else 'miss'
+            return self.timer.finish(response)
 
-            os.makedirs(os.path.dirname(docx_file_path), exist_ok=True)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
 
+    def generate(self, user, context, idempotency_key=None):
+        with self._stage('template'):
+            compiled = self._load_template()
+        with self._stage('faculty'):
+            self.faculty_lookup = self._resolve_faculty([context])
             docx_context = self._prepare_docx_context(context)
-            doc = DocxTemplate(template_path)
-            doc.render(docx_context)
-            doc.save(docx_file_path)
-
-            self._convert_to_pdf(docx_file_path, pdf_file_path)
-            doc_record = self._save_application_record(user, context, pdf_filename)
-            os.remove(docx_file_path)
+        with self._stage('cache_lookup'):
+            content_hash = self._content_hash(compiled, docx_context)
+            pdf_filename = self._find_rendered_pdf(content_hash)
+        extra_fields = {
+            'content_hash': content_hash,
+            'idempotency_key': idempotency_key,
+            'idempotency_fingerprint': request_fingerprint(self.job_kind, _payload_to_dict(context)) if idempotency_key else '',
+        }
 
-            return self._serve_pdf_response(pdf_file_path, pdf_filename)
+        if pdf_filename is not None:
+            render_cache.hits += 1
+            with self._stage('db'):
+                doc_record = self._save_record(user, context, None, pdf_filename, **extra_fields)
+            self._process_pdfs([doc_record])
+            doc_record.render_cache_hit = True
+            pdf_file_path = os.path.join(settings.MEDIA_ROOT, self.output_dir, pdf_filename)
+            return doc_record, pdf_file_path, pdf_filename
+
+        render_cache.misses += 1
+        if isinstance(compiled, PdfFormTemplate):
+            with self._stage('render'):
+                pdf_bytes = compiled.fill(docx_context, flatten=self._flatten_forms())
+            pdf_filename = self._store_pdf(pdf_bytes=pdf_bytes)
+        else:
+            with self._stage('render'):
+                doc = compiled.clone()
+                doc.render(docx_context)
+                docx_buffer = BytesIO()
+                doc.save(docx_buffer)
+            pdf_filename = self._store_pdf(docx_buffer.getvalue())
+        pdf_file_path = os.path.join(settings.MEDIA_ROOT, self.output_dir, pdf_filename)
+        try:
+            with self._stage('db'):
+                doc_record = self._save_record(user, context, None, pdf_filename, **extra_fields)
+        except Exception:
+            os.remove(pdf_file_path)
+            raise
+        self._process_pdfs([doc_record])
+        doc_record.render_cache_hit = False
+
+        return doc_record, pdf_file_path, pdf_filename
+
+    def generate_batch(self, user, items):
+        compiled = self._load_template()
+        self.faculty_lookup = self._resolve_faculty(items)
+        contexts = [_payload_to_dict(self._prepare_docx_context(item)) for item in items]
+        hashes = [self._content_hash(compiled, context) for context in contexts]
+
+        # Identical items (within the batch or from earlier submissions) are rendered at most once.
+        pdf_filenames = self._find_rendered_pdfs(set(hashes))
+        pending = {}
+        for content_hash, context in zip(hashes, contexts):
+            if content_hash not in pdf_filenames:
+                pending.setdefault(content_hash, context)
+        render_cache.hits += len(items) - len(pending)
+        render_cache.misses += len(pending)
+
+        futures = {}
+        try:
+            if isinstance(compiled, PdfFormTemplate):
+                # Form filling needs neither the render processes nor the office converter.
+                flatten = self._flatten_forms()
+                with ThreadPoolExecutor() as fill_pool:
+                    for content_hash, context in pending.items():
+                        futures[content_hash] = fill_pool.submit(
+                            lambda context: self._store_pdf(pdf_bytes=compiled.fill(context, flatten)), context
+                        )
+            else:
+                with ThreadPoolExecutor(max_workers=get_converter().options.get('WORKERS', 1)) as convert_pool:
+                    rendered = render_many(compiled.template_path, list(pending.values()), self.template_name)
+                    for content_hash, docx_bytes in zip(pending, rendered):
+                        futures[content_hash] = convert_pool.submit(self._store_pdf, docx_bytes)
+            for content_hash, future in futures.items():
+                pdf_filenames[content_hash] = future.result()
+
+            records = [
+                self._build_record(user, item, None, pdf_filenames[content_hash], content_hash=content_hash)
+                for item, content_hash in zip(items, hashes)
+            ]
+            # Rows and counters commit together, so on any failure below nothing refers
+            # to the PDFs that are about to be removed.
+            with transaction.atomic():
+                records = self.record_model.objects.bulk_create(records)
+                document_stats.record_created(records)
+        except Exception:
+            for future in futures.values():
+                if not future.cancelled() and future.exception() is None:
+                    os.remove(os.path.join(settings.MEDIA_ROOT, self.output_dir, future.result()))
+            raise
+        self._process_pdfs(records)
+        return records
+
+    def _store_pdf(self, docx_bytes=None, pdf_bytes=None):
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        pdf_filename = self._reserve_filename(f'{self.filename_prefix}_{timestamp}.pdf')
+        pdf_file_path = os.path.join(settings.MEDIA_ROOT, self.output_dir, pdf_filename)
+        try:
+            if pdf_bytes is None:
+                with self._stage('convert'):
+                    pdf_bytes = self._convert_to_pdf(docx_bytes)
+            with self._stage('write'):
+                atomic_write(pdf_file_path, pdf_bytes)
+        except Exception:
+            os.remove(pdf_file_path)
+            raise
+        return pdf_filename
+
+    def _process_pdfs(self, records):
+        # Optimization, metadata and cataloging run after the rows exist, so they can be
+        # updated with it; one job per file, owned by the first record using it.
+        owners = {}
+        for record in records:
+            owners.setdefault(record.pdf_file.name, (record._meta.label, record.pk))
+        for name, owner in owners.items():
+            submit(process_generated_pdf, name, owner)
+
+    def _stage(self, name):
+        return self.timer.stage(name) if self.timer is not None else nullcontext()
+
+    def _content_hash(self, compiled, docx_context):
+        canonical = json.dumps(
+            {'template': compiled.digest, 'context': _payload_to_dict(docx_context)},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _find_rendered_pdf(self, content_hash):
+        return self._find_rendered_pdfs({content_hash}).get(content_hash)
+
+    def _find_rendered_pdfs(self, content_hashes):
+        prefix = f'{self.output_dir}/'
+        found = {}
+        rows = self.record_model.objects.filter(
+            content_hash__in=content_hashes, pdf_file__startswith=prefix
+        ).order_by('-created_at').values_list('content_hash', 'pdf_file')
+        for content_hash, name in rows.iterator():
+            if content_hash in found:
+                continue
+            pdf_filename = name[len(prefix):]
+            pdf_file_path = os.path.join(settings.MEDIA_ROOT, self.output_dir, pdf_filename)
+            if os.path.isfile(pdf_file_path) and os.path.getsize(pdf_file_path) > 0:
+                found[content_hash] = pdf_filename
+                if len(found) == len(content_hashes):
+                    break
+        return found
+
+    def _find_idempotent_record(self, user, idempotency_key):
+        if not idempotency_key:
+            return None
+        return self.record_model.objects.filter(user=user, idempotency_key=idempotency_key).first()
+
+    def _key_reused(self, row, fingerprint):
+        # Rows saved before fingerprints were stored have none and are trusted.
+        return bool(row.idempotency_fingerprint) and row.idempotency_fingerprint != fingerprint
+
+    def _key_reused_response(self):
+        return JsonResponse({'error': KEY_REUSED_ERROR}, status=422)
+
+    def _find_idempotent_job(self, user, idempotency_key):
+        if not idempotency_key:
+            return None
+        return DocumentJob.objects.filter(user=user, idempotency_key=idempotency_key).first()
+
+    def _serve_record_response(self, doc_record, cache_status):
+        pdf_file_path = os.path.join(settings.MEDIA_ROOT, doc_record.pdf_file.name)
+        response = self._serve_pdf_response(
+            pdf_file_path, os.path.basename(doc_record.pdf_file.name), doc_record.content_hash
+        )
+        response['X-Render-Cache'] = cache_status
+        return response
 
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
-        finally:
-            pythoncom.CoUninitialize()
+    def _reserve_filename(self, pdf_filename):
+        # Concurrent requests and background jobs can share a timestamp; claim the name up front.
+        directory = os.path.join(settings.MEDIA_ROOT, self.output_dir)
+        os.makedirs(directory, exist_ok=True)
+        name = pdf_filename
+        while True:
+            try:
+                os.close(os.open(os.path.join(directory, name), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return name
+            except FileExistsError:
+                name = f'{os.path.splitext(pdf_filename)[0]}_{get_random_string(7)}.pdf'
+
+    def _get_engine(self):
+        return getattr(settings, 'DOCUMENT_ENGINES', {}).get(self.template_name, 'docx')
+
+    def _get_template_path(self):
+        if self._get_engine() == 'pdf_form':
+            pdf_name = f'{os.path.splitext(self.template_name)[0]}.pdf'
+            return os.path.join(settings.DOCUMENT_PDF_TEMPLATES_DIR, pdf_name)
+        return template_store.resolve(self.template_name)
+
+    def _load_template(self):
+        template_path = self._get_template_path()
+        if self._get_engine() == 'pdf_form':
+            return pdf_form_cache.entry(template_path)
+        return template_cache.entry(template_path, self.template_name)
+
+    def _flatten_forms(self):
+        return getattr(settings, 'DOCUMENT_PDF_FORM_FLATTEN', True)
+
+    def _validate_payload(self, context):
+        for key in self.faculty_keys:
+            value = context.get(key)
+            if value in (None, ''):
+                continue
+            try:
+                int(value)
+            except (TypeError, ValueError):
+                return f'Invalid faculty ID for {key}.'
+        return None
+
+    def _wants_async(self, request):
+        if request.query_params.get('async', '').lower() in ('1', 'true', 'yes'):
+            return True
+        return 'respond-async' in request.headers.get('Prefer', '')
+
+    def _job_accepted_response(self, request, job):
+        status_url = request.build_absolute_uri(f'/api/document-jobs/{job.jobID}/')
+        response = JsonResponse({
+            'jobID': str(job.jobID),
+            'status': job.status,
+            'status_url': status_url,
+        }, status=202)
+        response['Location'] = status_url
+        return response
 
     def _prepare_docx_context(self, context):
         docx_context = context.copy()
-        for key in ['panel_chair', 'adviser', 'panel1', 'panel2', 'panel3']:
+        for key in self.faculty_keys:
             docx_context[key] = self._get_faculty_name(context.get(key))
         return docx_context
 
+    def _resolve_faculty(self, contexts):
+        return faculty_cache.resolve({
+            int(context[key]) for context in contexts for key in self.faculty_keys
+            if context.get(key) not in (None, '')
+        })
+
     def _get_faculty_name(self, faculty_id):
-        faculty = Faculty.objects.filter(facultyID=faculty_id).first()
+        faculty = self._get_faculty_object(faculty_id)
         return faculty.name if faculty else 'Unknown'
 
     def _get_faculty_object(self, faculty_id):
-        return Faculty.objects.filter(facultyID=faculty_id).first()
-
-    def _convert_to_pdf(self, docx_path, pdf_path):
-        word = Dispatch('Word.Application')
-        word.Visible = False
-        doc = word.Documents.Open(docx_path)
-        doc.SaveAs(pdf_path, FileFormat=17)
-        doc.Close()
-        word.Quit()
-
-    def _save_application_record(self, user, context, pdf_filename):
-        return ApplicationDefense.objects.create(
+        if faculty_id in (None, ''):
+            return None
+        if self.faculty_lookup is not None:
+            return self.faculty_lookup.get(int(faculty_id))
+        return faculty_cache.get(faculty_id)
+
+    def _convert_to_pdf(self, docx_bytes):
+        return get_converter().convert_bytes(docx_bytes)
+
+    def _save_record(self, user, context, docx_filename, pdf_filename, **extra_fields):
+        doc_record = self._build_record(user, context, docx_filename, pdf_filename, **extra_fields)
+        doc_record.save()
+        return doc_record
+
+    def _build_record(self, user, context, docx_filename, pdf_filename, **extra_fields):
+        raise NotImplementedError
+
+    def _serve_pdf_response(self, pdf_path, pdf_filename, digest=None):
+        if digest:
+            # The render hash identifies the inputs, not the bytes; the size tells the PDF as
+            # converted apart from its smaller, optimized replacement.
+            digest = f'{digest}-{os.path.getsize(pdf_path):x}'
+        return serve_file(self.request, pdf_path, 'application/pdf', filename=pdf_filename, digest=digest)
+
+class ApplicationDocxView(DocumentGenerationView):
+    template_name = 'template_application.docx'
+    output_dir = 'defense_application'
+    filename_prefix = 'Application-for-Oral-Defense'
+    job_kind = 'application'
+    record_model = ApplicationDefense
+
+    def _build_record(self, user, context, docx_filename, pdf_filename, **extra_fields):
+        return self._build_application_record(user, context, pdf_filename, **extra_fields)
+
+    def _build_application_record(self, user, context, pdf_filename, **extra_fields):
+        return ApplicationDefense(
             user=user,
             department=context.get('department'),
             lead_researcher=context.get('lead_researcher'),
@@ -299,312 +543,243 @@ class ProposalApplicationDocxView(APIView):
             panel3=self._get_faculty_object(context.get('panel3')),
             documenter=context.get('documenter'),
             pdf_file=f'defense_application/{pdf_filename}',
+            **extra_fields,
         )
 
-    def _serve_pdf_response(self, pdf_path, pdf_filename):
-        pdf_file = open(pdf_path, 'rb')
-        response = FileResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="{pdf_filename}"'
-        return response
+class ProposalApplicationDocxView(ApplicationDocxView):
+    template_name = 'template_application_proposal.docx'
+    job_kind = 'proposal_application'
+
+class FinalApplicationDocxView(ApplicationDocxView):
+    template_name = 'template_application_final.docx'
+    job_kind = 'final_application'
+
+class TemplateRevisionView(APIView):
+    source_name = None
+    output_name = None
 
-class FinalApplicationDocxView(APIView):
     def post(self, request, *args, **kwargs):
         context = request.data
-        user = request.user
-        template_path = os.path.join(
-            settings.BASE_DIR, 'rkive', 'templates', 'word_templates', 'template_application_final.docx'
-        )
+        template_path = template_store.base_path(self.source_name)
 
         if not os.path.exists(template_path):
-            return JsonResponse({'error': 'Template file not found.'}, status=404)
+            return JsonResponse({'error': f'Template file ({self.source_name}) not found.'}, status=404)
+
+        replacements = {
+            '{{rev}}': context.get('rev', '{{rev}}'),
+            '{{date}}': context.get('date', '{{date}}'),
+        }
+        if not placeholder_index.members(template_path, list(replacements)):
+            return JsonResponse({'error': 'Could not find {{rev}} or {{date}} in any XML file.'}, status=500)
 
         try:
-            pythoncom.CoInitialize()
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            docx_filename = f'Application-for-Oral-Defense_{timestamp}.docx'
-            pdf_filename = docx_filename.replace('.docx', '.pdf')
-            docx_file_path = os.path.join(settings.MEDIA_ROOT, 'defense_application', docx_filename)
-            pdf_file_path = os.path.join(settings.MEDIA_ROOT, 'defense_application', pdf_filename)
+            # Published as a new immutable revision; renders in flight keep the one they loaded.
+            revision, output_path = template_store.publish(
+                self.output_name, lambda path: rewrite_docx(template_path, path, replacements)
+            )
+            response = self._serve_docx_response(output_path)
+            response['X-Template-Revision'] = revision
+            return response
 
-            os.makedirs(os.path.dirname(docx_file_path), exist_ok=True)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
 
-            docx_context = self._prepare_docx_context(context)
-            doc = DocxTemplate(template_path)
-            doc.render(docx_context)
-            doc.save(docx_file_path)
+    def _serve_docx_response(self, output_path):
+        docx_file = open(output_path, 'rb')
+        response = FileResponse(
+            docx_file,
+            content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        )
+        response['Content-Disposition'] = f'inline; filename="{self.output_name}"'
+        return response
 
-            self._convert_to_pdf(docx_file_path, pdf_file_path)
-            doc_record = self._save_application_record(user, context, pdf_filename)
-            os.remove(docx_file_path)
 
-            return self._serve_pdf_response(pdf_file_path, pdf_filename)
+class ApplicationAdminDocxView(TemplateRevisionView):
+    source_name = 'template_application_ISO.docx'
+    output_name = 'template_application.docx'
 
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
-        finally:
-            pythoncom.CoUninitialize()
 
-    def _prepare_docx_context(self, context):
-        docx_context = context.copy()
-        for key in ['panel_chair', 'adviser', 'panel1', 'panel2', 'panel3']:
-            docx_context[key] = self._get_faculty_name(context.get(key))
-        return docx_context
+class PanelDocxView(DocumentGenerationView):
+    template_name = 'template_panel.docx'
+    output_dir = 'panel_nomination'
+    filename_prefix = 'Panel-Nomination'
+    job_kind = 'panel'
+    record_model = PanelApplication
+    faculty_keys = ['adviser', 'panel_chair', 'panel1', 'panel2', 'panel3']
 
-    def _get_faculty_name(self, faculty_id):
-        faculty = Faculty.objects.filter(facultyID=faculty_id).first()
-        return faculty.name if faculty else 'Unknown'
+    def _build_record(self, user, context, docx_filename, pdf_filename, **extra_fields):
+        return self._build_panel_record(user, context, docx_filename, pdf_filename, **extra_fields)
 
-    def _get_faculty_object(self, faculty_id):
-        return Faculty.objects.filter(facultyID=faculty_id).first()
-
-    def _convert_to_pdf(self, docx_path, pdf_path):
-        word = Dispatch('Word.Application')
-        word.Visible = False
-        doc = word.Documents.Open(docx_path)
-        doc.SaveAs(pdf_path, FileFormat=17)
-        doc.Close()
-        word.Quit()
-
-    def _save_application_record(self, user, context, pdf_filename):
-        return ApplicationDefense.objects.create(
+    def _build_panel_record(self, user, context, docx_filename, pdf_filename, **extra_fields):
+        return PanelApplication(
             user=user,
-            department=context.get('department'),
+            research_title=context.get('research_title'),
             lead_researcher=context.get('lead_researcher'),
-            lead_contactno=context.get('lead_contactno'),
             co_researcher=context.get('co_researcher'),
             co_researcher1=context.get('co_researcher1'),
             co_researcher2=context.get('co_researcher2'),
             co_researcher3=context.get('co_researcher3'),
             co_researcher4=context.get('co_researcher4'),
-            research_title=context.get('research_title'),
-            datetime_defense=context.get('datetime_defense'),
-            place_defense=context.get('place_defense'),
-            panel_chair=self._get_faculty_object(context.get('panel_chair')),
             adviser=self._get_faculty_object(context.get('adviser')),
+            panel_chair=self._get_faculty_object(context.get('panel_chair')),
             panel1=self._get_faculty_object(context.get('panel1')),
             panel2=self._get_faculty_object(context.get('panel2')),
             panel3=self._get_faculty_object(context.get('panel3')),
-            documenter=context.get('documenter'),
-            pdf_file=f'defense_application/{pdf_filename}',
-        )
-
-    def _serve_pdf_response(self, pdf_path, pdf_filename):
-        pdf_file = open(pdf_path, 'rb')
-        response = FileResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="{pdf_filename}"'
-        return response
-
-class ApplicationAdminDocxView(APIView):
-    def post(self, request, *args, **kwargs):
-        context = request.data
-        template_path = os.path.join(
-            settings.BASE_DIR, 'rkive', 'templates', 'word_templates', 'template_application_ISO.docx'
-        )
-        output_path = os.path.join(
-            settings.BASE_DIR, 'rkive', 'templates', 'word_templates', 'template_application.docx'
+            docx_file=f'panel_nomination/{docx_filename}' if docx_filename else '',
+            pdf_file=f'panel_nomination/{pdf_filename}',
+            **extra_fields,
         )
+class PanelAdminDocxView(TemplateRevisionView):
+    source_name = 'template_panel_ISO.docx'
+    output_name = 'template_panel.docx'
 
-        if not os.path.exists(template_path):
-            return JsonResponse({'error': 'Template file (template_application_ISO.docx) not found.'}, status=404)
 
-        try:
-            zip_data = self._read_docx_template(template_path)
-            updated = self._update_xml_content(zip_data, context)
-            if not updated:
-                return JsonResponse({'error': 'Could not find {{rev}} or {{date}} in any XML file.'}, status=500)
+REVISED_TEMPLATES = {view.output_name for view in (ApplicationAdminDocxView, PanelAdminDocxView)}
 
-            self._write_updated_docx(zip_data, output_path)
-            return self._serve_docx_response(output_path)
 
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
-
-    def _read_docx_template(self, template_path):
-        zip_data = {}
-        with zipfile.ZipFile(template_path, 'r') as zip_ref:
-            for item in zip_ref.infolist():
-                zip_data[item.filename] = zip_ref.read(item.filename)
-        return zip_data
-
-    def _update_xml_content(self, zip_data, context):
-        new_rev = context.get('rev', '{{rev}}')
-        new_date = context.get('date', '{{date}}')
-        updated = False
-        for filename in zip_data.keys():
-            if filename.endswith('.xml'):
-                xml_content = zip_data[filename].decode('utf-8', errors='ignore')
-                if '{{rev}}' in xml_content or '{{date}}' in xml_content:
-                    updated_xml = xml_content.replace('{{rev}}', new_rev).replace('{{date}}', new_date)
-                    zip_data[filename] = updated_xml.encode('utf-8')
-                    updated = True
-        return updated
-
-    def _write_updated_docx(self, zip_data, output_path):
-        output = BytesIO()
-        with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zip_out:
-            for filename, content in zip_data.items():
-                zip_out.writestr(filename, content)
-        with open(output_path, 'wb') as f:
-            f.write(output.getvalue())
-
-    def _serve_docx_response(self, output_path):
-        docx_file = open(output_path, 'rb')
-        response = FileResponse(
-            docx_file,
-            content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        )
-        response['Content-Disposition'] = 'inline; filename="template_application.docx"'
-        return response
+class TemplateRevisionListView(APIView):
+    permission_classes = [IsAdminUser]
 
+    def get(self, request, template_name, *args, **kwargs):
+        if template_name not in REVISED_TEMPLATES:
+            raise Http404
+        return Response({
+            'template': template_name,
+            'current': template_store.current_revision(template_name),
+            'revisions': template_store.revisions(template_name),
+        })
 
-class PanelDocxView(APIView):
-    def post(self, request, *args, **kwargs):
-        context = request.data
-        user = request.user
-        template_path = os.path.join(
-            settings.BASE_DIR, 'rkive', 'templates', 'word_templates', 'template_panel.docx'
-        )
 
-        if not os.path.exists(template_path):
-            return JsonResponse({'error': 'Template file not found.'}, status=404)
+class TemplateRollbackView(APIView):
+    permission_classes = [IsAdminUser]
 
+    def post(self, request, template_name, *args, **kwargs):
+        if template_name not in REVISED_TEMPLATES:
+            raise Http404
         try:
-            pythoncom.CoInitialize()
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            docx_filename = f'Panel-Nomination_{timestamp}.docx'
-            pdf_filename = docx_filename.replace('.docx', '.pdf')
-            docx_file_path = os.path.join(settings.MEDIA_ROOT, 'panel_nomination', docx_filename)
-            pdf_file_path = os.path.join(settings.MEDIA_ROOT, 'panel_nomination', pdf_filename)
+            revision = template_store.rollback(template_name, request.data.get('revision'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except FileNotFoundError as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'template': template_name, 'current': revision})
 
-            os.makedirs(os.path.dirname(docx_file_path), exist_ok=True)
 
-            docx_context = self._prepare_docx_context(context)
-            doc = DocxTemplate(template_path)
-            doc.render(docx_context)
-            doc.save(docx_file_path)
+DOCUMENT_GENERATORS = {
+    view.job_kind: view
+    for view in (ApplicationDocxView, ProposalApplicationDocxView, FinalApplicationDocxView, PanelDocxView)
+}
 
-            self._convert_to_pdf(docx_file_path, pdf_file_path)
-            panel_record = self._save_panel_record(user, context, docx_filename, pdf_filename)
-            os.remove(docx_file_path)
 
-            return self._serve_pdf_response(pdf_file_path, pdf_filename)
+class DocumentBatchView(APIView):
+    def post(self, request, *args, **kwargs):
+        kind = request.data.get('kind')
+        items = request.data.get('items')
+        view_class = DOCUMENT_GENERATORS.get(kind)
+
+        if view_class is None:
+            return JsonResponse({'error': f'Unknown document kind. Expected one of: {", ".join(DOCUMENT_GENERATORS)}.'}, status=400)
+        if not isinstance(items, list) or not items:
+            return JsonResponse({'error': 'items must be a non-empty list.'}, status=400)
+        max_items = getattr(settings, 'DOCUMENT_BATCH_MAX_ITEMS', 500)
+        if len(items) > max_items:
+            return JsonResponse({'error': f'A batch can contain at most {max_items} items.'}, status=400)
+
+        view = view_class()
+        if not os.path.exists(view._get_template_path()):
+            return JsonResponse({'error': 'Template file not found.'}, status=404)
+
+        for index, item in enumerate(items):
+            error = view._validate_payload(item) if isinstance(item, dict) else 'Item must be an object.'
+            if error:
+                return JsonResponse({'error': f'Item {index}: {error}'}, status=400)
 
+        try:
+            records = view.generate_batch(request.user, items)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
-        finally:
-            pythoncom.CoUninitialize()
 
-    def _prepare_docx_context(self, context):
-        docx_context = context.copy()
-        for key in ['adviser', 'panel_chair', 'panel1', 'panel2', 'panel3']:
-            docx_context[key] = self._get_faculty_name(context.get(key))
-        return docx_context
+        entries = [
+            (f'{index + 1:03d}_{os.path.basename(record.pdf_file.name)}', os.path.join(settings.MEDIA_ROOT, record.pdf_file.name))
+            for index, record in enumerate(records)
+        ]
+        manifest = [
+            {'index': index, 'id': record.pk, 'pdf_file': record.pdf_file.name}
+            for index, record in enumerate(records)
+        ]
+        entries.append(('manifest.json', json.dumps(manifest, indent=2).encode('utf-8')))
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        response = StreamingHttpResponse(stream_zip(entries), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{view.filename_prefix}_batch_{timestamp}.zip"'
+        return response
 
-    def _get_faculty_name(self, faculty_id):
-        faculty = Faculty.objects.filter(facultyID=faculty_id).first()
-        return faculty.name if faculty else 'Unknown'
 
-    def _get_faculty_object(self, faculty_id):
-        return Faculty.objects.filter(facultyID=faculty_id).first()
-
-    def _convert_to_pdf(self, docx_path, pdf_path):
-        word = Dispatch('Word.Application')
-        word.Visible = False
-        doc = word.Documents.Open(docx_path)
-        doc.SaveAs(pdf_path, FileFormat=17)
-        doc.Close()
-        word.Quit()
-
-    def _save_panel_record(self, user, context, docx_filename, pdf_filename):
-        return PanelApplication.objects.create(
-            user=user,
-            research_title=context.get('research_title'),
-            lead_researcher=context.get('lead_researcher'),
-            co_researcher=context.get('co_researcher'),
-            co_researcher1=context.get('co_researcher1'),
-            co_researcher2=context.get('co_researcher2'),
-            co_researcher3=context.get('co_researcher3'),
-            co_researcher4=context.get('co_researcher4'),
-            adviser=self._get_faculty_object(context.get('adviser')),
-            panel_chair=self._get_faculty_object(context.get('panel_chair')),
-            panel1=self._get_faculty_object(context.get('panel1')),
-            panel2=self._get_faculty_object(context.get('panel2')),
-            panel3=self._get_faculty_object(context.get('panel3')),
-            docx_file=f'panel_nomination/{docx_filename}',
-            pdf_file=f'panel_nomination/{pdf_filename}',
-        )
+class DocumentJobView(APIView):
+    def get(self, request, job_id, *args, **kwargs):
+        job = self._get_job(request, job_id)
+        data = {
+            'jobID': str(job.jobID),
+            'kind': job.kind,
+            'status': job.status,
+            'error': job.error,
+            'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': job.finished_at.strftime('%Y-%m-%d %H:%M:%S') if job.finished_at else None,
+            'pdf_url': None,
+        }
+        if job.status == 'completed':
+            data['pdf_url'] = request.build_absolute_uri(f'/api/document-jobs/{job.jobID}/pdf/')
+        return JsonResponse(data, status=200)
+
+    def _get_job(self, request, job_id):
+        jobs = DocumentJob.objects.all()
+        if not request.user.is_staff:
+            jobs = jobs.filter(user=request.user)
+        try:
+            return jobs.get(jobID=job_id)
+        except DocumentJob.DoesNotExist:
+            raise Http404('Job not found.')
 
-    def _serve_pdf_response(self, pdf_path, pdf_filename):
-        pdf_file = open(pdf_path, 'rb')
-        response = FileResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="{pdf_filename}"'
-        return response
 
+class DocumentJobPdfView(DocumentJobView):
+    def get(self, request, job_id, *args, **kwargs):
+        job = self._get_job(request, job_id)
+        if job.status != 'completed':
+            return JsonResponse({'error': f'Job is {job.status}.', 'status': job.status}, status=409)
 
-class PanelAdminDocxView(APIView):
-    def post(self, request, *args, **kwargs):
-        context = request.data
-        template_path = os.path.join(
-            settings.BASE_DIR, 'rkive', 'templates', 'word_templates', 'template_panel_ISO.docx'
-        )
-        output_path = os.path.join(
-            settings.BASE_DIR, 'rkive', 'templates', 'word_templates', 'template_panel.docx'
-        )
+        return serve_file(request, job.pdf_file.path, 'application/pdf', filename=os.path.basename(job.pdf_file.name))
 
-        if not os.path.exists(template_path):
-            return JsonResponse({'error': 'Template file (template_panel_ISO.docx) not found.'}, status=404)
 
-        try:
-            zip_data = self._read_docx_template(template_path)
-            updated = self._update_xml_content(zip_data, context)
-            if not updated:
-                return JsonResponse({'error': 'Could not find {{rev}} or {{date}} in any XML file.'}, status=500)
+class DocumentMetricsView(APIView):
+    permission_classes = [IsAdminUser]
 
-            self._write_updated_docx(zip_data, output_path)
-            return self._serve_docx_response(output_path)
+    def get(self, request, *args, **kwargs):
+        return Response(stage_metrics.snapshot())
 
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+    def delete(self, request, *args, **kwargs):
+        stage_metrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-    def _read_docx_template(self, template_path):
-        zip_data = {}
-        with zipfile.ZipFile(template_path, 'r') as zip_ref:
-            for item in zip_ref.infolist():
-                zip_data[item.filename] = zip_ref.read(item.filename)
-        return zip_data
-
-    def _update_xml_content(self, zip_data, context):
-        new_rev = context.get('rev', '{{rev}}')
-        new_date = context.get('date', '{{date}}')
-        updated = False
-        for filename in zip_data.keys():
-            if filename.endswith('.xml'):
-                xml_content = zip_data[filename].decode('utf-8', errors='ignore')
-                if '{{rev}}' in xml_content or '{{date}}' in xml_content:
-                    updated_xml = xml_content.replace('{{rev}}', new_rev).replace('{{date}}', new_date)
-                    zip_data[filename] = updated_xml.encode('utf-8')
-                    updated = True
-        return updated
-
-    def _write_updated_docx(self, zip_data, output_path):
-        output = BytesIO()
-        with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zip_out:
-            for filename, content in zip_data.items():
-                zip_out.writestr(filename, content)
-        with open(output_path, 'wb') as f:
-            f.write(output.getvalue())
 
-    def _serve_docx_response(self, output_path):
-        docx_file = open(output_path, 'rb')
-        response = FileResponse(
-            docx_file,
-            content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        )
-        response['Content-Disposition'] = 'inline; filename="template_panel.docx"'
-        return response
+class DocumentCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            'templates': template_cache.stats(),
+            'renders': render_cache.stats(),
+            'page_images': page_image_cache.stats(),
+        }, status=200)
 
 
 # Manuscript Views
+manuscript_paginator = KeysetPaginator(
+    'created_at', 'manuscriptID',
+    default_limit=getattr(settings, 'MANUSCRIPT_PAGE_SIZE', 50),
+    max_limit=getattr(settings, 'MANUSCRIPT_MAX_PAGE_SIZE', 200),
+)
+
+
 class ManuscriptSubmissionView(APIView):
     parser_classes = (MultiPartParser, FormParser)
 
@@ -629,89 +804,426 @@ class ManuscriptSubmissionView(APIView):
             'manuscriptID': manuscript.manuscriptID,
             'title': manuscript.title,
             'description': manuscript.description,
-            'pdf_url': request.build_absolute_uri(manuscript.pdf.url),
+            'pdf_url': request.build_absolute_uri(_manuscript_pdf_url(manuscript)),
             'created_at': manuscript.created_at.strftime('%Y-%m-%d %H:%M:%S'),
         }, status=201)
 
     def get(self, request, *args, **kwargs):
         search_query = request.GET.get('q', '').strip()
+        origin = request.build_absolute_uri('/').rstrip('/')
+        try:
+            limit = manuscript_paginator.parse_limit(request.GET.get('limit'))
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        hits = search_manuscripts(search_query, limit if 'limit' in request.GET else None) if search_query else None
+        if hits is not None:
+            found = Manuscript.objects.defer('body_text').in_bulk([manuscript_id for manuscript_id, _, _ in hits])
+            results = [(found[manuscript_id], score, snippet) for manuscript_id, score, snippet in hits if manuscript_id in found]
+            data = [
+                {**self._serialize(origin, manuscript), 'score': round(score, 4), 'snippet': snippet}
+                for manuscript, score, snippet in results
+            ]
+            return JsonResponse(data, safe=False, status=200)
+
         manuscripts = Manuscript.objects.filter(
             Q(title__icontains=search_query) | Q(description__icontains=search_query)
         ) if search_query else Manuscript.objects.all()
+        manuscripts = manuscripts.defer('body_text')
 
-        data = [{
-            'manuscriptID': manuscript.manuscriptID,
-            'title': manuscript.title,
-            'description': manuscript.description,
-            'pdf_url': request.build_absolute_uri(manuscript.pdf.url),
-            'created_at': manuscript.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-        } for manuscript in manuscripts]
+        if request.GET.get('stream', '').lower() in ('1', 'true', 'yes'):
+            rows = manuscript_paginator.ordered(manuscripts).iterator(chunk_size=500)
+            response = StreamingHttpResponse(self._stream_json(origin, rows), content_type='application/json')
+            response['Content-Disposition'] = 'attachment; filename="manuscripts.json"'
+            return response
 
+        if 'cursor' in request.GET or 'limit' in request.GET:
+            try:
+                rows, next_cursor = manuscript_paginator.page(manuscripts, request.GET.get('cursor'), limit)
+            except InvalidCursor as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            next_url = None
+            if next_cursor:
+                query = request.GET.copy()
+                query['cursor'] = next_cursor
+                next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+            return JsonResponse({
+                'results': [self._serialize(origin, manuscript) for manuscript in rows],
+                'next_cursor': next_cursor,
+                'next': next_url,
+            }, status=200)
+
+        data = [self._serialize(origin, manuscript) for manuscript in manuscripts]
         return JsonResponse(data, safe=False, status=200)
 
+    def _stream_json(self, origin, manuscripts):
+        yield '['
+        separator = ''
+        for manuscript in manuscripts:
+            yield separator + json.dumps(self._serialize(origin, manuscript))
+            separator = ','
+        yield ']'
+
+    def _serialize(self, origin, manuscript):
+        return _serialize_manuscript(origin, manuscript)
+
+
+def _manuscript_pdf_url(manuscript):
+    # Offloaded media is not public under MEDIA_URL, only through ManuscriptPdfView.
+    if settings.MEDIA_DELIVERY == 'django':
+        return manuscript.pdf.url
+    return f'/api/manuscripts/{manuscript.manuscriptID}/pdf/'
+
+
+def _serialize_manuscript(origin, manuscript):
+    return {
+        'manuscriptID': manuscript.manuscriptID,
+        'title': manuscript.title,
+        'description': manuscript.description,
+        'pdf_url': origin + _manuscript_pdf_url(manuscript),
+        'thumbnail_url': f'{origin}/api/manuscripts/{manuscript.manuscriptID}/thumbnail/',
+        'page_count': manuscript.pdf_page_count,
+        'size': manuscript.pdf_size,
+        'sha256': manuscript.pdf_sha256 or None,
+        'text_length': manuscript.pdf_text_length,
+        'pdf_version': manuscript.pdf_version or None,
+        'created_at': manuscript.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+class ManuscriptUploadView(APIView):
+    """Starts a resumable upload; the file then arrives in PATCH chunks at the returned URL."""
+
+    def post(self, request, *args, **kwargs):
+        title = request.data.get('title')
+        description = request.data.get('description', '').strip()
+        filename = request.data.get('filename') or 'manuscript.pdf'
+        try:
+            length = int(request.headers.get('Upload-Length') or request.data.get('length'))
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'Upload-Length header (or length) is required.'}, status=400)
+
+        if not title:
+            return JsonResponse({'error': 'Title is required.'}, status=400)
+        if not filename.lower().endswith('.pdf'):
+            return JsonResponse({'error': 'Only PDF files can be uploaded.'}, status=400)
+
+        try:
+            upload = create_upload(request.user, title, description, filename, length)
+        except UploadError as e:
+            return JsonResponse({'error': str(e)}, status=e.status)
+
+        upload_url = request.build_absolute_uri(f'/api/manuscripts/uploads/{upload.uploadID}/')
+        response = JsonResponse({
+            'uploadID': str(upload.uploadID),
+            'offset': upload.offset,
+            'length': upload.length,
+            'upload_url': upload_url,
+        }, status=201)
+        response['Location'] = upload_url
+        response['Upload-Offset'] = str(upload.offset)
+        return response
+
+
+class ManuscriptUploadDetailView(APIView):
+    def head(self, request, upload_id, *args, **kwargs):
+        return self._offset_response(HttpResponse(status=200), self._get_upload(request, upload_id))
+
+    def get(self, request, upload_id, *args, **kwargs):
+        upload = self._get_upload(request, upload_id)
+        return self._offset_response(JsonResponse({
+            'uploadID': str(upload.uploadID),
+            'filename': upload.filename,
+            'offset': upload.offset,
+            'length': upload.length,
+            'complete': upload.offset == upload.length,
+            'manuscriptID': upload.manuscript_id,
+        }, status=200), upload)
+
+    def patch(self, request, upload_id, *args, **kwargs):
+        upload = self._get_upload(request, upload_id)
+        if request.content_type != 'application/offset+octet-stream':
+            return JsonResponse({'error': 'Content-Type must be application/offset+octet-stream.'}, status=415)
+        try:
+            offset = int(request.headers.get('Upload-Offset'))
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'Upload-Offset header is required.'}, status=400)
+
+        try:
+            append_chunk(upload, offset, request.stream or BytesIO())
+        except UploadError as e:
+            return self._offset_response(JsonResponse({'error': str(e), 'offset': upload.offset}, status=e.status), upload)
+        return self._offset_response(HttpResponse(status=204), upload)
+
+    def delete(self, request, upload_id, *args, **kwargs):
+        upload = self._get_upload(request, upload_id)
+        discard_partial(upload)
+        upload.delete()
+        return HttpResponse(status=204)
+
+    def _get_upload(self, request, upload_id):
+        upload = ManuscriptUpload.objects.filter(uploadID=upload_id, user=request.user).first()
+        if upload is None:
+            raise Http404('Upload not found.')
+        return upload
+
+    def _offset_response(self, response, upload):
+        response['Upload-Offset'] = str(upload.offset)
+        response['Upload-Length'] = str(upload.length)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+class ManuscriptUploadFinalizeView(ManuscriptUploadDetailView):
+    def post(self, request, upload_id, *args, **kwargs):
+        upload = self._get_upload(request, upload_id)
+        try:
+            manuscript = finalize_upload(upload)
+        except UploadError as e:
+            return JsonResponse({'error': str(e), 'offset': upload.offset}, status=e.status)
+
+        return JsonResponse({
+            'message': 'Manuscript submitted successfully',
+            **_serialize_manuscript(request.build_absolute_uri('/').rstrip('/'), manuscript),
+        }, status=201)
+
 
 class ManuscriptPdfView(APIView):
     def get(self, request, manuscript_id, *args, **kwargs):
-        try:
-            manuscript = Manuscript.objects.get(id=manuscript_id)
-            pdf_path = manuscript.pdf.path
-            response = FileResponse(open(pdf_path, 'rb'), content_type='application/pdf')
-            response['Content-Disposition'] = 'inline; filename="manuscript.pdf"'
-            return response
-        except Manuscript.DoesNotExist:
+        manuscript = Manuscript.objects.defer('body_text').filter(manuscriptID=manuscript_id).first()
+        if manuscript is None or not manuscript.pdf:
             raise Http404('Manuscript not found.')
+        pdf_path = manuscript.pdf.path
+        if not os.path.exists(pdf_path):
+            raise Http404('Manuscript file not found.')
+
+        # Deduplicated blobs are named after their SHA-256, which is exactly a strong ETag.
+        digest = None
+        if manuscript_storage.is_blob(manuscript.pdf.name):
+            digest = os.path.splitext(os.path.basename(manuscript.pdf.name))[0]
+        return serve_file(request, pdf_path, 'application/pdf', filename='manuscript.pdf', digest=digest)
+
+
+
+class PageImageView(APIView):
+    """JPEG of one PDF page at ?width= (snapped to PAGE_IMAGE_WIDTH_STEP), from the page image cache."""
+
+    thumbnail = False
+
+    def get_pdf_name(self, request, **kwargs):
+        raise NotImplementedError
+
+    def get(self, request, page=1, *args, **kwargs):
+        name = self.get_pdf_name(request, **kwargs)
+        pdf_path = os.path.join(settings.MEDIA_ROOT, name) if name else None
+        if not pdf_path or not os.path.isfile(pdf_path):
+            raise Http404('Document not found.')
+        try:
+            width = settings.PAGE_THUMBNAIL_WIDTH if self.thumbnail else snap_width(request.GET.get('width'))
+        except ValueError:
+            return JsonResponse({'error': 'width must be a positive integer.'}, status=400)
+
+        digest = pdf_digest(name, pdf_path)
+        try:
+            image_path = page_image_cache.get(pdf_path, digest, page, width)
+        except PageNotFound as exc:
+            raise Http404(str(exc))
+        except RuntimeError:
+            return JsonResponse({'error': 'The PDF could not be rendered.'}, status=422)
+        return serve_file(request, image_path, 'image/jpeg', digest=f'{digest}-{page}-{width}')
+
 
+class ManuscriptPageView(PageImageView):
+    def get_pdf_name(self, request, manuscript_id, **kwargs):
+        return Manuscript.objects.filter(manuscriptID=manuscript_id).values_list('pdf', flat=True).first()
+
+
+class GeneratedPageView(PageImageView):
+    """Pages of a generated application; visible to its owner and to staff, faculty and department heads."""
+
+    record_model = None
+
+    def get_pdf_name(self, request, record_id, **kwargs):
+        records = self.record_model.objects.filter(pk=record_id)
+        user = request.user
+        if not (user.is_staff or user.is_faculty or user.is_dean or user.is_headdept):
+            records = records.filter(user=user)
+        return records.values_list('pdf_file', flat=True).first()
+
+
+class ApplicationPageView(GeneratedPageView):
+    record_model = ApplicationDefense
+
+
+class PanelPageView(GeneratedPageView):
+    record_model = PanelApplication
 
 # Utility Views
 class DocumentCountView(APIView):
-    def get(self, request, *args, **kwargs):
-        generated_docs_path = os.path.join(settings.MEDIA_ROOT, 'generated_documents')
-        manuscripts_path = os.path.join(settings.MEDIA_ROOT, 'manuscripts')
-
-        generated_docs_count = len([
-            f for f in os.listdir(generated_docs_path)
-            if os.path.isfile(os.path.join(generated_docs_path, f))
-        ])
-        manuscripts_count = len([
-            f for f in os.listdir(manuscripts_path)
-            if os.path.isfile(os.path.join(manuscripts_path, f))
-        ])
+    """Dashboard counts from the DocumentStat counters kept by signals; never touches the filesystem."""
 
+    def get(self, request, *args, **kwargs):
+        stats = document_stats.summary()
+        by_type = stats['by_type']
         return JsonResponse({
-            'generated_documents_count': generated_docs_count,
-            'manuscripts_count': manuscripts_count,
+            'generated_documents_count': by_type['application'] + by_type['panel'],
+            'manuscripts_count': by_type['manuscript'],
+            **stats,
         }, status=200)
 
 
-class ListDocumentFilesView(APIView):
+class DashboardView(APIView):
+    """Admin dashboard: users per role, submissions per month and department, reviews per status.
+
+    Each section is a grouped query cached for DASHBOARD_CACHE_TTL seconds, and dropped by
+    signals as soon as its rows change.
+    """
+    permission_classes = [IsAdminUser]
+
     def get(self, request, *args, **kwargs):
-        base_generated_documents_path = os.path.join(settings.MEDIA_ROOT, 'generated_documents')
-        base_manuscripts_path = os.path.join(settings.MEDIA_ROOT, 'manuscripts')
+        return JsonResponse(dashboard.snapshot(), status=200)
+
 
-        generated_documents_files = self._list_files(base_generated_documents_path)
-        manuscripts_files = self._list_files(base_manuscripts_path)
+file_paginators = {
+    f'{sign}{sort}': KeysetPaginator(
+        field, 'fileID',
+        default_limit=getattr(settings, 'FILE_LIST_PAGE_SIZE', 100),
+        max_limit=getattr(settings, 'FILE_LIST_MAX_PAGE_SIZE', 1000),
+        descending=sign == '-', value_type=value_type,
+    )
+    for sort, field, value_type in (('date', 'mtime', 'datetime'), ('size', 'size', int))
+    for sign in ('', '-')
+}
 
+
+class ListDocumentFilesView(APIView):
+    """Media files from the StoredFile catalog; never lists directories on the request path.
+
+    ?kind=, ?prefix= (path prefix), ?sort=date|-date|size|-size, ?limit= and ?cursor= return
+    keyset pages. Without any of them, the legacy {generated_documents_files, manuscripts_files}
+    lists of file paths relative to each directory are returned.
+    """
+
+    LEGACY_DIRECTORIES = ('generated_documents', 'manuscripts')
+
+    def get(self, request, *args, **kwargs):
+        if not any(param in request.GET for param in ('kind', 'prefix', 'sort', 'limit', 'cursor')):
+            return JsonResponse(self._legacy_listing())
+
+        paginator = file_paginators.get(request.GET.get('sort', '-date'))
+        if paginator is None:
+            return JsonResponse({'error': f'sort must be one of {", ".join(file_paginators)}.'}, status=400)
+        files = StoredFile.objects.select_related('content_type')
+        if request.GET.get('kind'):
+            files = files.filter(kind=request.GET['kind'])
+        if request.GET.get('prefix'):
+            files = files.filter(path__startswith=request.GET['prefix'])
+        try:
+            limit = paginator.parse_limit(request.GET.get('limit'))
+            rows, next_cursor = paginator.page(files, request.GET.get('cursor'), limit)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        next_url = None
+        if next_cursor:
+            query = request.GET.copy()
+            query['cursor'] = next_cursor
+            next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
         return JsonResponse({
-            'generated_documents_files': generated_documents_files,
-            'manuscripts_files': manuscripts_files,
-        })
+            'results': [self._serialize(stored) for stored in rows],
+            'next_cursor': next_cursor,
+            'next': next_url,
+        }, status=200)
 
-    def _list_files(self, directory_path):
-        if os.path.exists(directory_path):
-            return [
-                file for file in os.listdir(directory_path)
-                if os.path.isfile(os.path.join(directory_path, file))
-            ]
-        return []
+    def _serialize(self, stored):
+        owner = None
+        if stored.content_type_id:
+            owner = {'model': f'{stored.content_type.app_label}.{stored.content_type.model}', 'id': stored.object_id}
+        return {
+            'fileID': stored.fileID,
+            'path': stored.path,
+            'name': os.path.basename(stored.path),
+            'kind': stored.kind,
+            'size': stored.size,
+            'sha256': stored.sha256 or None,
+            'modified': stored.mtime.isoformat(),
+            'owner': owner,
+        }
+
+    def _legacy_listing(self):
+        listing = {directory: [] for directory in self.LEGACY_DIRECTORIES}
+        paths = StoredFile.objects.filter(
+            Q(path__startswith='generated_documents/') | Q(path__startswith='manuscripts/')
+        ).order_by('path').values_list('path', flat=True)
+        for path in paths:
+            # Relative to the directory, so manuscripts/blobs/aa/bb/<sha>.pdf is listed too.
+            directory, _, name = path.partition('/')
+            listing[directory].append(name)
+        return {f'{directory}_files': names for directory, names in listing.items()}
+
+
+user_paginator = KeysetPaginator(
+    'userID', 'userID',
+    default_limit=getattr(settings, 'USER_LIST_PAGE_SIZE', 100),
+    max_limit=getattr(settings, 'USER_LIST_MAX_PAGE_SIZE', 1000),
+    descending=False, value_type=int,
+)
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
 
 
 class ListUsersView(APIView):
+    """?limit= and ?cursor= page through users by userID; ?is_<role>=true|false and ?email=
+    (case-insensitive prefix) filter them, and ?fields=a,b picks the columns returned.
+    Without any of them, every user is returned as one list.
+    """
+
+    USER_FIELDS = (
+        'userID', 'first_name', 'last_name', 'email', 'is_active', 'is_staff',
+        'is_superuser', 'is_dean', 'is_headdept', 'is_faculty', 'is_student',
+    )
+    ROLE_FLAGS = tuple(field for field in USER_FIELDS if field.startswith('is_'))
+
     def get(self, request, *args, **kwargs):
-        users = User.objects.all().values(
-            'userID', 'first_name', 'last_name', 'email', 'is_active', 'is_staff',
-            'is_superuser', 'is_dean', 'is_headdept', 'is_faculty', 'is_student',
-        )
-        return Response(list(users))
+        if not any(param in request.GET for param in ('limit', 'cursor', 'fields', 'email', *self.ROLE_FLAGS)):
+            return Response(list(User.objects.all().values(*self.USER_FIELDS)))
+
+        fields = self.USER_FIELDS
+        if request.GET.get('fields'):
+            fields = [field.strip() for field in request.GET['fields'].split(',') if field.strip()]
+            unknown = set(fields) - set(self.USER_FIELDS)
+            if unknown:
+                return JsonResponse({'error': f'Unknown field(s): {", ".join(sorted(unknown))}.'}, status=400)
+        # The cursor is built from userID, so it is always returned.
+        fields = list(dict.fromkeys(['userID', *fields]))
+
+        users = User.objects.all()
+        for flag in self.ROLE_FLAGS:
+            value = request.GET.get(flag, '').lower()
+            if value in TRUE_VALUES:
+                users = users.filter(**{flag: True})
+            elif value in FALSE_VALUES:
+                users = users.filter(**{flag: False})
+            elif value:
+                return JsonResponse({'error': f'{flag} must be true or false.'}, status=400)
+        prefix = request.GET.get('email', '').strip().lower()
+        if prefix:
+            # A range on the Lower(email) index instead of LIKE, which SQLite cannot index here.
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            users = users.alias(email_lower=Lower('email')).filter(email_lower__gte=prefix, email_lower__lt=upper)
+
+        try:
+            limit = user_paginator.parse_limit(request.GET.get('limit'))
+            rows, next_cursor = user_paginator.page(users.values(*fields), request.GET.get('cursor'), limit)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        next_url = None
+        if next_cursor:
+            query = request.GET.copy()
+            query['cursor'] = next_cursor
+            next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+        return JsonResponse({'results': rows, 'next_cursor': next_cursor, 'next': next_url}, status=200)
 
     def post(self, request, *args, **kwargs):
         data = request.data